@@ -0,0 +1,109 @@
+"""Deterministic synthetic resumes and PDFs for the benchmarks.
+
+The same seed always produces the same text and the same PDF bytes, so timings
+from different runs (and branches) are measured on identical inputs.
+"""
+import random
+from typing import Dict, List
+
+from services.taxonomy import get_taxonomy
+
+# Jobs in the experience section per resume length
+RESUME_LENGTHS = {"short": 2, "medium": 5, "long": 12}
+LINES_PER_PAGE = 60
+
+FIRST_NAMES = ["Jane", "Omar", "Mei", "Lukas", "Priya", "Carlos", "Aisha", "Tom"]
+LAST_NAMES = ["Doe", "Schmidt", "Nakamura", "Okafor", "Rossi", "Novak", "Silva", "Khan"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Stark Industries", "Wayne Enterprises", "Hooli", "Vandelay"]
+VERBS = ["Led", "Built", "Designed", "Managed", "Improved", "Migrated", "Automated", "Delivered", "Reduced", "Launched"]
+OBJECTS = ["the reporting platform", "a customer onboarding flow", "the data pipeline", "vendor contracts",
+           "the release process", "patient scheduling", "quarterly budgets", "a training program"]
+DEGREES = ["BSc Computer Science", "MBA", "BA Marketing", "MSc Data Science", "BSN Nursing", "BEng Mechanical Engineering"]
+
+
+def resume_text(seed: int, length: str = "medium") -> str:
+    """A resume with contact details, summary, experience, skills and education sections"""
+    rng = random.Random(seed)
+    taxonomy = get_taxonomy()
+    field = rng.choice(taxonomy.field_names)
+    roles = list(taxonomy.role_suggestions.get(field, ())) or ["Specialist"]
+    skills = rng.sample(taxonomy.skills, 18)
+
+    lines = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"]
+    # Some resumes miss contact details so the ATS checks take both branches
+    if rng.random() < 0.8:
+        lines.append(f"{lines[0].split()[0].lower()}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}")
+
+    years = rng.randint(1, 20)
+    lines += ["", "Summary", f"{rng.choice(roles)} with {years}+ years of experience in {field}, "
+              f"skilled in {', '.join(skills[:3])}."]
+
+    lines += ["", "Experience"]
+    year = 2024
+    for _ in range(RESUME_LENGTHS[length]):
+        start = year - rng.randint(1, 4)
+        lines.append(f"{rng.choice(roles)} - {rng.choice(COMPANIES)} ({start} - {year})")
+        for _ in range(rng.randint(3, 6)):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(skills)}, "
+                         f"improving results by {rng.randint(5, 60)}%")
+        year = start
+
+    lines += ["", "Skills", ", ".join(skills), "", "Education", rng.choice(DEGREES)]
+    return "\n".join(lines)
+
+
+def resume_corpus(count: int, length: str = "medium", seed: int = 0) -> List[str]:
+    return [resume_text(seed + index, length) for index in range(count)]
+
+
+def text_pdf(text: str, min_pages: int = 1) -> bytes:
+    """Render text as a PDF with a text layer, padding with repeated content up to min_pages"""
+    import fitz  # PyMuPDF
+
+    lines = text.splitlines()
+    while len(lines) < min_pages * LINES_PER_PAGE:
+        lines += text.splitlines()
+
+    document = fitz.open()
+    for start in range(0, len(lines), LINES_PER_PAGE):
+        page = document.new_page()
+        page.insert_text((40, 50), "\n".join(lines[start:start + LINES_PER_PAGE]), fontsize=9)
+    data = document.tobytes(no_new_id=True)
+    document.close()
+    return data
+
+
+def scanned_pdf(text: str, min_pages: int = 1) -> bytes:
+    """The same document as text_pdf, but every page is an image without a text layer"""
+    import fitz  # PyMuPDF
+
+    source = fitz.open(stream=text_pdf(text, min_pages), filetype="pdf")
+    document = fitz.open()
+    for page in source:
+        pixmap = page.get_pixmap()
+        scanned = document.new_page(width=page.rect.width, height=page.rect.height)
+        scanned.insert_image(scanned.rect, stream=pixmap.tobytes("png"))
+    source.close()
+    data = document.tobytes(no_new_id=True)
+    document.close()
+    return data
+
+
+def job_description(seed: int) -> str:
+    rng = random.Random(seed)
+    taxonomy = get_taxonomy()
+    field = rng.choice(taxonomy.field_names)
+    role = rng.choice(list(taxonomy.role_suggestions.get(field, ())) or ["Specialist"])
+    required = rng.sample(taxonomy.skills, 8)
+    preferred = rng.sample(taxonomy.skills, 3)
+    return "\n".join([
+        role,
+        f"We are hiring a {role} with {rng.randint(2, 8)}+ years of experience.",
+        "Requirements:",
+        *[f"- {skill}" for skill in required],
+        f"Nice to have: {', '.join(preferred)}",
+    ])
+
+
+def pdf_corpus(count: int, pages: int, seed: int = 0) -> Dict[str, bytes]:
+    return {f"resume-{seed + index}.pdf": text_pdf(resume_text(seed + index), pages) for index in range(count)}
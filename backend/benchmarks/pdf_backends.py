@@ -0,0 +1,59 @@
+"""Throughput of the PDF text-extraction backends on generated documents.
+
+    python -m benchmarks.pdf_backends --docs 20 --pages 1,10,50
+
+Every backend reads every page (no character budget), so the numbers compare
+raw text-layer extraction speed.
+"""
+import sys
+import os
+import time
+import argparse
+import statistics
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import resume_text, text_pdf
+from services.pdf_parser import EXTRACTION_BACKENDS
+
+def run_backend(name: str, corpus: List[bytes]) -> Dict[str, float]:
+    backend = EXTRACTION_BACKENDS[name]()
+    timings = []
+    pages = 0
+    characters = 0
+    for data in corpus:
+        started = time.perf_counter()
+        for _, _, page_text, _ in backend.iter_pages(data):
+            pages += 1
+            characters += len(page_text)
+        timings.append(time.perf_counter() - started)
+    total = sum(timings)
+    return {
+        "docs_per_second": len(corpus) / total,
+        "pages_per_second": pages / total,
+        "mb_per_second": sum(len(data) for data in corpus) / total / (1024 * 1024),
+        "median_ms": statistics.median(timings) * 1000,
+        "characters": characters,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=20, help="documents per corpus")
+    parser.add_argument("--pages", default="1,10,50", help="comma-separated page counts, one corpus each")
+    parser.add_argument("--backends", default=",".join(EXTRACTION_BACKENDS), help="backends to compare")
+    args = parser.parse_args()
+
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    print(f"{'pages':>5}  {'backend':<8}  {'docs/s':>8}  {'pages/s':>9}  {'MB/s':>7}  {'median ms':>9}  {'chars':>9}")
+    for pages in (int(value) for value in args.pages.split(",")):
+        corpus = [text_pdf(resume_text(seed, "long"), pages) for seed in range(args.docs)]
+        for name in backends:
+            result = run_backend(name, corpus)
+            print(f"{pages:>5}  {name:<8}  {result['docs_per_second']:>8.1f}  {result['pages_per_second']:>9.1f}  "
+                  f"{result['mb_per_second']:>7.2f}  {result['median_ms']:>9.1f}  {result['characters']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Benchmark suite for the parser and analyzer hot paths.
+
+    python -m benchmarks.run                        # run and print
+    python -m benchmarks.run --save                 # also write benchmarks/baseline.json
+    python -m benchmarks.run --compare              # fail (exit 1) on regressions against it
+    python -m benchmarks.run --filter extraction    # only matching benchmarks
+
+Runs in mock mode on the synthetic corpus from benchmarks/corpus.py, with the
+result caches disabled so every iteration does the full work. Baselines are
+machine-specific: save one on the machine you compare on.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+import contextlib
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Must be set before the app is imported: mock mode and no caching between iterations
+os.environ["OPENAI_API_KEY"] = ""
+for _cache in ("ANALYSIS_CACHE", "EXTRACTION_CACHE", "PROFILE_CACHE"):
+    os.environ[f"{_cache}_SIZE"] = "0"
+    os.environ.pop(f"{_cache}_DB", None)
+
+from benchmarks.corpus import job_description, resume_corpus, scanned_pdf, text_pdf
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+class Benchmark(NamedTuple):
+    name: str
+    func: Callable[[], Any]
+    # Allowed slowdown of the median against the baseline before it counts as a regression
+    threshold: float = 1.3
+
+
+def measure(func: Callable[[], Any], min_time: float, max_iterations: int, warmup: int = 2) -> Dict[str, float]:
+    for _ in range(warmup):
+        func()
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_iterations and (len(timings) < 5 or time.perf_counter() - started < min_time):
+        iteration_start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - iteration_start)
+    timings.sort()
+    return {
+        "iterations": len(timings),
+        "median_ms": round(statistics.median(timings) * 1000, 4),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 4),
+        "ops_per_second": round(len(timings) / sum(timings), 2),
+    }
+
+
+def build_benchmarks() -> List[Benchmark]:
+    import httpx
+
+    import main as app_module
+    from services.ai_analyzer import AIAnalyzer
+    from services.document import TextDocument
+    from services.pdf_parser import EXTRACTION_BACKENDS, PDFParser
+    from services.taxonomy import load_taxonomy
+
+    analyzer = AIAnalyzer()
+    parser = PDFParser()
+    resumes = {length: resume_corpus(20, length) for length in ("short", "medium", "long")}
+    jd = job_description(0)
+    pdfs = {pages: [text_pdf(text, pages) for text in resumes["medium"][:5]] for pages in (1, 10, 50)}
+    scanned = [scanned_pdf(text, 3) for text in resumes["medium"][:3]]
+
+    def cycle(items: List[Any]) -> Callable[[], Any]:
+        """Round-robin over the corpus so one document's quirks do not dominate"""
+        state = {"index": 0}
+
+        def next_item():
+            state["index"] = (state["index"] + 1) % len(items)
+            return items[state["index"]]
+        return next_item
+
+    benchmarks = []
+
+    # Extraction: full PDFParser path and each text-layer backend on its own
+    for pages, corpus in pdfs.items():
+        next_pdf = cycle(corpus)
+        benchmarks.append(Benchmark(f"extraction.parser.{pages}p", lambda n=next_pdf: parser.extract_text_uncached(n())))
+        for name, backend_class in EXTRACTION_BACKENDS.items():
+            backend = backend_class()
+            benchmarks.append(Benchmark(
+                f"extraction.{name}.{pages}p",
+                lambda n=next_pdf, b=backend: sum(1 for _ in b.iter_pages(n()))
+            ))
+    next_scan = cycle(scanned)
+    benchmarks.append(Benchmark(
+        "extraction.scan_detection.3p",
+        lambda: [scanned for _, _, _, scanned in parser.backends[0].iter_pages(next_scan())]
+    ))
+
+    # Analyzer stages on a fresh TextDocument each time (its views are cached per instance)
+    for length, texts in resumes.items():
+        next_text = cycle(texts)
+        benchmarks.append(Benchmark(f"stage.skill_matching.{length}", lambda n=next_text: TextDocument(n(), analyzer.taxonomy).skills))
+        benchmarks.append(Benchmark(f"stage.field_detection.{length}", lambda n=next_text: (
+            lambda doc: analyzer._detect_field(doc, analyzer._extract_skills_universal(doc)))(analyzer.document(n()))))
+        benchmarks.append(Benchmark(f"stage.ats_feedback.{length}", lambda n=next_text: (
+            lambda doc: analyzer._generate_ats_feedback(analyzer._resume_ats_checks(doc), doc.skill_set, None))(analyzer.document(n()))))
+        benchmarks.append(Benchmark(f"analysis.heuristic.{length}", lambda n=next_text: analyzer._mock_analysis(n())))
+        benchmarks.append(Benchmark(f"analysis.heuristic_jd.{length}", lambda n=next_text: analyzer._mock_analysis(n(), job_description=jd)))
+
+    profiles = [analyzer.resume_profile(text) for text in resumes["medium"]]
+    next_profile = cycle(profiles)
+    benchmarks.append(Benchmark("analysis.match_profile", lambda: analyzer._match_profile(next_profile(), "Data Scientist")))
+
+    # Cold start: taxonomy from JSON vs. the prebuilt snapshot, and a fresh interpreter importing the app
+    benchmarks.append(Benchmark("startup.taxonomy_json", lambda: load_taxonomy(snapshot_path="")))
+    benchmarks.append(Benchmark("startup.taxonomy_snapshot", load_taxonomy))
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    benchmarks.append(Benchmark("startup.import_app", lambda: subprocess.run(
+        [sys.executable, "-c", "import main"], cwd=backend_dir, check=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    ), 1.5))
+
+    # End to end through the ASGI app in this process (no sockets)
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url="http://bench")
+
+    def request(method: str, url: str, **kwargs) -> Callable[[], Any]:
+        def call():
+            response = loop.run_until_complete(client.request(method, url, **kwargs))
+            response.raise_for_status()
+            return response
+        return call
+
+    benchmarks += [
+        Benchmark("endpoint.analyze_text", request("POST", "/api/analyze-text", json={"text_resume": resumes["medium"][0]}), 1.5),
+        Benchmark("endpoint.analyze_text_jd", request("POST", "/api/analyze-text", json={
+            "text_resume": resumes["medium"][1], "job_description": jd}), 1.5),
+        Benchmark("endpoint.analyze_resume_pdf", request("POST", "/api/analyze-resume", files={
+            "file": ("cv.pdf", pdfs[1][0], "application/pdf")}), 1.5),
+        Benchmark("endpoint.analyze_text_stream", request("POST", "/api/analyze-text/stream", json={
+            "text_resume": resumes["medium"][2]}), 1.5),
+    ]
+    return benchmarks
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], thresholds: Dict[str, float],
+            override: Optional[float]) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = result["median_ms"] / max(previous["median_ms"], 1e-6)
+        limit = override or thresholds[name]
+        result["vs_baseline"] = round(ratio, 3)
+        if ratio > limit:
+            regressions.append(f"{name}: {previous['median_ms']:.3f} ms -> {result['median_ms']:.3f} ms "
+                               f"({ratio:.2f}x, limit {limit:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser and analyzer benchmarks")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to spend per benchmark")
+    parser.add_argument("--max-iterations", type=int, default=1000)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="exit with status 1 on regressions")
+    parser.add_argument("--threshold", type=float, help="override every benchmark's regression threshold")
+    parser.add_argument("--verbose", action="store_true", help="show the app's log output while measuring")
+    args = parser.parse_args()
+
+    benchmarks = [benchmark for benchmark in build_benchmarks() if args.filter in benchmark.name]
+    results = {}
+    print(f"{'benchmark':<36} {'median ms':>10} {'p95 ms':>10} {'ops/s':>10} {'iters':>6}")
+    for benchmark in benchmarks:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+            result = measure(benchmark.func, args.min_time, args.max_iterations)
+        results[benchmark.name] = result
+        print(f"{benchmark.name:<36} {result['median_ms']:>10.3f} {result['p95_ms']:>10.3f} "
+              f"{result['ops_per_second']:>10.1f} {result['iterations']:>6}")
+
+    exit_code = 0
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"[BENCH] No baseline at {args.baseline}; run with --save first")
+            exit_code = 2
+        else:
+            with open(args.baseline) as f:
+                baseline = json.load(f)["results"]
+            thresholds = {benchmark.name: benchmark.threshold for benchmark in benchmarks}
+            regressions = compare(results, baseline, thresholds, args.threshold)
+            for line in regressions:
+                print(f"[BENCH] REGRESSION {line}")
+            print(f"[BENCH] {len(regressions)} regressions in {len(results)} benchmarks")
+            exit_code = 1 if regressions else 0
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.platform(),
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+        print(f"[BENCH] Baseline written to {args.baseline}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
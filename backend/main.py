@@ -2,19 +2,37 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# Started before the framework imports so /api/startup covers the whole cold start
+from services.startup import StartupTimer, is_serverless, preload_modules
+startup_timer = StartupTimer()
+
 from fastapi import FastAPI, File, UploadFile, HTTPException, Request, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Union
 import traceback
-from dotenv import load_dotenv
-import uvicorn
+import asyncio
+import json
+import time
+from functools import lru_cache
+
+startup_timer.mark("framework")
 
-from services.pdf_parser import PDFParser
+from services.pdf_parser import PDFParser, read_text_layer_in_worker, vision_breaker
 from services.ai_analyzer import AIAnalyzer
+from services.executor import WorkerPools, QueueFullError
+from services.openai_client import get_openai_clients
+from services.refinement_queue import RefinementQueue
+from services.uploads import SpooledUpload, UploadError, UploadSpooler, format_size
+from services.metrics import metrics, OCR_PAGE_SECONDS, PDF_EXTRACTIONS, PDF_TEXT_SECONDS, REQUEST_SECONDS, UPLOAD_BYTES
+
+startup_timer.mark("services")
 
-load_dotenv()
+# Serverless platforms inject the environment; a .env file is only read for local runs
+if not is_serverless():
+    from dotenv import load_dotenv
+    load_dotenv()
 
 if not os.getenv("OPENAI_API_KEY"):
     print("WARNING: OPENAI_API_KEY is missing! Running in mock mode.")
@@ -32,7 +50,190 @@ app.add_middleware(
 )
 
 pdf_parser = PDFParser()
+upload_spooler = UploadSpooler.from_env()
 ai_analyzer = AIAnalyzer()
+worker_pools = WorkerPools.from_env()
+
+
+# The job index and candidate store (and NumPy) are built on first use; analyses never need them
+@lru_cache(maxsize=1)
+def get_job_index():
+    from services.job_index import JobIndex
+    return JobIndex.from_env(normalize=ai_analyzer.skill_gap.normalize)
+
+
+@lru_cache(maxsize=1)
+def get_candidate_store():
+    from services.candidate_store import CandidateStore
+    return CandidateStore.from_env(normalize=ai_analyzer.skill_gap.normalize)
+
+
+async def refine_analysis(payload: Dict) -> Dict:
+    return await ai_analyzer.refine(payload["resume_text"], payload.get("target_role"), payload.get("job_description"))
+
+
+refinement_queue = RefinementQueue.from_env(refine_analysis)
+
+
+def preload():
+    """Load what is deferred for serverless cold starts, e.g. in serve.py before it forks workers"""
+    started = time.perf_counter()
+    modules = preload_modules()
+    ai_analyzer.preload()
+    # The job index and candidate store stay lazy: each worker maps the current files (shared via the page cache)
+    print(f"[STARTUP] Preloaded {', '.join(modules) or 'no modules'} and shared state in "
+          f"{(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+@app.on_event("startup")
+async def start_refinement_workers():
+    if not ai_analyzer.mock_mode:
+        refinement_queue.start()
+
+
+@app.on_event("startup")
+async def start_metrics_flush():
+    # Under serve.py the workers share /api/metrics through snapshots in METRICS_DIR
+    metrics.start_flushing()
+
+
+def cache_counters(field: str):
+    caches = {"analysis": ai_analyzer.cache, "extraction": pdf_parser.cache, "profiles": ai_analyzer.profiles}
+    return lambda: {(name,): cache.stats()[field] for name, cache in caches.items()}
+
+
+metrics.callback("cache_hits_total", "Result cache hits", ("cache",), cache_counters("hits"), kind="counter")
+metrics.callback("cache_misses_total", "Result cache misses", ("cache",), cache_counters("misses"), kind="counter")
+metrics.callback("cache_entries", "Entries in the in-memory result caches", ("cache",), cache_counters("entries"))
+metrics.callback("worker_pending", "Tasks queued or running per worker stage", ("stage",),
+                 lambda: {(name,): stage["pending"] for name, stage in worker_pools.stats().items()})
+metrics.callback("llm_coalesced_total", "LLM analyses that joined an identical call in flight", (),
+                 lambda: {(): ai_analyzer.llm_calls.coalesced}, kind="counter")
+
+circuit_breakers = {"llm": ai_analyzer.llm_breaker, "vision": vision_breaker}
+metrics.callback("circuit_open", "1 while the circuit is open or half-open, 0 when closed", ("circuit",),
+                 lambda: {(name,): int(breaker.state != "closed") for name, breaker in circuit_breakers.items()})
+metrics.callback("circuit_rejected_total", "Calls failed fast because the circuit was open", ("circuit",),
+                 lambda: {(name,): breaker.rejected for name, breaker in circuit_breakers.items()}, kind="counter")
+
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 500))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))
+BATCH_QUEUE_WAIT = float(os.getenv("BATCH_QUEUE_WAIT", 30))
+
+
+@app.on_event("shutdown")
+async def shutdown_worker_pools():
+    await refinement_queue.stop()
+    worker_pools.shutdown()
+    await get_openai_clients().aclose()
+    metrics.flush()
+
+
+# Whole request bodies, checked against Content-Length before the multipart body is parsed
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", 64 * 1024 * 1024))
+
+
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_REQUEST_BYTES:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Request body is too large (max {format_size(MAX_REQUEST_BYTES)})"},
+            headers={"Access-Control-Allow-Origin": "*"}
+        )
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    if not metrics.enabled:
+        return await call_next(request)
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Route templates (not raw paths) keep the label set small; streaming responses count until their headers
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method, route=route, status=str(response.status_code))
+    return response
+
+
+async def receive_pdf(file: UploadFile) -> SpooledUpload:
+    """Copy an uploaded PDF to a bounded temp file, rejecting oversized or non-PDF uploads"""
+    try:
+        upload = await upload_spooler.spool_pdf(file)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    UPLOAD_BYTES.observe(upload.size)
+    return upload
+
+
+async def extract_pdf_text(upload: SpooledUpload) -> str:
+    # Cache lookups stay in this process; only cache misses are shipped to the parser pool (as a file path)
+    cached = await pdf_parser.get_cached_async(upload.sha256)
+    if cached is not None:
+        PDF_EXTRACTIONS.inc(method="cache")
+        return cached["text"]
+    
+    # Workers may be separate processes, so they hand their stage timings back for the metrics here
+    pages, method, timings = await worker_pools.parser.run(read_text_layer_in_worker, upload.path)
+    if None in pages.values():
+        # Scanned pages are OCR'd from this process, over its one Tesseract pool and one Vision pool and breaker,
+        # rather than from inside a parser worker (which would start a page pool per parser worker)
+        text, method, complete = await worker_pools.analyzer.run(pdf_parser.complete_text, upload.path, pages, method, timings)
+    else:
+        text, method, complete = pdf_parser.complete_text(upload.path, pages, method, timings)
+    PDF_EXTRACTIONS.inc(method=method)
+    for backend, seconds in timings["text"]:
+        PDF_TEXT_SECONDS.observe(seconds, backend=backend)
+    for backend, seconds in timings["ocr"]:
+        OCR_PAGE_SECONDS.observe(seconds, backend=backend)
+    # Partial OCR results are served but not cached, so the next upload of the file tries again
+    if complete:
+        await pdf_parser.store_cached_async(upload.sha256, text, method)
+    return text
+
+
+async def extract_uploaded_pdf(file: UploadFile) -> str:
+    with await receive_pdf(file) as upload:
+        return await extract_pdf_text(upload)
+
+
+async def run_analysis(resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None,
+                       jd_doc=None, profile: Optional[Dict] = None) -> Dict:
+    # Heuristic analysis is CPU work for the analyzer pool; live LLM calls use the native async client
+    if ai_analyzer.mock_mode:
+        return await worker_pools.analyzer.run(ai_analyzer.analyze, resume_text, target_role=target_role,
+                                               job_description=job_description, jd_doc=jd_doc, profile=profile)
+    analysis = await ai_analyzer.analyze_async(resume_text, target_role=target_role, job_description=job_description,
+                                               jd_doc=jd_doc, profile=profile, offload=worker_pools.analyzer.run)
+    if profile is None:
+        # Store the resume profile so later role/job comparisons can reuse it by resume_id
+        profile = await worker_pools.analyzer.run(ai_analyzer.resume_profile, resume_text)
+    return dict(analysis, resume_id=profile["resume_id"])
+
+
+async def with_backpressure(call, *args, **kwargs):
+    """Retry a worker-pool call while its queue is full, for up to BATCH_QUEUE_WAIT seconds"""
+    deadline = time.monotonic() + BATCH_QUEUE_WAIT
+    delay = 0.05
+    while True:
+        try:
+            return await call(*args, **kwargs)
+        except QueueFullError:
+            if time.monotonic() + delay > deadline:
+                raise
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request: Request, exc: QueueFullError):
+    print(f"[WORKERS] Rejecting request, {exc.stage} queue is full ({exc.limit})")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "2", "Access-Control-Allow-Origin": "*"}
+    )
 
 
 @app.exception_handler(Exception)
@@ -64,6 +265,49 @@ class AnalysisRequest(BaseModel):
     job_description: Optional[str] = None
 
 
+class ReanalysisRequest(BaseModel):
+    resume_id: str
+    target_role: Optional[str] = None
+    job_description: Optional[str] = None
+
+
+class JobPosting(BaseModel):
+    description: str
+    id: Optional[str] = None
+    title: Optional[str] = None
+    company: Optional[str] = None
+    url: Optional[str] = None
+
+
+class JobIngestRequest(BaseModel):
+    jobs: List[JobPosting]
+
+
+class JobMatchRequest(BaseModel):
+    text_resume: Optional[str] = None
+    skills: Optional[List[str]] = None
+    top_k: int = 10
+
+
+class CandidateProfile(BaseModel):
+    id: Optional[str] = None
+    name: Optional[str] = None
+    text_resume: Optional[str] = None
+    skills: Optional[List[str]] = None
+    experience_years: Optional[float] = None
+    current_field: Optional[str] = None
+
+
+class CandidateIngestRequest(BaseModel):
+    candidates: List[CandidateProfile]
+
+
+class CandidateMatchRequest(BaseModel):
+    job_description: str
+    top_k: int = 10
+    field: Optional[str] = None
+
+
 class AnalysisResponse(BaseModel):
     skills: List[str]
     experience_years: float
@@ -75,6 +319,10 @@ class AnalysisResponse(BaseModel):
     trending_industries: List[str]
     summary: str
     ats_feedback: List[str]
+    usage: Optional[Dict] = None
+    resume_id: Optional[str] = None
+    # Set when the heuristic result stands in for the LLM: "circuit_open" (not called) or "llm_error"
+    fallback: Optional[str] = None
 
 
 @app.get("/api")
@@ -111,27 +359,21 @@ async def analyze_resume(
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
     
     try:
-        print(f"[DEBUG] Starting to process file: {file.filename}")
-        contents = await file.read()
-        print(f"[DEBUG] File read successfully, size: {len(contents)} bytes")
-        
-        extracted_text = pdf_parser.extract_text(contents)
-        print(f"[DEBUG] Text extracted, length: {len(extracted_text) if extracted_text else 0} characters")
+        with await receive_pdf(file) as upload:
+            extracted_text = await extract_pdf_text(upload)
         
         if not extracted_text or len(extracted_text.strip()) < 50:
             raise HTTPException(status_code=400, detail="Could not extract meaningful text from PDF")
         
-        print(f"[DEBUG] Calling AI analyzer with target_role: {target_role}, job_description: {'Yes' if job_description else 'No'}")
-        print(f"[DEBUG] API Key configured: {bool(os.getenv('OPENAI_API_KEY'))}")
-        
-        analysis = ai_analyzer.analyze(extracted_text, target_role=target_role, job_description=job_description)
-        print(f"[DEBUG] Analysis complete, returning results")
+        analysis = await run_analysis(extracted_text, target_role=target_role, job_description=job_description)
         
         return analysis
     
     except HTTPException as he:
         print(f"[ERROR] HTTP Exception: {he.detail}")
         raise he
+    except QueueFullError:
+        raise
     except Exception as e:
         error_msg = str(e)
         error_trace = traceback.format_exc()
@@ -154,15 +396,13 @@ async def analyze_text(request: AnalysisRequest):
         raise HTTPException(status_code=400, detail="Resume text is too short or empty")
     
     try:
-        print(f"[DEBUG] Analyzing text resume with target_role: {request.target_role}, job_description: {'Yes' if request.job_description else 'No'}")
-        print(f"[DEBUG] API Key configured: {bool(os.getenv('OPENAI_API_KEY'))}")
-        
-        analysis = ai_analyzer.analyze(request.text_resume, target_role=request.target_role, job_description=request.job_description)
-        print(f"[DEBUG] Analysis complete, returning results")
+        analysis = await run_analysis(request.text_resume, target_role=request.target_role, job_description=request.job_description)
         return analysis
     except HTTPException as he:
         print(f"[ERROR] HTTP Exception: {he.detail}")
         raise he
+    except QueueFullError:
+        raise
     except Exception as e:
         error_msg = str(e)
         error_trace = traceback.format_exc()
@@ -179,15 +419,363 @@ async def analyze_text(request: AnalysisRequest):
         )
 
 
+@app.post("/api/reanalyze", response_model=AnalysisResponse)
+async def reanalyze(request: ReanalysisRequest):
+    """Analyze an already uploaded resume against another target role or job description"""
+    profile = await ai_analyzer.get_profile_async(request.resume_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired resume_id - please upload the resume again")
+    
+    return await run_analysis(profile["resume_text"], target_role=request.target_role,
+                              job_description=request.job_description, profile=profile)
+
+
+async def tiered_analysis(resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None) -> Dict:
+    """Heuristic result now, LLM refinement queued for later"""
+    cached = await ai_analyzer.cached_analysis_async(resume_text, target_role, job_description)
+    if cached is not None:
+        return {"job_id": None, "status": "done", "refined": True, "analysis": cached}
+    
+    analysis = await worker_pools.analyzer.run(ai_analyzer.heuristic_analysis, resume_text, target_role, job_description)
+    if ai_analyzer.mock_mode:
+        return {"job_id": None, "status": "unavailable", "refined": False, "analysis": analysis}
+    
+    job_id = await refinement_queue.enqueue({
+        "resume_text": resume_text,
+        "target_role": target_role,
+        "job_description": job_description
+    })
+    # A full refinement queue still returns the heuristic result, just without a job to poll
+    return {"job_id": job_id, "status": "queued" if job_id else "rejected", "refined": False, "analysis": analysis}
+
+
+@app.post("/api/analyze-resume/tiered")
+async def analyze_resume_tiered(
+    file: UploadFile = File(...),
+    target_role: Optional[str] = Form(None),
+    job_description: Optional[str] = Form(None)
+):
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+    
+    extracted_text = await extract_uploaded_pdf(file)
+    if not extracted_text or len(extracted_text.strip()) < 50:
+        raise HTTPException(status_code=400, detail="Could not extract meaningful text from PDF")
+    
+    return await tiered_analysis(extracted_text, target_role=target_role, job_description=job_description)
+
+
+@app.post("/api/analyze-text/tiered")
+async def analyze_text_tiered(request: AnalysisRequest):
+    if not request.text_resume or len(request.text_resume.strip()) < 50:
+        raise HTTPException(status_code=400, detail="Resume text is too short or empty")
+    
+    return await tiered_analysis(request.text_resume, target_role=request.target_role, job_description=request.job_description)
+
+
+@app.get("/api/refinements/{job_id}")
+async def get_refinement(job_id: str):
+    job = await asyncio.to_thread(refinement_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Refinement job not found")
+    return job
+
+
+def stream_analysis(resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None) -> StreamingResponse:
+    """NDJSON response with one line per analysis stage as soon as it is ready"""
+    async def stream():
+        try:
+            async for event in ai_analyzer.analyze_stream(resume_text, target_role=target_role, job_description=job_description,
+                                                          offload=worker_pools.analyzer.run):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            print(f"[STREAM] Analysis failed: {type(e).__name__}: {str(e)}")
+            yield json.dumps({"stage": "error", "detail": str(e), "error_type": type(e).__name__}) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/api/analyze-resume/stream")
+async def analyze_resume_stream(
+    file: UploadFile = File(...),
+    target_role: Optional[str] = Form(None),
+    job_description: Optional[str] = Form(None)
+):
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+    
+    # Extraction errors still map to regular HTTP status codes; streaming starts with the text stats
+    extracted_text = await extract_uploaded_pdf(file)
+    if not extracted_text or len(extracted_text.strip()) < 50:
+        raise HTTPException(status_code=400, detail="Could not extract meaningful text from PDF")
+    
+    return stream_analysis(extracted_text, target_role=target_role, job_description=job_description)
+
+
+@app.post("/api/analyze-text/stream")
+async def analyze_text_stream(request: AnalysisRequest):
+    if not request.text_resume or len(request.text_resume.strip()) < 50:
+        raise HTTPException(status_code=400, detail="Resume text is too short or empty")
+    
+    return stream_analysis(request.text_resume, target_role=request.target_role, job_description=request.job_description)
+
+
+@app.post("/api/analyze-batch")
+async def analyze_batch(
+    files: Optional[List[UploadFile]] = File(None),
+    texts: Optional[List[str]] = Form(None),
+    target_role: Optional[str] = Form(None),
+    job_description: Optional[str] = Form(None)
+):
+    """Analyze many resumes against one job description, streaming NDJSON lines as items finish"""
+    files = files or []
+    texts = texts or []
+    total = len(files) + len(texts)
+    if total == 0:
+        raise HTTPException(status_code=400, detail="No resumes provided")
+    if total > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many resumes in one batch (max {BATCH_MAX_ITEMS})")
+    
+    # Batches share the worker pools with interactive requests: items wait for a free
+    # slot (with_backpressure) instead of failing when a queue is momentarily full
+    # Upload files are closed once this handler returns, so spool them to disk before streaming
+    items = []
+    for file in files:
+        item = {"filename": file.filename, "upload": None}
+        if not file.filename.endswith('.pdf'):
+            item["error"] = "Only PDF files are supported"
+        else:
+            try:
+                item["upload"] = await upload_spooler.spool_pdf(file)
+                UPLOAD_BYTES.observe(item["upload"].size)
+            except UploadError as e:
+                item["error"] = str(e)
+        items.append(item)
+    for text in texts:
+        items.append({"filename": None, "text": text})
+    
+    # The job description is scanned once and shared by every item
+    jd_doc = ai_analyzer.prepare_job_description(job_description) if job_description else None
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def process(index: int, item: Dict) -> Dict:
+        line = {"index": index, "filename": item["filename"]}
+        async with semaphore:
+            try:
+                if "text" in item:
+                    text = item["text"]
+                elif item["upload"] is None:
+                    raise HTTPException(status_code=400, detail=item["error"])
+                else:
+                    with item["upload"] as upload:
+                        text = await with_backpressure(extract_pdf_text, upload)
+                
+                if not text or len(text.strip()) < 50:
+                    raise HTTPException(status_code=400, detail="Could not extract meaningful text from resume")
+                
+                analysis = await with_backpressure(run_analysis, text, target_role=target_role,
+                                                   job_description=job_description, jd_doc=jd_doc)
+                line.update(status="ok", result=analysis)
+            except HTTPException as he:
+                line.update(status="error", detail=he.detail, error_type="HTTPException")
+            except Exception as e:
+                print(f"[BATCH] Item {index} failed: {type(e).__name__}: {str(e)}")
+                line.update(status="error", detail=str(e), error_type=type(e).__name__)
+        return line
+    
+    async def stream():
+        started = time.perf_counter()
+        succeeded = 0
+        tasks = [asyncio.ensure_future(process(index, item)) for index, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                line = await next_done
+                succeeded += line["status"] == "ok"
+                yield json.dumps(line) + "\n"
+            yield json.dumps({
+                "status": "done",
+                "total": total,
+                "succeeded": succeeded,
+                "failed": total - succeeded,
+                "elapsed_seconds": round(time.perf_counter() - started, 3)
+            }) + "\n"
+        finally:
+            # Client went away mid-stream: stop queued items from running
+            for task in tasks:
+                task.cancel()
+            for item in items:
+                if item.get("upload") is not None:
+                    item["upload"].close()
+    
+    print(f"[BATCH] Analyzing {total} resumes, job_description: {'Yes' if job_description else 'No'}")
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+def ingest_jobs(postings: List[JobPosting]) -> List[str]:
+    jobs = []
+    for posting in postings:
+        job = ai_analyzer.describe_job(posting.description)
+        job.update(
+            id=posting.id,
+            title=posting.title or job["role"],
+            company=posting.company,
+            url=posting.url,
+            description=posting.description
+        )
+        jobs.append(job)
+    return get_job_index().add_jobs(jobs)
+
+
+@app.post("/api/jobs")
+async def add_jobs(request: JobIngestRequest):
+    if not request.jobs:
+        raise HTTPException(status_code=400, detail="No job postings provided")
+    
+    # Skill extraction and the index rebuild are CPU work, keep them off the event loop
+    ids = await worker_pools.analyzer.run(ingest_jobs, request.jobs)
+    total = len(get_job_index())
+    print(f"[JOB INDEX] Ingested {len(ids)} postings, {total} total")
+    return {"ids": ids, "total": total}
+
+
+@app.get("/api/jobs")
+async def job_index_stats():
+    return get_job_index().stats()
+
+
+@app.post("/api/match-jobs")
+async def match_jobs(request: JobMatchRequest):
+    if request.skills:
+        skills = request.skills
+    elif request.text_resume and len(request.text_resume.strip()) >= 50:
+        skills = ai_analyzer.document(request.text_resume).skills
+    else:
+        raise HTTPException(status_code=400, detail="Provide resume text (50+ characters) or a skills list")
+    
+    job_index = get_job_index()
+    return {
+        "skills": skills,
+        "total_jobs": len(job_index),
+        "matches": job_index.search(skills, top_k=max(1, min(request.top_k, 100)))
+    }
+
+
+@app.post("/api/match-roles")
+async def match_roles(request: JobMatchRequest):
+    """Rank a resume against every role of the taxonomy"""
+    if request.skills:
+        skills = request.skills
+    elif request.text_resume and len(request.text_resume.strip()) >= 50:
+        skills = ai_analyzer.document(request.text_resume).skills
+    else:
+        raise HTTPException(status_code=400, detail="Provide resume text (50+ characters) or a skills list")
+    
+    matches = await worker_pools.analyzer.run(ai_analyzer.rank_roles, skills, top_k=max(1, min(request.top_k, 100)))
+    return {"skills": skills, "total_roles": len(ai_analyzer.role_catalog()), "matches": matches}
+
+
+@app.post("/api/candidates")
+async def add_candidates(request: CandidateIngestRequest):
+    """Store analyzed resumes; profiles with text_resume are analyzed first"""
+    if not request.candidates:
+        raise HTTPException(status_code=400, detail="No candidates provided")
+    
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def profile_for(candidate: CandidateProfile) -> Dict:
+        profile = candidate.model_dump(exclude={"text_resume"})
+        if candidate.skills is None:
+            if not candidate.text_resume or len(candidate.text_resume.strip()) < 50:
+                raise HTTPException(status_code=400, detail="Each candidate needs resume text (50+ characters) or a skills list")
+            async with semaphore:
+                analysis = await with_backpressure(run_analysis, candidate.text_resume)
+            profile.update(
+                skills=analysis["skills"],
+                experience_years=analysis["experience_years"],
+                current_field=analysis["current_field"]
+            )
+        return profile
+    
+    profiles = await asyncio.gather(*(profile_for(candidate) for candidate in request.candidates))
+    candidate_store = get_candidate_store()
+    ids = await worker_pools.analyzer.run(candidate_store.add, profiles)
+    print(f"[CANDIDATES] Stored {len(ids)} candidates, {len(candidate_store)} total")
+    return {"ids": ids, "total": len(candidate_store)}
+
+
+@app.get("/api/candidates")
+async def candidate_store_stats():
+    return get_candidate_store().stats()
+
+
+@app.post("/api/match-candidates")
+async def match_candidates(request: CandidateMatchRequest):
+    if len(request.job_description.strip()) < 20:
+        raise HTTPException(status_code=400, detail="Job description is too short or empty")
+    
+    job = ai_analyzer.describe_job(request.job_description)
+    candidate_store = get_candidate_store()
+    matches = await worker_pools.analyzer.run(
+        candidate_store.search,
+        job["skills"],
+        preferred_skills=job["preferred_skills"],
+        min_experience=job["experience_years"],
+        field=request.field,
+        top_k=max(1, min(request.top_k, 100))
+    )
+    return {
+        "role": job["role"],
+        "skills": job["skills"],
+        "experience_years": job["experience_years"],
+        "total_candidates": len(candidate_store),
+        "matches": matches
+    }
+
+
+@app.get("/api/cache-stats")
+async def cache_stats():
+    return {
+        "analysis": ai_analyzer.cache.stats(),
+        "extraction": pdf_parser.cache.stats(),
+        "profiles": ai_analyzer.profiles.stats(),
+        "llm_calls": ai_analyzer.llm_calls.stats()
+    }
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Prometheus text exposition of request, extraction, OCR, LLM and cache metrics"""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false)")
+    # With METRICS_DIR the other workers' snapshots are read from disk
+    return PlainTextResponse(await asyncio.to_thread(metrics.render), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/startup")
+async def startup_stats():
+    """Import/initialization timings of this process and which heavy modules are loaded so far"""
+    return startup_timer.stats()
+
+
 @app.get("/api/health")
 async def health_check():
     return {
         "status": "ok",
         "ai_mode": "mock" if not os.getenv("OPENAI_API_KEY") else "live",
-        "api_key_configured": bool(os.getenv("OPENAI_API_KEY"))
+        "api_key_configured": bool(os.getenv("OPENAI_API_KEY")),
+        "workers": worker_pools.stats(),
+        "uploads": upload_spooler.stats(),
+        "refinements": await asyncio.to_thread(refinement_queue.stats) if not ai_analyzer.mock_mode else None,
+        "circuits": {name: breaker.stats() for name, breaker in circuit_breakers.items()}
     }
 
 
+startup_timer.mark("init")
+startup_timer.ready()
+
+
 if __name__ == "__main__":
+    import uvicorn
+
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
@@ -0,0 +1,289 @@
+"""Production entrypoint: pre-forks uvicorn workers that share the app's read-only state.
+
+    python serve.py
+
+The parent imports the app and preloads what is otherwise loaded on first use
+(PDF/OCR libraries, the openai package, compiled skill matchers, the role
+catalog), then forks WEB_WORKERS workers
+that accept on one shared listening socket. The preloaded state is shared
+copy-on-write instead of being built once per worker. With several workers,
+resume profiles default to one SQLite file (PROFILE_CACHE_DB) so a resume_id
+returned by one worker resolves on the others. Workers write snapshots of
+their metrics to METRICS_DIR, so /api/metrics reports the whole server
+whichever worker answers it.
+
+Workers exit gracefully after WORKER_MAX_REQUESTS requests (plus up to
+WORKER_MAX_REQUESTS_JITTER, so they do not all restart at once) and are
+replaced, which bounds memory growth from PDF/OCR libraries. SIGTERM/SIGINT
+drain and stop all workers; SIGHUP replaces them one at a time. Without
+os.fork (Windows) it falls back to uvicorn's own multi-process mode without
+preloading.
+
+`python main.py` remains the single-process development server with reload.
+"""
+import os
+import sys
+import gc
+import time
+import random
+import signal
+import shutil
+import socket
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.state_dir import state_dir
+
+# Workers that exit this soon after starting are failing to boot; respawning them is throttled
+MIN_WORKER_LIFETIME = 1.0
+PROFILE_CACHE_FILE = "profiles.db"
+
+
+def share_cpu_pools(workers: int):
+    """Split the per-process CPU pools between the web workers unless they are configured explicitly"""
+    cpu_count = os.cpu_count() or 1
+    per_worker = max(1, cpu_count // workers)
+    os.environ.setdefault("PARSER_WORKERS", str(per_worker))
+    os.environ.setdefault("OCR_PAGE_WORKERS", str(min(4, per_worker)))
+
+
+def share_profile_cache(workers: int):
+    """Keep profiles in one SQLite file so a resume_id from one worker resolves on the others.
+
+    Profiles hold the resume text (/api/reanalyze sends it to the LLM again),
+    so the default file is in the private state directory, not at a
+    predictable path that other local users can read.
+    """
+    if workers > 1:
+        if "PROFILE_CACHE_DB" not in os.environ:
+            os.environ["PROFILE_CACHE_DB"] = os.path.join(state_dir(), PROFILE_CACHE_FILE)
+        if not os.environ["PROFILE_CACHE_DB"]:
+            print("[SERVER] PROFILE_CACHE_DB is empty: /api/reanalyze only finds resume_ids analyzed by the same worker")
+
+
+def share_metrics(workers: int) -> Optional[str]:
+    """Give the workers a snapshot directory for /api/metrics; returns it when it was created here"""
+    if workers > 1 and "METRICS_DIR" not in os.environ:
+        os.environ["METRICS_DIR"] = os.path.join(state_dir(), f"metrics-{os.getpid()}")
+        os.makedirs(os.environ["METRICS_DIR"], mode=0o700, exist_ok=True)
+        return os.environ["METRICS_DIR"]
+    return None
+
+
+class PreforkServer:
+    """Parent process: binds the socket, forks the workers and keeps their number constant"""
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 8000, workers: int = 1, max_requests: int = 0,
+                 max_requests_jitter: int = 0, graceful_timeout: float = 30, backlog: int = 2048):
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+
+        self._children: Dict[int, float] = {}  # pid -> start time
+        self._listener: Optional[socket.socket] = None
+        self._stopping = False
+        self._recycle = False
+        # Rolling restart after SIGHUP: old workers still to replace, and the one draining now
+        self._recycle_pending: List[int] = []
+        self._recycling: Optional[int] = None
+        self._metrics_dir: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "PreforkServer":
+        return cls(
+            host=os.getenv("HOST", "0.0.0.0"),
+            port=int(os.getenv("PORT", 8000)),
+            workers=int(os.getenv("WEB_WORKERS", os.cpu_count() or 1)),
+            max_requests=int(os.getenv("WORKER_MAX_REQUESTS", 1000)),
+            max_requests_jitter=int(os.getenv("WORKER_MAX_REQUESTS_JITTER", 100)),
+            graceful_timeout=float(os.getenv("WORKER_GRACEFUL_TIMEOUT", 30)),
+            backlog=int(os.getenv("WEB_BACKLOG", 2048)),
+        )
+
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        listener = socket.socket(family, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((self.host, self.port))
+        listener.listen(self.backlog)
+        listener.set_inheritable(True)
+        return listener
+
+    def _worker_max_requests(self) -> Optional[int]:
+        if self.max_requests <= 0:
+            return None
+        return self.max_requests + random.randint(0, max(0, self.max_requests_jitter))
+
+    def _spawn(self):
+        max_requests = self._worker_max_requests()
+        # Buffered output would otherwise be written again by the child
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                self._serve(max_requests)
+                exit_code = 0
+            except BaseException as e:
+                print(f"[SERVER] Worker {os.getpid()} crashed: {type(e).__name__}: {str(e)}")
+            finally:
+                # Never fall back into the parent's supervision loop
+                os._exit(exit_code)
+        self._children[pid] = time.monotonic()
+        print(f"[SERVER] Started worker {pid}" + (f" (recycled after {max_requests} requests)" if max_requests else ""))
+
+    def _serve(self, max_requests: Optional[int]):
+        """Worker process: run uvicorn on the inherited socket"""
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)
+        gc.enable()
+        random.seed()
+
+        import uvicorn
+        from main import app
+
+        config = uvicorn.Config(
+            app,
+            limit_max_requests=max_requests,
+            timeout_graceful_shutdown=self.graceful_timeout,
+        )
+        # uvicorn handles SIGTERM/SIGINT itself: stop accepting, finish in-flight requests, run shutdown hooks
+        uvicorn.Server(config).run(sockets=[self._listener])
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_recycle(self, signum, frame):
+        self._recycle = True
+
+    def _signal_children(self, sig: int):
+        for pid in list(self._children):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                self._children.pop(pid, None)
+
+    def _reap(self):
+        """Collect exited workers and start replacements"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self._children.pop(pid, None)
+            if started is None:
+                continue
+            from services.metrics import metrics
+            try:
+                metrics.retire_worker(pid)
+            except Exception as e:
+                print(f"[SERVER] Could not keep the metrics of worker {pid}: {str(e)}")
+            code = os.waitstatus_to_exitcode(status)
+            if self._stopping:
+                continue
+            lifetime = time.monotonic() - started
+            print(f"[SERVER] Worker {pid} exited with status {code} after {lifetime:.0f}s, replacing it")
+            if lifetime < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self._spawn()
+
+    def _recycle_next(self):
+        """Rolling restart: stop the next old worker once the previous one has been replaced and is up"""
+        if self._recycling in self._children:
+            return  # still draining its requests
+        now = time.monotonic()
+        if len(self._children) < self.workers or any(now - started < MIN_WORKER_LIFETIME for started in self._children.values()):
+            return  # the replacement is not up yet
+        self._recycling = None
+        while self._recycle_pending:
+            pid = self._recycle_pending.pop(0)
+            if pid in self._children:
+                print(f"[SERVER] Replacing worker {pid} ({len(self._recycle_pending)} more to go)")
+                self._recycling = pid
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass  # already gone; _reap replaces it
+                return
+
+    def _shutdown(self):
+        print(f"[SERVER] Stopping {len(self._children)} workers")
+        self._signal_children(signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        if self._children:
+            print(f"[SERVER] Killing {len(self._children)} workers that did not stop in time")
+            self._signal_children(signal.SIGKILL)
+            while self._children:
+                pid, _ = os.waitpid(-1, 0)
+                self._children.pop(pid, None)
+        self._listener.close()
+        if self._metrics_dir:
+            shutil.rmtree(self._metrics_dir, ignore_errors=True)
+        print("[SERVER] Stopped")
+
+    def run(self):
+        share_cpu_pools(self.workers)
+        share_profile_cache(self.workers)
+        self._metrics_dir = share_metrics(self.workers)
+        # Objects allocated before the fork stay out of the workers' garbage collections (no copy-on-write)
+        gc.disable()
+        started = time.perf_counter()
+        import main
+        main.preload()
+        main.metrics.clear_snapshots()
+        gc.freeze()
+        print(f"[SERVER] App loaded in {time.perf_counter() - started:.1f}s")
+
+        self._listener = self._bind()
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_recycle)
+        print(f"[SERVER] Listening on http://{self.host}:{self.port} with {self.workers} workers")
+        for _ in range(self.workers):
+            self._spawn()
+
+        while not self._stopping:
+            if self._recycle:
+                self._recycle = False
+                print("[SERVER] Replacing all workers, one at a time")
+                self._recycle_pending = list(self._children)
+            self._reap()
+            self._recycle_next()
+            time.sleep(0.2)
+        self._shutdown()
+
+
+def run_without_fork(server: PreforkServer):
+    import uvicorn
+
+    print("[SERVER] os.fork is unavailable; starting uvicorn workers without preloaded state")
+    share_cpu_pools(server.workers)
+    share_profile_cache(server.workers)
+    uvicorn.run(
+        "main:app",
+        host=server.host,
+        port=server.port,
+        workers=server.workers,
+        limit_max_requests=server._worker_max_requests(),
+        timeout_graceful_shutdown=server.graceful_timeout,
+        backlog=server.backlog,
+    )
+
+
+if __name__ == "__main__":
+    server = PreforkServer.from_env()
+    if hasattr(os, "fork"):
+        server.run()
+    else:
+        run_without_fork(server)
@@ -1,9 +1,69 @@
 import os
-import re
 import json
-from typing import Dict, List, Optional
+import time
+import asyncio
+import hashlib
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 from pydantic import BaseModel, Field
 
+from services.cache import TieredCache
+from services.openai_client import get_openai_clients
+from services.document import TextDocument
+from services.taxonomy import get_taxonomy
+from services.streaming import JSONFieldStream
+from services.prompt_builder import PromptBuilder
+from services.single_flight import SingleFlight
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.metrics import LLM_FALLBACKS, LLM_SECONDS, LLM_TOKENS, PROMPT_TOKENS, PROMPT_TRUNCATIONS
+from services.skill_gap import RoleCatalog, RoleRequirements, SkillGapEngine
+
+# Bump whenever the prompt or post-processing changes so cached results are not reused
+PROMPT_VERSION = "3"
+# Bump whenever the resume-only heuristics change so cached profiles are rebuilt
+PROFILE_VERSION = "1"
+
+ANALYSIS_INSTRUCTIONS = """You are a career analysis expert. Always respond with valid JSON only.
+
+You are a Universal Career Consultant with expertise across ALL industries (Technology, Healthcare, Finance, Marketing, Sales, Operations, Education, Green Energy, Manufacturing, etc.).
+
+Analyze the resume in the user message and extract:
+1. List of key competencies and skills (technical, soft skills, domain knowledge, certifications, tools, languages)
+2. Years of professional experience (estimate if not explicit)
+3. The candidate's current professional field/industry (e.g., "Software Development", "Healthcare Administration", "Digital Marketing", "Financial Services")
+4. 3 suggested roles, following the role targeting given in the user message
+5. For each of the 3 suggested roles, calculate a match percentage (0-100) based on the candidate's skills and experience
+6. For each role, identify 3-5 key skill gaps that would help the candidate transition or advance
+7. Top 3 learning recommendations with priority (High/Medium/Low), resource name, timeframe, and a one-sentence learning tip
+8. List 3-5 trending industries that currently match the candidate's skill set (e.g., "Healthcare Tech", "Renewable Energy", "FinTech", "E-commerce")
+9. A 2-sentence professional summary/verdict of the candidate's profile
+10. ATS Optimization Feedback: List 3-5 specific tips to improve ATS compatibility (check for: complex formatting, missing contact info, lack of standard section headings like "Experience" or "Skills", missing keywords, tables/graphics, unusual fonts, lack of quantifiable achievements)
+
+IMPORTANT: 
+- Suggest roles across ANY industry, not just tech (e.g., Marketing Manager, Sales Director, Operations Lead, Healthcare Administrator, Financial Analyst)
+- Be creative and consider lateral moves, promotions, and industry transitions
+- Ensure the 3 roles are diverse and represent realistic career paths
+- Match percentages should reflect genuine fit based on transferable skills
+
+Return ONLY a valid JSON object with this exact structure:
+{
+  "skills": ["skill1", "skill2", ...],
+  "experience_years": 5.0,
+  "current_field": "Field Name",
+  "role_matches": {"Role 1": 85.0, "Role 2": 75.0, "Role 3": 65.0},
+  "skill_gaps": {"Role 1": ["skill1", "skill2"], "Role 2": [...], "Role 3": [...]},
+  "recommendations": [
+    {"skill": "Skill Name", "priority": "High", "resource": "Resource Name", "timeframe": "1-2 months", "learning_tip": "Tip here"}
+  ],
+  "trending_industries": ["Industry 1", "Industry 2", ...],
+  "summary": "Two sentence summary here.",
+  "ats_feedback": ["Tip 1", "Tip 2", ...]
+}"""
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Whitespace- and case-insensitive form of an input, for content addressing"""
+    return " ".join((value or "").split()).casefold()
+
 
 class Recommendation(BaseModel):
     skill: str = Field(description="The skill to learn")
@@ -28,63 +88,300 @@ class ResumeAnalysis(BaseModel):
 class AIAnalyzer:
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
-        
+        self.model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+        self.clients = get_openai_clients()
+        self.cache = TieredCache.from_env("analysis", "ANALYSIS_CACHE")
+        self.profiles = TieredCache.from_env("profiles", "PROFILE_CACHE", default_entries=256, default_mb=32)
+        self.taxonomy = get_taxonomy()
+        self.skill_gap = SkillGapEngine(self.taxonomy)
+        self.prompt_builder = PromptBuilder.from_env(self.taxonomy, self.model)
+        self.llm_calls = SingleFlight("llm")
+        # Bounded by LLM_TIMEOUT per call; while open, analyses go straight to the heuristic result
+        self.llm_breaker = CircuitBreaker.from_env("llm", "LLM_BREAKER")
+        self._role_catalog: Optional[RoleCatalog] = None
+        
+        # The OpenAI client (and the openai package) is created on the first LLM call, not at startup
         if not self.api_key:
             print("WARNING: OPENAI_API_KEY environment variable is not set. Running in mock mode.")
             self.mock_mode = True
         else:
             self.mock_mode = False
-            try:
-                from openai import OpenAI
-                self.client = OpenAI(api_key=self.api_key)
-            except Exception as e:
-                print(f"ERROR: Failed to initialize OpenAI client: {str(e)}")
-                self.mock_mode = True
         
         # No fixed roles - AI will dynamically determine roles based on CV
     
-    def analyze(self, resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None) -> Dict:
+    def analyze(self, resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None,
+                jd_doc: Optional[TextDocument] = None, profile: Optional[Dict] = None) -> Dict:
         if self.mock_mode:
             print("[INFO] Running in MOCK MODE - no API key configured")
-            return self._mock_analysis(resume_text, target_role, job_description)
-        else:
-            print("[INFO] Running in LIVE AI MODE - API key found")
-            return self._ai_analysis(resume_text, target_role, job_description)
+            return self._mock_analysis(resume_text, target_role, job_description, jd_doc, profile=profile)
+        
+        print("[INFO] Running in LIVE AI MODE - API key found")
+        cache_key = self._cache_key(resume_text, target_role, job_description)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            return self.llm_calls.run_sync(cache_key, self._live_analysis, cache_key, resume_text, target_role, job_description)
+        except Exception as e:
+            self._log_ai_failure(e)
+            return self._fallback_analysis(e, resume_text, target_role, job_description, jd_doc, profile=profile)
     
-    def _mock_analysis(self, resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None) -> Dict:
-        detected_skills = self._extract_skills_universal(resume_text)
-        experience_years = self._extract_experience_simple(resume_text)
-        current_field = self._detect_field(resume_text, detected_skills)
+    async def analyze_async(self, resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None,
+                            jd_doc: Optional[TextDocument] = None, profile: Optional[Dict] = None,
+                            offload: Callable[..., Awaitable[Any]] = asyncio.to_thread) -> Dict:
+        """Non-blocking variant of analyze() using the shared async OpenAI client.
+
+        Prompt building and the heuristic fallback are CPU work and run through
+        `offload` (the analyzer pool in the API), so an LLM outage does not put
+        the heuristics on the event loop.
+        """
+        if self.mock_mode:
+            return await offload(self._mock_analysis, resume_text, target_role, job_description, jd_doc, profile=profile)
+        
+        cache_key = self._cache_key(resume_text, target_role, job_description)
+        cached = await self.cache.get_async(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            return await self.llm_calls.run(cache_key, self._live_analysis_async, cache_key, resume_text, target_role, job_description, offload)
+        except Exception as e:
+            self._log_ai_failure(e)
+            return await offload(self._fallback_analysis, e, resume_text, target_role, job_description, jd_doc, profile=profile)
+    
+    def _fallback_analysis(self, error: Exception, resume_text: str, target_role: Optional[str], job_description: Optional[str],
+                           jd_doc: Optional[TextDocument] = None, profile: Optional[Dict] = None) -> Dict:
+        """Heuristic result in place of a failed or skipped LLM call, flagged so clients can tell"""
+        analysis = self._mock_analysis(resume_text, target_role, job_description, jd_doc, profile=profile)
+        analysis["fallback"] = "circuit_open" if isinstance(error, CircuitOpenError) else "llm_error"
+        return analysis
+    
+    def heuristic_analysis(self, resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None) -> Dict:
+        """Fast local analysis without the LLM (the mock-mode result)"""
+        return self._mock_analysis(resume_text, target_role, job_description)
+    
+    def cached_analysis(self, resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None) -> Optional[Dict]:
+        if self.mock_mode:
+            return None
+        return self.cache.get(self._cache_key(resume_text, target_role, job_description))
+    
+    async def cached_analysis_async(self, resume_text: str, target_role: Optional[str] = None,
+                                    job_description: Optional[str] = None) -> Optional[Dict]:
+        if self.mock_mode:
+            return None
+        return await self.cache.get_async(self._cache_key(resume_text, target_role, job_description))
+    
+    async def refine(self, resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None,
+                     offload: Callable[..., Awaitable[Any]] = asyncio.to_thread) -> Dict:
+        """Live LLM analysis for background refinement; raises instead of falling back so the job can be retried"""
+        cache_key = self._cache_key(resume_text, target_role, job_description)
+        cached = await self.cache.get_async(cache_key)
+        if cached is not None:
+            return cached
+        
+        return await self.llm_calls.run(cache_key, self._live_analysis_async, cache_key, resume_text, target_role, job_description, offload)
+    
+    def _live_analysis(self, cache_key: str, resume_text: str, target_role: Optional[str], job_description: Optional[str]) -> Dict:
+        analysis = self._ai_analysis(resume_text, target_role, job_description)
+        self.cache.set(cache_key, analysis)
+        return analysis
+    
+    async def _live_analysis_async(self, cache_key: str, resume_text: str, target_role: Optional[str], job_description: Optional[str],
+                                   offload: Callable[..., Awaitable[Any]]) -> Dict:
+        # Runs once per in-flight key (see llm_calls), so identical concurrent requests make one API call
+        analysis = await self._ai_analysis_async(resume_text, target_role, job_description, offload=offload)
+        await self.cache.set_async(cache_key, analysis)
+        return analysis
+    
+    async def analyze_stream(self, resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None,
+                             offload: Callable[..., Awaitable[Any]] = asyncio.to_thread) -> AsyncIterator[Dict]:
+        """Analysis as stage events: text stats, heuristic skills and radar, then LLM fields as the model streams them.
+
+        The heuristic stages are CPU work and run through `offload` (the
+        analyzer pool in the API). The LLM call shares the single-flight key of
+        analyze_async(): a stream that joins a call already in flight gets only
+        its final result, without field events.
+        """
+        doc = await offload(self.document, resume_text)
+        yield {"stage": "text", **doc.stats()}
+        
+        profile = await offload(self.resume_profile, resume_text, doc)
+        yield {
+            "stage": "skills",
+            "skills": profile["skills"],
+            "experience_years": profile["experience_years"],
+            "current_field": profile["current_field"],
+            "resume_id": profile["resume_id"]
+        }
+        
+        yield {"stage": "radar", "radar_data": profile["radar_data"]}
+        
+        if self.mock_mode:
+            yield {"stage": "result", "result": await offload(self._mock_analysis, resume_text, target_role, job_description, profile=profile)}
+            return
+        
+        cache_key = self._cache_key(resume_text, target_role, job_description)
+        cached = await self.cache.get_async(cache_key)
+        if cached is not None:
+            yield {"stage": "result", "result": cached}
+            return
+        
+        # Field events arrive here while the call runs; None marks its end (also for a joined call, which sends none)
+        fields: asyncio.Queue = asyncio.Queue()
+        call = asyncio.ensure_future(self.llm_calls.run(
+            cache_key, self._live_stream, cache_key, resume_text, target_role, job_description, fields, offload
+        ))
+        call.add_done_callback(lambda _: fields.put_nowait(None))
+        try:
+            while True:
+                event = await fields.get()
+                if event is None:
+                    break
+                yield {"stage": "field", "field": event[0], "value": event[1]}
+            analysis = await call
+        except Exception as e:
+            self._log_ai_failure(e)
+            fallback = await offload(self._fallback_analysis, e, resume_text, target_role, job_description, profile=profile)
+            yield {"stage": "result", "result": fallback, "fallback": True}
+            return
+        finally:
+            # A client that disconnects stops waiting; the shared call itself keeps running for the others
+            if not call.done():
+                call.cancel()
+        
+        yield {"stage": "result", "result": analysis}
+    
+    async def _live_stream(self, cache_key: str, resume_text: str, target_role: Optional[str], job_description: Optional[str],
+                           fields: asyncio.Queue, offload: Callable[..., Awaitable[Any]]) -> Dict:
+        """Streaming LLM call; each top-level JSON field is put on `fields` once complete"""
+        self.llm_breaker.before_call()
+        parser = JSONFieldStream()
+        messages, usage = await offload(self._build_prompt, resume_text, target_role, job_description)
+        started = time.perf_counter()
+        try:
+            async for delta in self.clients.stream_chat_completion(
+                model=self.model,
+                messages=messages,
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            ):
+                for field, value in parser.feed(delta):
+                    fields.put_nowait((field, value))
+        except Exception:
+            LLM_SECONDS.observe(time.perf_counter() - started, call="stream", outcome="error")
+            self.llm_breaker.record(time.perf_counter() - started, ok=False)
+            raise
+        # Only provider errors count against the circuit, not an unparsable reply
+        self.llm_breaker.record(time.perf_counter() - started, ok=True)
+        try:
+            analysis = self._finalize_ai_analysis(parser.buffer, usage)
+        except Exception:
+            LLM_SECONDS.observe(time.perf_counter() - started, call="stream", outcome="error")
+            raise
+        LLM_SECONDS.observe(time.perf_counter() - started, call="stream", outcome="ok")
+        await self.cache.set_async(cache_key, analysis)
+        return analysis
+    
+    def _cache_key(self, resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None) -> str:
+        """Content address of an analysis: normalized inputs plus model and prompt version"""
+        parts = [PROMPT_VERSION, self.model, normalize_text(resume_text), normalize_text(target_role), normalize_text(job_description)]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+    
+    def resume_id(self, resume_text: str) -> str:
+        """Content address of a resume, independent of the target role and job description"""
+        parts = [PROFILE_VERSION, normalize_text(resume_text)]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+    
+    def resume_profile(self, resume_text: str, doc: Optional[TextDocument] = None) -> Dict:
+        """Resume-only stage of the analysis (skills, experience, field, radar, ATS checks), cached per resume"""
+        resume_id = self.resume_id(resume_text)
+        profile = self.profiles.get(resume_id)
+        if profile is not None:
+            return profile
+        
+        doc = doc or self.document(resume_text)
+        skills = self._extract_skills_universal(doc)
+        current_field = self._detect_field(doc, skills)
+        categories = self._get_field_categories(current_field)
+        profile = {
+            "resume_id": resume_id,
+            # Kept so a live re-analysis can call the LLM without the resume being uploaded again
+            "resume_text": resume_text,
+            "skills": skills,
+            "skill_set": sorted(doc.skill_set),
+            "experience_years": self._extract_experience_simple(doc),
+            "current_field": current_field,
+            "radar_data": self._radar_data(categories, self._calculate_universal_scores(skills, categories)),
+            "trending_industries": self._identify_trending_industries(skills, current_field),
+            "ats_checks": self._resume_ats_checks(doc),
+        }
+        self.profiles.set(resume_id, profile)
+        return profile
+    
+    def get_profile(self, resume_id: str) -> Optional[Dict]:
+        return self.profiles.get(resume_id)
+    
+    async def get_profile_async(self, resume_id: str) -> Optional[Dict]:
+        return await self.profiles.get_async(resume_id)
+    
+    def document(self, text: str) -> TextDocument:
+        """Tokenize/scan a resume or job description once for all heuristic stages"""
+        return TextDocument(text, self.taxonomy)
+    
+    def prepare_job_description(self, job_description: str) -> TextDocument:
+        """Analyze a job description once so a batch of resumes can share it across threads"""
+        jd_doc = self.document(job_description)
+        # Compute the views the heuristic stages read up front instead of racing on first access
+        for view in ("skills", "preferred_skill_set", "lines"):
+            getattr(jd_doc, view)
+        return jd_doc
+    
+    def describe_job(self, job_description: str) -> Dict:
+        """Role title, required/preferred skills and required experience of a job posting"""
+        jd_doc = self.document(job_description)
+        skills = self._extract_skills_from_job_description(jd_doc)
+        return {
+            "role": self._extract_role_from_job_description(jd_doc),
+            "skills": skills,
+            "preferred_skills": [s for s in skills if s in jd_doc.preferred_skill_set],
+            "experience_years": jd_doc.experience_years,
+        }
+    
+    def _mock_analysis(self, resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None,
+                       jd_doc: Optional[TextDocument] = None, doc: Optional[TextDocument] = None,
+                       profile: Optional[Dict] = None) -> Dict:
+        profile = profile or self.resume_profile(resume_text, doc)
+        if jd_doc is None and job_description:
+            jd_doc = self.document(job_description)
+        return self._match_profile(profile, target_role, jd_doc)
+    
+    def _match_profile(self, profile: Dict, target_role: Optional[str] = None, jd_doc: Optional[TextDocument] = None) -> Dict:
+        """Role/job-description stage of the heuristic analysis on top of a resume profile"""
+        detected_skills = profile["skills"]
+        experience_years = profile["experience_years"]
+        current_field = profile["current_field"]
         
         # Handle job description matching
-        if job_description:
+        if jd_doc:
             # Extract requirements from job description
-            jd_skills = self._extract_skills_from_job_description(job_description)
-            jd_role = self._extract_role_from_job_description(job_description)
+            jd_skills = self._extract_skills_from_job_description(jd_doc)
+            jd_role = self._extract_role_from_job_description(jd_doc)
             
             # Primary role is from job description
             suggested_roles = [jd_role] + self._suggest_roles(current_field, jd_role)[:2]
             
-            role_matches = {}
-            skill_gaps = {}
-            
-            # Calculate match for the target job
-            matched_skills = [s for s in detected_skills if s.lower() in [r.lower() for r in jd_skills]]
-            match_percentage = (len(matched_skills) / max(len(jd_skills), 1)) * 100
-            role_matches[jd_role] = round(min(match_percentage, 95), 1)
-            
-            missing_skills = [s for s in jd_skills if s.lower() not in [d.lower() for d in detected_skills]]
-            skill_gaps[jd_role] = missing_skills[:5]
-            
-            # Calculate matches for other suggested roles
-            for role in suggested_roles[1:]:
-                required_skills = self._get_role_requirements(role, current_field)
-                matched_skills = [s for s in detected_skills if s.lower() in [r.lower() for r in required_skills]]
-                match_percentage = (len(matched_skills) / max(len(required_skills), 1)) * 100
-                role_matches[role] = round(min(match_percentage, 95), 1)
-                
-                missing_skills = [s for s in required_skills if s.lower() not in [d.lower() for d in detected_skills]]
-                skill_gaps[role] = missing_skills[:5]
+            # The target job weighs its nice-to-have skills lower; other roles are all must-have
+            preferred = jd_doc.preferred_skill_set
+            target = RoleRequirements(
+                jd_role,
+                must_have=tuple(s for s in jd_skills if s not in preferred),
+                nice_to_have=tuple(s for s in jd_skills if s in preferred),
+            )
+            requirements = [self.skill_gap.compile(target)] + [
+                self.skill_gap.compile(RoleRequirements(role, tuple(self._get_role_requirements(role, current_field))))
+                for role in suggested_roles[1:]
+            ]
         else:
             # Original logic for no job description
             if target_role:
@@ -92,38 +389,16 @@ class AIAnalyzer:
             else:
                 suggested_roles = self._suggest_roles(current_field)
             
-            role_matches = {}
-            skill_gaps = {}
-            
-            for role in suggested_roles:
-                required_skills = self._get_role_requirements(role, current_field)
-                matched_skills = [s for s in detected_skills if s.lower() in [r.lower() for r in required_skills]]
-                match_percentage = (len(matched_skills) / max(len(required_skills), 1)) * 100
-                role_matches[role] = round(min(match_percentage, 95), 1)
-                
-                missing_skills = [s for s in required_skills if s.lower() not in [d.lower() for d in detected_skills]]
-                skill_gaps[role] = missing_skills[:5]
-        
-        # Dynamic categories based on field
-        categories = self._get_field_categories(current_field)
-        user_scores = self._calculate_universal_scores(detected_skills, categories)
-        
-        radar_data = {
-            "labels": categories,
-            "datasets": [
-                {
-                    "label": "Your Competencies",
-                    "data": user_scores
-                },
-                {
-                    "label": "Industry Standard",
-                    "data": [80, 75, 70, 75, 65]
-                }
+            requirements = [
+                self.skill_gap.compile(RoleRequirements(role, tuple(self._get_role_requirements(role, current_field))))
+                for role in suggested_roles
             ]
-        }
         
-        # Trending industries
-        trending_industries = self._identify_trending_industries(detected_skills, current_field)
+        role_matches = {}
+        skill_gaps = {}
+        for score in self.skill_gap.score_many(detected_skills, requirements):
+            role_matches[score.role] = score.match_percentage
+            skill_gaps[score.role] = score.missing[:5]
         
         top_role = max(role_matches.items(), key=lambda x: x[1])[0]
         target_for_recs = target_role if target_role else top_role
@@ -158,7 +433,7 @@ class AIAnalyzer:
         summary = self._generate_summary(detected_skills, experience_years, top_role, role_matches[top_role])
         
         # Generate ATS feedback
-        ats_feedback = self._generate_ats_feedback(resume_text, detected_skills, job_description)
+        ats_feedback = self._generate_ats_feedback(profile["ats_checks"], set(profile["skill_set"]), jd_doc)
         
         return {
             "skills": detected_skills,
@@ -166,285 +441,248 @@ class AIAnalyzer:
             "current_field": current_field,
             "role_matches": role_matches,
             "skill_gaps": skill_gaps,
-            "radar_data": radar_data,
+            "radar_data": profile["radar_data"],
             "recommendations": recommendations,
-            "trending_industries": trending_industries,
+            "trending_industries": profile["trending_industries"],
             "summary": summary,
-            "ats_feedback": ats_feedback
+            "ats_feedback": ats_feedback,
+            "resume_id": profile["resume_id"]
         }
     
-    def _ai_analysis(self, resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None) -> Dict:
-        try:
-            # Check API key first
-            if not self.api_key:
-                print("[AI ANALYSIS ERROR] No API key available")
-                raise ValueError("OpenAI API key is not configured. Please set OPENAI_API_KEY environment variable.")
-            
-            # Handle job description vs target role
-            if job_description:
-                target_instruction = f"The user is applying for a SPECIFIC JOB. Act as a Technical Recruiter for this role. Job Description: {job_description[:1000]}. Calculate match score based ONLY on requirements in this job description. Extract the role title and required skills from the job description."
-            elif target_role:
-                target_instruction = f"The user wants to target the role: {target_role}. Include this as one of the 3 suggested roles."
-            else:
-                target_instruction = "Suggest the 3 most logical career next steps for this candidate."
-            
-            prompt = f"""
-You are a Universal Career Consultant with expertise across ALL industries (Technology, Healthcare, Finance, Marketing, Sales, Operations, Education, Green Energy, Manufacturing, etc.).
-
-Analyze the following resume and extract:
-1. List of key competencies and skills (technical, soft skills, domain knowledge, certifications, tools, languages)
-2. Years of professional experience (estimate if not explicit)
-3. The candidate's current professional field/industry (e.g., "Software Development", "Healthcare Administration", "Digital Marketing", "Financial Services")
-4. {target_instruction}
-5. For each of the 3 suggested roles, calculate a match percentage (0-100) based on the candidate's skills and experience
-6. For each role, identify 3-5 key skill gaps that would help the candidate transition or advance
-7. Top 3 learning recommendations with priority (High/Medium/Low), resource name, timeframe, and a one-sentence learning tip
-8. List 3-5 trending industries that currently match the candidate's skill set (e.g., "Healthcare Tech", "Renewable Energy", "FinTech", "E-commerce")
-9. A 2-sentence professional summary/verdict of the candidate's profile
-10. ATS Optimization Feedback: List 3-5 specific tips to improve ATS compatibility (check for: complex formatting, missing contact info, lack of standard section headings like "Experience" or "Skills", missing keywords, tables/graphics, unusual fonts, lack of quantifiable achievements)
-
-Resume:
-{resume_text[:3000]}
-
-IMPORTANT: 
-- Suggest roles across ANY industry, not just tech (e.g., Marketing Manager, Sales Director, Operations Lead, Healthcare Administrator, Financial Analyst)
-- Be creative and consider lateral moves, promotions, and industry transitions
-- Ensure the 3 roles are diverse and represent realistic career paths
-- Match percentages should reflect genuine fit based on transferable skills
-
-Return ONLY a valid JSON object with this exact structure:
-{{
-  "skills": ["skill1", "skill2", ...],
-  "experience_years": 5.0,
-  "current_field": "Field Name",
-  "role_matches": {{"Role 1": 85.0, "Role 2": 75.0, "Role 3": 65.0}},
-  "skill_gaps": {{"Role 1": ["skill1", "skill2"], "Role 2": [...], "Role 3": [...]}},
-  "recommendations": [
-    {{"skill": "Skill Name", "priority": "High", "resource": "Resource Name", "timeframe": "1-2 months", "learning_tip": "Tip here"}}
-  ],
-  "trending_industries": ["Industry 1", "Industry 2", ...],
-  "summary": "Two sentence summary here.",
-  "ats_feedback": ["Tip 1", "Tip 2", ...]
-}}
-"""
-            
-            try:
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a career analysis expert. Always respond with valid JSON only."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    response_format={"type": "json_object"}
-                )
-                
-                analysis = json.loads(response.choices[0].message.content)
-                
-                # Dynamic categories based on detected field
-                current_field = analysis.get("current_field", "General")
-                categories = self._get_field_categories(current_field)
-                user_scores = self._calculate_universal_scores(analysis["skills"], categories)
-                
-                analysis["radar_data"] = {
-                    "labels": categories,
-                    "datasets": [
-                        {
-                            "label": "Your Competencies",
-                            "data": user_scores
-                        },
-                        {
-                            "label": "Industry Standard",
-                            "data": [80, 75, 70, 75, 65]
-                        }
-                    ]
-                }
-                
-                for rec in analysis.get("recommendations", []):
-                    if "learning_tip" not in rec:
-                        rec["learning_tip"] = self._get_learning_tip(rec.get("skill", ""))
-                
-                return analysis
-            
-            except json.JSONDecodeError as je:
-                print(f"[AI ANALYSIS ERROR] JSON parsing failed: {str(je)}")
-                print(f"[AI ANALYSIS ERROR] Response content: {response.choices[0].message.content if 'response' in locals() else 'No response'}")
-                raise ValueError(f"Failed to parse AI response as JSON: {str(je)}")
-            
-            except Exception as api_error:
-                print(f"[AI ANALYSIS ERROR] OpenAI API call failed: {type(api_error).__name__}")
-                print(f"[AI ANALYSIS ERROR] Error message: {str(api_error)}")
-                raise ValueError(f"OpenAI API error: {str(api_error)}")
+    def _build_ai_messages(self, resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None) -> List[Dict[str, str]]:
+        # Handle job description vs target role
+        if job_description:
+            target_instruction = f"The user is applying for a SPECIFIC JOB. Act as a Technical Recruiter for this role. Job Description: {job_description}. Calculate match score based ONLY on requirements in this job description. Extract the role title and required skills from the job description."
+        elif target_role:
+            target_instruction = f"The user wants to target the role: {target_role}. Include this as one of the 3 suggested roles."
+        else:
+            target_instruction = "Suggest the 3 most logical career next steps for this candidate."
         
-        except Exception as e:
-            import traceback
-            error_details = {
-                "error_type": type(e).__name__,
-                "error_message": str(e),
-                "traceback": traceback.format_exc()
-            }
-            print(f"[AI ANALYSIS ERROR] Type: {error_details['error_type']}")
-            print(f"[AI ANALYSIS ERROR] Message: {error_details['error_message']}")
-            print(f"[AI ANALYSIS ERROR] Full traceback:\n{error_details['traceback']}")
-            print(f"[AI ANALYSIS] Falling back to mock mode")
-            return self._mock_analysis(resume_text, target_role, job_description)
-    
-    def _extract_skills_universal(self, text: str) -> List[str]:
-        # Universal skills across all industries
-        universal_skills = [
-            # Tech
-            "Python", "JavaScript", "Java", "C++", "R", "SQL", "TypeScript",
-            "React", "Angular", "Vue", "Node.js", "Django", "Flask", "FastAPI",
-            "Machine Learning", "Deep Learning", "NLP", "Computer Vision",
-            "TensorFlow", "PyTorch", "Scikit-learn", "Pandas", "NumPy",
-            "Docker", "Kubernetes", "AWS", "Azure", "GCP",
-            "Git", "CI/CD", "REST API", "GraphQL", "MongoDB", "PostgreSQL",
-            # Business & Management
-            "Project Management", "Agile", "Scrum", "Leadership", "Team Management",
-            "Strategic Planning", "Budget Management", "Stakeholder Management",
-            "Change Management", "Risk Management", "Process Improvement",
-            # Marketing & Sales
-            "Digital Marketing", "SEO", "SEM", "Content Marketing", "Social Media Marketing",
-            "Email Marketing", "Marketing Analytics", "CRM", "Salesforce", "HubSpot",
-            "Sales Strategy", "Business Development", "Lead Generation", "Negotiation",
-            # Finance & Accounting
-            "Financial Analysis", "Financial Modeling", "Budgeting", "Forecasting",
-            "Accounting", "Auditing", "Tax Planning", "Excel", "QuickBooks", "SAP",
-            "Investment Analysis", "Portfolio Management", "Risk Assessment",
-            # Healthcare
-            "Patient Care", "Clinical Research", "Healthcare Administration",
-            "Medical Coding", "HIPAA", "Electronic Health Records", "Nursing",
-            # HR & Operations
-            "Recruitment", "Talent Acquisition", "Employee Relations", "HR Policies",
-            "Supply Chain Management", "Logistics", "Inventory Management",
-            "Quality Assurance", "Lean Six Sigma", "Operations Management",
-            # Soft Skills
-            "Communication", "Problem Solving", "Critical Thinking", "Collaboration",
-            "Time Management", "Adaptability", "Creativity", "Emotional Intelligence"
+        # The static instructions always come first and byte-identical, so provider-side prompt caching can reuse them
+        return [
+            {"role": "system", "content": ANALYSIS_INSTRUCTIONS},
+            {"role": "user", "content": f"Role targeting: {target_instruction}\n\nResume:\n{resume_text}"}
         ]
+    
+    def _build_prompt(self, resume_text: str, target_role: Optional[str] = None,
+                      job_description: Optional[str] = None) -> Tuple[List[Dict[str, str]], Dict]:
+        """Chat messages with the resume and job description compacted to the token budget, plus token usage"""
+        resume = self.prompt_builder.compact_resume(resume_text)
+        jd = self.prompt_builder.compact_job_description(job_description)
+        messages = self._build_ai_messages(resume.text, target_role, jd.text if jd else None)
+        
+        usage = {
+            "prompt_tokens": self.prompt_builder.count_message_tokens(messages),
+            "resume_tokens": resume.tokens,
+            "resume_tokens_original": resume.original_tokens,
+            "resume_sections": resume.sections,
+            "truncated": resume.truncated or bool(jd and jd.truncated)
+        }
+        PROMPT_TOKENS.observe(resume.original_tokens, part="resume_original")
+        PROMPT_TOKENS.observe(resume.tokens, part="resume")
+        PROMPT_TOKENS.observe(usage["prompt_tokens"], part="prompt")
+        if usage["truncated"]:
+            PROMPT_TRUNCATIONS.inc()
+        return messages, usage
+    
+    def _with_api_usage(self, usage: Dict, response) -> Dict:
+        """Add the provider-reported token counts when the response has them"""
+        api_usage = getattr(response, "usage", None)
+        if api_usage is not None:
+            usage = dict(usage, api_prompt_tokens=api_usage.prompt_tokens, completion_tokens=api_usage.completion_tokens)
+            LLM_TOKENS.observe(api_usage.prompt_tokens, kind="prompt")
+            LLM_TOKENS.observe(api_usage.completion_tokens, kind="completion")
+            details = getattr(api_usage, "prompt_tokens_details", None)
+            if details is not None and getattr(details, "cached_tokens", None) is not None:
+                # Prompt tokens served from the provider's prefix cache
+                usage["cached_prompt_tokens"] = details.cached_tokens
+        return usage
+    
+    def _finalize_ai_analysis(self, content: str, usage: Optional[Dict] = None) -> Dict:
+        """Parse the model's JSON reply and add the locally computed fields"""
+        try:
+            analysis = json.loads(content)
+        except json.JSONDecodeError as je:
+            print(f"[AI ANALYSIS ERROR] JSON parsing failed: {str(je)}")
+            print(f"[AI ANALYSIS ERROR] Response content: {content}")
+            raise ValueError(f"Failed to parse AI response as JSON: {str(je)}")
+        
+        # Dynamic categories based on detected field
+        current_field = analysis.get("current_field", "General")
+        categories = self._get_field_categories(current_field)
+        user_scores = self._calculate_universal_scores(analysis["skills"], categories)
         
-        detected = []
-        text_lower = text.lower()
+        analysis["radar_data"] = self._radar_data(categories, user_scores)
         
-        for skill in universal_skills:
-            if skill.lower() in text_lower:
-                detected.append(skill)
+        for rec in analysis.get("recommendations", []):
+            if "learning_tip" not in rec:
+                rec["learning_tip"] = self._get_learning_tip(rec.get("skill", ""))
         
-        return detected[:20]
+        if usage is not None:
+            analysis["usage"] = usage
+        return analysis
     
-    def _extract_experience_simple(self, text: str) -> float:
-        patterns = [
-            r'(\d+)\+?\s*years?\s*(?:of)?\s*experience',
-            r'experience[:\s]+(\d+)\+?\s*years?',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text.lower())
-            if match:
-                return float(match.group(1))
+    def _log_ai_failure(self, e: Exception):
+        LLM_FALLBACKS.inc(error_type=type(e).__name__)
+        if isinstance(e, CircuitOpenError):
+            # Expected while the provider is down: one line, no traceback
+            print(f"[AI ANALYSIS] {str(e)}; using the heuristic analysis")
+            return
+        import traceback
+        error_details = {
+            "error_type": type(e).__name__,
+            "error_message": str(e),
+            "traceback": traceback.format_exc()
+        }
+        print(f"[AI ANALYSIS ERROR] Type: {error_details['error_type']}")
+        print(f"[AI ANALYSIS ERROR] Message: {error_details['error_message']}")
+        print(f"[AI ANALYSIS ERROR] Full traceback:\n{error_details['traceback']}")
+        print(f"[AI ANALYSIS] Falling back to mock mode")
+    
+    def _ai_analysis(self, resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None) -> Dict:
+        """Live LLM analysis; raises on failure so callers can fall back (and skip caching)"""
+        # Check API key first
+        if not self.api_key:
+            print("[AI ANALYSIS ERROR] No API key available")
+            raise ValueError("OpenAI API key is not configured. Please set OPENAI_API_KEY environment variable.")
         
+        self.llm_breaker.before_call()
+        messages, usage = self._build_prompt(resume_text, target_role, job_description)
+        started = time.perf_counter()
+        try:
+            response = self.clients.get_client().chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            )
+            self.llm_breaker.record(time.perf_counter() - started, ok=True)
+            LLM_SECONDS.observe(time.perf_counter() - started, call="analysis", outcome="ok")
+        except Exception as api_error:
+            self.llm_breaker.record(time.perf_counter() - started, ok=False)
+            LLM_SECONDS.observe(time.perf_counter() - started, call="analysis", outcome="error")
+            print(f"[AI ANALYSIS ERROR] OpenAI API call failed: {type(api_error).__name__}")
+            print(f"[AI ANALYSIS ERROR] Error message: {str(api_error)}")
+            raise ValueError(f"OpenAI API error: {str(api_error)}")
+        
+        return self._finalize_ai_analysis(response.choices[0].message.content, self._with_api_usage(usage, response))
+    
+    async def _ai_analysis_async(self, resume_text: str, target_role: Optional[str] = None, job_description: Optional[str] = None,
+                                 offload: Callable[..., Awaitable[Any]] = asyncio.to_thread) -> Dict:
+        self.llm_breaker.before_call()
+        messages, usage = await offload(self._build_prompt, resume_text, target_role, job_description)
+        started = time.perf_counter()
+        try:
+            response = await self.clients.chat_completion(
+                model=self.model,
+                messages=messages,
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            )
+            self.llm_breaker.record(time.perf_counter() - started, ok=True)
+            LLM_SECONDS.observe(time.perf_counter() - started, call="analysis", outcome="ok")
+        except Exception as api_error:
+            self.llm_breaker.record(time.perf_counter() - started, ok=False)
+            LLM_SECONDS.observe(time.perf_counter() - started, call="analysis", outcome="error")
+            print(f"[AI ANALYSIS ERROR] OpenAI API call failed: {type(api_error).__name__}")
+            print(f"[AI ANALYSIS ERROR] Error message: {str(api_error)}")
+            raise ValueError(f"OpenAI API error: {str(api_error) or type(api_error).__name__}")
+        
+        return self._finalize_ai_analysis(response.choices[0].message.content, self._with_api_usage(usage, response))
+    
+    def _extract_skills_universal(self, doc: TextDocument) -> List[str]:
+        # Universal skills across all industries, from the document's single taxonomy scan
+        return doc.skills[:20]
+    
+    def _extract_experience_simple(self, doc: TextDocument) -> float:
+        if doc.experience_years is not None:
+            return doc.experience_years
         return 2.0
     
-    def _detect_field(self, text: str, skills: List[str]) -> str:
+    def _detect_field(self, doc: TextDocument, skills: List[str]) -> str:
         """Detect the professional field based on resume text and skills"""
-        text_lower = text.lower()
-        
-        field_keywords = {
-            "Software Development": ["software", "developer", "programming", "coding", "engineer"],
-            "Data Science": ["data scientist", "machine learning", "analytics", "data analysis"],
-            "Digital Marketing": ["marketing", "seo", "social media", "content marketing", "campaigns"],
-            "Sales": ["sales", "business development", "account management", "revenue"],
-            "Finance": ["financial", "accounting", "investment", "banking", "audit"],
-            "Healthcare": ["healthcare", "medical", "patient", "clinical", "nursing", "hospital"],
-            "Human Resources": ["hr", "recruitment", "talent acquisition", "employee relations"],
-            "Operations": ["operations", "supply chain", "logistics", "process improvement"],
-            "Project Management": ["project manager", "scrum master", "agile", "program management"],
-            "Design": ["designer", "ux", "ui", "graphic design", "creative"],
-            "Education": ["teacher", "instructor", "education", "training", "curriculum"]
-        }
-        
+        # Field keywords come from the document's single scan; tally fields through the keyword -> field index
         field_scores = {}
-        for field, keywords in field_keywords.items():
-            score = sum(1 for kw in keywords if kw in text_lower)
-            if score > 0:
-                field_scores[field] = score
+        for keyword in doc.field_keywords:
+            for field in self.taxonomy.keyword_fields[keyword]:
+                field_scores[field] = field_scores.get(field, 0) + 1
         
         if field_scores:
-            return max(field_scores.items(), key=lambda x: x[1])[0]
-        return "General Business"
+            # Ties go to the field listed first in the taxonomy
+            return max(self.taxonomy.field_names, key=lambda field: field_scores.get(field, 0))
+        return self.taxonomy.default_field
     
     def _suggest_roles(self, current_field: str, exclude_role: Optional[str] = None) -> List[str]:
         """Suggest 3 logical career next steps based on current field"""
-        role_suggestions = {
-            "Software Development": ["Senior Software Engineer", "Tech Lead", "Engineering Manager", "Solutions Architect", "DevOps Engineer"],
-            "Data Science": ["Senior Data Scientist", "ML Engineer", "Data Engineering Manager", "AI Research Scientist", "Analytics Director"],
-            "Digital Marketing": ["Marketing Manager", "Digital Marketing Director", "Growth Marketing Lead", "Brand Manager", "Content Strategy Director"],
-            "Sales": ["Sales Manager", "Business Development Director", "Account Executive", "VP of Sales", "Revenue Operations Manager"],
-            "Finance": ["Financial Analyst", "Finance Manager", "Investment Analyst", "Controller", "CFO"],
-            "Healthcare": ["Healthcare Administrator", "Clinical Manager", "Medical Director", "Healthcare Consultant", "Patient Care Coordinator"],
-            "Human Resources": ["HR Manager", "Talent Acquisition Lead", "People Operations Director", "HR Business Partner", "Chief People Officer"],
-            "Operations": ["Operations Manager", "Supply Chain Director", "Process Improvement Manager", "COO", "Logistics Manager"],
-            "Project Management": ["Senior Project Manager", "Program Manager", "Portfolio Manager", "PMO Director", "Agile Coach"],
-            "Design": ["Senior Designer", "Design Manager", "Creative Director", "UX Director", "Product Designer"],
-            "Education": ["Lead Instructor", "Curriculum Director", "Education Program Manager", "Dean", "Training Manager"],
-            "General Business": ["Business Analyst", "Operations Manager", "Project Manager", "Strategy Consultant", "Product Manager"]
-        }
-        
-        suggestions = role_suggestions.get(current_field, role_suggestions["General Business"])
+        role_suggestions = self.taxonomy.role_suggestions
+        suggestions = role_suggestions.get(current_field, role_suggestions[self.taxonomy.default_field])
         
         # Filter out the exclude_role if provided
         if exclude_role:
-            suggestions = [r for r in suggestions if r.lower() != exclude_role.lower()]
+            exclude_lower = exclude_role.lower()
+            suggestions = [r for r in suggestions if r.lower() != exclude_lower]
         
-        return suggestions[:3]
+        return list(suggestions[:3])
     
     def _get_role_requirements(self, role: str, field: str) -> List[str]:
         """Get required skills for a specific role"""
-        # Generic requirements based on role type
-        if "Manager" in role or "Director" in role or "Lead" in role:
-            base_skills = ["Leadership", "Team Management", "Strategic Planning", "Communication", "Budget Management"]
-        elif "Senior" in role:
-            base_skills = ["Problem Solving", "Mentorship", "Technical Expertise", "Project Management"]
-        elif "Engineer" in role or "Developer" in role:
-            base_skills = ["Python", "Git", "Problem Solving", "Agile", "CI/CD"]
-        elif "Analyst" in role:
-            base_skills = ["Excel", "Data Analysis", "SQL", "Critical Thinking", "Communication"]
-        elif "Designer" in role:
-            base_skills = ["Creativity", "User Research", "Prototyping", "Collaboration", "Design Tools"]
-        else:
-            base_skills = ["Communication", "Problem Solving", "Collaboration", "Time Management"]
+        # Generic requirements based on role type (first matching rule wins)
+        base_skills = self.taxonomy.fallback_role_skills
+        for rule in self.taxonomy.role_rules:
+            if any(token in role for token in rule.title_contains):
+                base_skills = rule.skills
+                break
         
         # Add field-specific skills
-        field_skills = {
-            "Software Development": ["Python", "JavaScript", "Git", "Docker", "AWS"],
-            "Data Science": ["Python", "Machine Learning", "SQL", "Statistics", "Data Visualization"],
-            "Digital Marketing": ["SEO", "Google Analytics", "Content Marketing", "Social Media Marketing", "CRM"],
-            "Sales": ["Salesforce", "Negotiation", "CRM", "Sales Strategy", "Lead Generation"],
-            "Finance": ["Excel", "Financial Modeling", "Accounting", "Financial Analysis", "SAP"],
-            "Healthcare": ["Patient Care", "Healthcare Administration", "HIPAA", "Electronic Health Records"],
-            "Human Resources": ["Recruitment", "HR Policies", "Employee Relations", "Talent Management"],
-            "Operations": ["Supply Chain Management", "Process Improvement", "Lean Six Sigma", "Logistics"],
-            "Project Management": ["Agile", "Scrum", "Project Management", "Stakeholder Management"],
-        }
-        
-        additional_skills = field_skills.get(field, ["Communication", "Leadership", "Problem Solving"])
-        return list(set(base_skills + additional_skills))[:10]
+        additional_skills = self.taxonomy.field_skills.get(field, self.taxonomy.fallback_field_skills)
+        return list(dict.fromkeys(base_skills + additional_skills))[:10]
+    
+    def preload(self):
+        """Build what is otherwise created on first use (matcher regexes, role catalog, tokenizer)"""
+        for matcher in (self.taxonomy.skill_matcher, self.taxonomy.field_keyword_matcher):
+            matcher.pattern
+        self.role_catalog()
+        if not self.mock_mode:
+            self.prompt_builder.count_tokens("")
+    
+    def role_catalog(self) -> RoleCatalog:
+        """Every suggested role of every field with its requirements, compiled on first use"""
+        if self._role_catalog is None:
+            catalog = {}
+            for field, roles in self.taxonomy.role_suggestions.items():
+                for role in roles:
+                    if role not in catalog:
+                        catalog[role] = self.skill_gap.compile(
+                            RoleRequirements(role, tuple(self._get_role_requirements(role, field)))
+                        )
+            self._role_catalog = self.skill_gap.catalog(list(catalog.values()))
+        return self._role_catalog
+    
+    def rank_roles(self, skills: List[str], top_k: int = 10) -> List[Dict]:
+        """Best-matching roles from the whole taxonomy for a skill list"""
+        return [
+            {"role": score.role, "match_percentage": score.match_percentage, "missing_skills": score.missing[:5]}
+            for score in self.skill_gap.rank(skills, self.role_catalog(), top_k)
+        ]
     
     def _get_field_categories(self, field: str) -> List[str]:
         """Get radar chart categories based on professional field"""
-        category_map = {
-            "Software Development": ["Technical Skills", "Development Tools", "Architecture", "DevOps", "Collaboration"],
-            "Data Science": ["Programming", "ML/AI", "Statistics", "Data Tools", "Visualization"],
-            "Digital Marketing": ["Strategy", "Analytics", "Content", "Social Media", "Tools"],
-            "Sales": ["Sales Skills", "CRM", "Communication", "Strategy", "Negotiation"],
-            "Finance": ["Analysis", "Modeling", "Accounting", "Tools", "Compliance"],
-            "Healthcare": ["Clinical Skills", "Administration", "Compliance", "Technology", "Patient Care"],
-            "Human Resources": ["Recruitment", "Employee Relations", "Compliance", "Tools", "Strategy"],
-            "Operations": ["Process Management", "Supply Chain", "Quality", "Tools", "Leadership"],
-            "Project Management": ["Planning", "Execution", "Stakeholder Mgmt", "Tools", "Leadership"],
+        return list(self.taxonomy.field_categories.get(field, self.taxonomy.fallback_categories))
+    
+    def _radar_data(self, categories: List[str], user_scores: List[float]) -> Dict:
+        return {
+            "labels": categories,
+            "datasets": [
+                {
+                    "label": "Your Competencies",
+                    "data": user_scores
+                },
+                {
+                    "label": "Industry Standard",
+                    "data": [80, 75, 70, 75, 65]
+                }
+            ]
         }
-        
-        return category_map.get(field, ["Core Skills", "Tools", "Communication", "Leadership", "Strategy"])
     
     def _calculate_universal_scores(self, skills: List[str], categories: List[str]) -> List[float]:
         """Calculate scores for universal categories"""
@@ -462,60 +700,29 @@ Return ONLY a valid JSON object with this exact structure:
     
     def _identify_trending_industries(self, skills: List[str], current_field: str) -> List[str]:
         """Identify trending industries that match the candidate's skills"""
-        skills_lower = [s.lower() for s in skills]
-        
-        industry_keywords = {
-            "HealthTech": ["healthcare", "medical", "patient", "clinical", "health"],
-            "FinTech": ["finance", "banking", "investment", "payment", "blockchain"],
-            "Green Energy": ["sustainability", "renewable", "energy", "environmental", "climate"],
-            "E-commerce": ["ecommerce", "retail", "sales", "marketing", "logistics"],
-            "AI & Machine Learning": ["machine learning", "ai", "deep learning", "nlp", "computer vision"],
-            "Cybersecurity": ["security", "cybersecurity", "encryption", "compliance", "risk"],
-            "Cloud Computing": ["aws", "azure", "gcp", "cloud", "devops"],
-            "EdTech": ["education", "training", "learning", "curriculum", "teaching"],
-            "SaaS": ["software", "saas", "api", "cloud", "subscription"],
-            "Digital Marketing": ["marketing", "seo", "social media", "content", "analytics"]
-        }
+        # (industry, keyword) hits are precomputed per taxonomy skill
+        hits = set()
+        for skill in skills:
+            hits |= self.taxonomy.industry_hits(skill.lower())
         
         industry_scores = {}
-        for industry, keywords in industry_keywords.items():
-            score = sum(1 for kw in keywords if any(kw in skill for skill in skills_lower))
-            if score > 0:
-                industry_scores[industry] = score
+        for industry, _ in hits:
+            industry_scores[industry] = industry_scores.get(industry, 0) + 1
         
-        # Sort by score and return top 3-5
-        sorted_industries = sorted(industry_scores.items(), key=lambda x: x[1], reverse=True)
-        return [industry for industry, _ in sorted_industries[:5]]
+        # Sort by score (ties in taxonomy order) and return top 3-5
+        ranked = [industry for industry in self.taxonomy.industry_names if industry in industry_scores]
+        ranked.sort(key=lambda industry: industry_scores[industry], reverse=True)
+        return ranked[:5]
     
     def _get_default_skills_for_field(self, field: str) -> List[str]:
         """Get default recommended skills for a field"""
-        default_skills = {
-            "Software Development": ["Docker", "Kubernetes", "CI/CD", "TypeScript"],
-            "Data Science": ["Deep Learning", "MLOps", "Big Data", "Cloud Platforms"],
-            "Digital Marketing": ["Marketing Automation", "A/B Testing", "Google Ads", "Analytics"],
-            "Sales": ["Sales Automation", "CRM Advanced", "Data Analysis", "Presentation Skills"],
-            "Finance": ["Advanced Excel", "Power BI", "Financial Software", "Data Analysis"],
-            "Healthcare": ["Healthcare IT", "Data Analytics", "Compliance Training", "EMR Systems"],
-            "Human Resources": ["HR Analytics", "Applicant Tracking Systems", "Employee Engagement", "Compliance"],
-            "Operations": ["Six Sigma", "ERP Systems", "Data Analytics", "Automation"],
-            "Project Management": ["PMP Certification", "Advanced Agile", "Portfolio Management", "Risk Management"],
-        }
-        
-        return default_skills.get(field, ["Leadership", "Communication", "Project Management"])
+        return list(self.taxonomy.field_default_skills.get(field, self.taxonomy.fallback_default_skills))
     
     def _calculate_category_scores(self, skills: List[str], categories: List[str]) -> List[float]:
         scores = []
         
-        category_keywords = {
-            "Programming": ["python", "javascript", "java", "c++", "typescript"],
-            "ML/AI": ["machine learning", "deep learning", "tensorflow", "pytorch", "nlp"],
-            "Frontend": ["react", "angular", "vue", "css", "html"],
-            "Backend": ["node.js", "django", "flask", "fastapi", "sql"],
-            "DevOps": ["docker", "kubernetes", "aws", "ci/cd", "git"]
-        }
-        
         for category in categories:
-            keywords = category_keywords.get(category, [])
+            keywords = self.taxonomy.category_keywords.get(category, ())
             matched = sum(1 for skill in skills if any(kw in skill.lower() for kw in keywords))
             score = min(100, (matched / max(len(keywords), 1)) * 100 + 20)
             scores.append(round(score, 1))
@@ -523,82 +730,13 @@ Return ONLY a valid JSON object with this exact structure:
         return scores
     
     def _get_learning_resource(self, skill: str) -> str:
-        resources = {
-            "Python": "Python.org Official Tutorial",
-            "JavaScript": "MDN Web Docs - JavaScript Guide",
-            "React": "React Official Documentation",
-            "Machine Learning": "Coursera - Machine Learning Specialization",
-            "Deep Learning": "Deep Learning Specialization by Andrew Ng",
-            "Docker": "Docker Official Documentation",
-            "Kubernetes": "Kubernetes.io Interactive Tutorial",
-            "AWS": "AWS Certified Solutions Architect Course",
-            "SQL": "SQLBolt - Interactive SQL Tutorial",
-            "TensorFlow": "TensorFlow Official Tutorials",
-            "PyTorch": "PyTorch Tutorials",
-            "Node.js": "Node.js Official Guides",
-            "TypeScript": "TypeScript Handbook",
-            "Statistics": "Khan Academy - Statistics & Probability",
-            "Data Visualization": "D3.js in Action",
-            "CI/CD": "GitHub Actions Documentation",
-            "Git": "Pro Git Book (Free)"
-        }
-        return resources.get(skill, f"{skill} - Udemy/Coursera Course")
+        return self.taxonomy.learning_resources.get(skill, f"{skill} - Udemy/Coursera Course")
     
     def _get_timeframe(self, skill: str) -> str:
-        timeframes = {
-            "Python": "2-3 months",
-            "JavaScript": "2-3 months",
-            "React": "1-2 months",
-            "Machine Learning": "3-4 months",
-            "Deep Learning": "4-6 months",
-            "Docker": "2-4 weeks",
-            "Kubernetes": "1-2 months",
-            "AWS": "2-3 months",
-            "SQL": "1-2 months",
-            "TensorFlow": "2-3 months",
-            "PyTorch": "2-3 months",
-            "Statistics": "2-3 months",
-            "Git": "2-3 weeks"
-        }
-        return timeframes.get(skill, "1-3 months")
+        return self.taxonomy.learning_timeframes.get(skill, "1-3 months")
     
     def _get_learning_tip(self, skill: str) -> str:
-        tips = {
-            "Python": "Start with basic syntax and data structures, then build small projects to solidify your understanding.",
-            "JavaScript": "Master the fundamentals before diving into frameworks - focus on ES6+ features and async programming.",
-            "React": "Build component-based thinking by creating reusable UI components and understanding the virtual DOM.",
-            "Machine Learning": "Begin with supervised learning algorithms and practice on real datasets from Kaggle.",
-            "Deep Learning": "Start with neural network basics and implement models from scratch before using high-level frameworks.",
-            "Docker": "Learn by containerizing your existing projects - start simple with single-container apps.",
-            "Kubernetes": "Master Docker first, then deploy a simple app to understand pods, services, and deployments.",
-            "AWS": "Get hands-on with the free tier - start with EC2, S3, and Lambda to understand core services.",
-            "SQL": "Practice writing queries daily on platforms like LeetCode or HackerRank to build muscle memory.",
-            "TensorFlow": "Follow official tutorials and implement classic models like CNNs and RNNs from scratch.",
-            "PyTorch": "Start with tensor operations and autograd, then build neural networks using nn.Module.",
-            "Node.js": "Build REST APIs and understand the event loop - async/await patterns are crucial.",
-            "TypeScript": "Learn type annotations gradually by converting existing JavaScript projects to TypeScript.",
-            "Statistics": "Focus on probability distributions and hypothesis testing - apply concepts to real-world data.",
-            "Data Visualization": "Start with basic charts in libraries like Matplotlib or Chart.js before advanced visualizations.",
-            "CI/CD": "Set up automated testing and deployment for a personal project using GitHub Actions or Jenkins.",
-            "Git": "Practice branching strategies and learn to resolve merge conflicts through hands-on experience.",
-            "Angular": "Understand TypeScript first, then master components, services, and dependency injection.",
-            "Vue": "Start with the composition API and build reactive components with clear data flow.",
-            "Django": "Learn the MVT pattern and build a full CRUD application with authentication.",
-            "Flask": "Master routing and templates, then add database integration with SQLAlchemy.",
-            "FastAPI": "Leverage type hints and automatic documentation - build async APIs for better performance.",
-            "MongoDB": "Understand document-based data modeling and practice with aggregation pipelines.",
-            "PostgreSQL": "Learn advanced features like JSON support, full-text search, and query optimization.",
-            "GraphQL": "Start with schema design and resolvers - understand the difference from REST APIs.",
-            "Redis": "Use it for caching and session storage in a real project to understand its speed benefits.",
-            "Pandas": "Practice data manipulation with real datasets - master groupby, merge, and pivot operations.",
-            "NumPy": "Focus on array operations and broadcasting - essential for data science and ML work.",
-            "Scikit-learn": "Implement end-to-end ML pipelines including preprocessing, training, and evaluation.",
-            "NLP": "Start with text preprocessing and basic techniques like TF-IDF before deep learning models.",
-            "Computer Vision": "Learn image processing basics with OpenCV before diving into CNNs and object detection.",
-            "Azure": "Explore Azure Portal and CLI - start with VMs, Storage, and Azure Functions.",
-            "GCP": "Use the free tier to experiment with Compute Engine, Cloud Storage, and BigQuery."
-        }
-        return tips.get(skill, f"Practice {skill} through hands-on projects and online tutorials to build real-world experience.")
+        return self.taxonomy.learning_tips.get(skill, f"Practice {skill} through hands-on projects and online tutorials to build real-world experience.")
     
     def _generate_summary(self, skills: List[str], experience_years: float, top_role: str, match_score: float) -> str:
         skill_count = len(skills)
@@ -621,41 +759,18 @@ Return ONLY a valid JSON object with this exact structure:
         
         return summary
     
-    def _extract_skills_from_job_description(self, job_description: str) -> List[str]:
+    def _extract_skills_from_job_description(self, jd_doc: TextDocument) -> List[str]:
         """Extract required skills from job description"""
-        jd_lower = job_description.lower()
-        detected_skills = []
-        
-        # Use the same universal skills list
-        universal_skills = [
-            "Python", "JavaScript", "Java", "C++", "R", "SQL", "TypeScript",
-            "React", "Angular", "Vue", "Node.js", "Django", "Flask", "FastAPI",
-            "Machine Learning", "Deep Learning", "NLP", "Computer Vision",
-            "TensorFlow", "PyTorch", "Scikit-learn", "Pandas", "NumPy",
-            "Docker", "Kubernetes", "AWS", "Azure", "GCP",
-            "Git", "CI/CD", "REST API", "GraphQL", "MongoDB", "PostgreSQL",
-            "Project Management", "Agile", "Scrum", "Leadership", "Team Management",
-            "Strategic Planning", "Budget Management", "Stakeholder Management",
-            "Digital Marketing", "SEO", "SEM", "Content Marketing", "Social Media Marketing",
-            "Salesforce", "HubSpot", "CRM", "Sales Strategy", "Business Development",
-            "Financial Analysis", "Financial Modeling", "Budgeting", "Excel",
-            "Communication", "Problem Solving", "Critical Thinking", "Collaboration"
-        ]
-        
-        for skill in universal_skills:
-            if skill.lower() in jd_lower:
-                detected_skills.append(skill)
-        
-        return detected_skills[:15]
+        # Use the same universal skills taxonomy
+        return jd_doc.skills[:15]
     
-    def _extract_role_from_job_description(self, job_description: str) -> str:
+    def _extract_role_from_job_description(self, jd_doc: TextDocument) -> str:
         """Extract role title from job description"""
-        lines = job_description.split('\n')
+        lines = jd_doc.lines
         first_line = lines[0].strip() if lines else "Target Role"
         
         # Common role patterns
-        role_keywords = ["engineer", "manager", "director", "analyst", "developer", 
-                        "designer", "specialist", "consultant", "coordinator", "lead"]
+        role_keywords = self.taxonomy.role_title_keywords
         
         for line in lines[:5]:
             line_lower = line.lower()
@@ -664,18 +779,15 @@ Return ONLY a valid JSON object with this exact structure:
         
         return first_line[:50] if first_line else "Target Role"
     
-    def _generate_ats_feedback(self, resume_text: str, skills: List[str], job_description: Optional[str] = None) -> List[str]:
-        """Generate ATS optimization feedback"""
+    def _resume_ats_checks(self, doc: TextDocument) -> List[str]:
+        """ATS warnings that depend only on the resume"""
         feedback = []
-        text_lower = resume_text.lower()
+        text_lower = doc.lower
         
         # Check for contact information
-        has_email = '@' in resume_text
-        has_phone = any(char.isdigit() for char in resume_text[:200])
-        
-        if not has_email:
+        if not doc.has_email:
             feedback.append("⚠️ Missing email address - Add a professional email in the contact section")
-        if not has_phone:
+        if not doc.has_phone:
             feedback.append("⚠️ Missing phone number - Include your contact number for recruiters")
         
         # Check for standard section headings
@@ -686,14 +798,19 @@ Return ONLY a valid JSON object with this exact structure:
             feedback.append(f"📋 Use standard section headings like 'Experience', 'Education', 'Skills' for better ATS parsing")
         
         # Check for quantifiable achievements
-        has_numbers = bool(re.search(r'\d+%|\d+\+|increased|decreased|improved|reduced', text_lower))
-        if not has_numbers:
+        if not doc.has_quantified_achievements:
             feedback.append("📊 Add quantifiable achievements (e.g., 'Increased sales by 25%', 'Managed team of 10')")
         
+        return feedback
+    
+    def _generate_ats_feedback(self, checks: List[str], skill_set: Set[str], jd_doc: Optional[TextDocument] = None) -> List[str]:
+        """Generate ATS optimization feedback"""
+        feedback = list(checks)
+        
         # Check for keywords if job description provided
-        if job_description:
-            jd_skills = self._extract_skills_from_job_description(job_description)
-            missing_keywords = [s for s in jd_skills if s.lower() not in text_lower]
+        if jd_doc:
+            jd_skills = self._extract_skills_from_job_description(jd_doc)
+            missing_keywords = [s for s in jd_skills if s not in skill_set]
             
             if len(missing_keywords) > 3:
                 feedback.append(f"🎯 Missing key job requirements: {', '.join(missing_keywords[:3])} - Consider adding these if you have experience")
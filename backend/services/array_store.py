@@ -0,0 +1,74 @@
+import os
+import json
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+METADATA_FILE = "metadata.json"
+LOCK_FILE = ".lock"
+
+
+@contextmanager
+def locked(directory: str, shared: bool = False):
+    """Hold an flock on <directory>/.lock: exclusive for a writer, shared for a reader.
+
+    Writers reload what other processes saved while holding the lock, so
+    concurrent ingests through different workers are merged instead of the
+    last save overwriting the others.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK_FILE), "a") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield  # closing the file releases the lock
+
+
+def saved_version(directory: str) -> Optional[Tuple[int, int, int]]:
+    """Identity of the current metadata file, which changes on every save; None when nothing was saved yet"""
+    try:
+        st = os.stat(os.path.join(directory, METADATA_FILE))
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def save_arrays(directory: str, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]):
+    """Write each array as <name>.npy plus a JSON metadata file, replacing files atomically.
+
+    Metadata is written last, so a reader that sees new metadata also sees the
+    arrays it describes. Processes that memory-mapped the old files keep
+    reading them until they reload.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        path = os.path.join(directory, f"{name}.npy")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+
+    path = os.path.join(directory, METADATA_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f)
+    os.replace(tmp_path, path)
+
+
+def load_arrays(directory: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Memory-map every array listed in the metadata; returns ({}, {}) when nothing was saved yet"""
+    path = os.path.join(directory, METADATA_FILE)
+    if not os.path.exists(path):
+        return {}, {}
+    with open(path, encoding="utf-8") as f:
+        metadata = json.load(f)
+    arrays = {
+        name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        for name in metadata.get("arrays", [])
+    }
+    return arrays, metadata
@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Writes between two passes of the disk tier's row limit (a pass counts the namespace's rows)
+DISK_EVICTION_INTERVAL = 100
+
+
+class TieredCache:
+    """In-process LRU cache with TTL and size-based eviction, optionally backed by SQLite.
+
+    Values must be JSON-serializable. They are stored serialized, which makes
+    the byte budget exact and guarantees callers never share mutable state.
+    The lock only guards the in-memory tier; SQLite is read and written
+    outside it, on a connection per thread. On the event loop use
+    get_async()/set_async(), which hand the SQLite tier to a thread.
+    """
+
+    def __init__(self, name: str, max_entries: int = 512, max_bytes: int = 64 * 1024 * 1024,
+                 ttl: Optional[float] = None, db_path: Optional[str] = None, max_disk_rows: int = 10000):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.db_path = db_path or None
+        self.max_disk_rows = max_disk_rows
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._local = threading.local()
+        self._disk_writes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.disk_evictions = 0
+
+    @classmethod
+    def from_env(cls, name: str, prefix: str, default_entries: int = 512,
+                 default_mb: int = 64, default_ttl: float = 86400) -> "TieredCache":
+        """Build a cache configured by <PREFIX>_SIZE, _MAX_MB, _TTL, _DB and _DB_MAX_ROWS environment variables"""
+        ttl = float(os.getenv(f"{prefix}_TTL", default_ttl))
+        return cls(
+            name,
+            max_entries=int(os.getenv(f"{prefix}_SIZE", default_entries)),
+            max_bytes=int(float(os.getenv(f"{prefix}_MAX_MB", default_mb)) * 1024 * 1024),
+            ttl=ttl if ttl > 0 else None,
+            db_path=os.getenv(f"{prefix}_DB"),
+            max_disk_rows=int(os.getenv(f"{prefix}_DB_MAX_ROWS", 10000)),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread, opened lazily so forked workers each get their own
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.db_path))
+            os.makedirs(directory, exist_ok=True)
+            # Cached values can hold resume text: only the service user may read the file (SQLite gives -wal/-shm the same mode)
+            os.close(os.open(self.db_path, os.O_RDWR | os.O_CREAT, 0o600))
+            db = sqlite3.connect(self.db_path, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def get(self, key: str) -> Optional[Any]:
+        found, value = self._memory_get(key, time.time())
+        if found:
+            return value
+        return self._disk_lookup(key)
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        """get() for the event loop: memory hits are answered inline, a SQLite lookup runs in a thread"""
+        found, value = self._memory_get(key, time.time())
+        if found:
+            return value
+        if not self.db_path:
+            with self._lock:
+                self.misses += 1
+            return None
+        return await asyncio.to_thread(self._disk_lookup, key)
+
+    def set(self, key: str, value: Any):
+        payload, expires_at = self._memory_set(key, value)
+        if self.db_path:
+            self._disk_set(key, payload, expires_at)
+
+    async def set_async(self, key: str, value: Any):
+        """set() for the event loop: the SQLite write runs in a thread"""
+        payload, expires_at = self._memory_set(key, value)
+        if self.db_path:
+            await asyncio.to_thread(self._disk_set, key, payload, expires_at)
+
+    def _memory_get(self, key: str, now: float) -> Tuple[bool, Optional[Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, payload = entry
+            if expires_at is None or expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, json.loads(payload)
+            self._remove(key)
+            return False, None
+
+    def _memory_set(self, key: str, value: Any) -> Tuple[str, Optional[float]]:
+        payload = json.dumps(value)
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._remember(key, payload, expires_at)
+        return payload, expires_at
+
+    def _disk_lookup(self, key: str) -> Optional[Any]:
+        """Second tier after a memory miss; a hit is copied into memory"""
+        row = self._disk_get(key, time.time())
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            payload, expires_at = row
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, payload, expires_at)
+        return json.loads(payload)
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[str, Optional[float]]]:
+        if not self.db_path:
+            return None
+        try:
+            db = self._connect()
+            row = db.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.name, key)
+            ).fetchone()
+            if row is not None and row[1] is not None and row[1] <= now:
+                db.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.name, key))
+                return None
+        except sqlite3.Error as e:
+            print(f"[CACHE] {self.name}: disk read failed: {str(e)}")
+            return None
+        if row is None:
+            return None
+        return row[0], row[1]
+
+    def _disk_set(self, key: str, payload: str, expires_at: Optional[float]):
+        try:
+            db = self._connect()
+            db.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (self.name, key, payload, expires_at)
+            )
+            with self._lock:
+                self._disk_writes += 1
+                evict = self.max_disk_rows > 0 and self._disk_writes % DISK_EVICTION_INTERVAL == 1
+            if evict:
+                self._disk_evict(db)
+        except sqlite3.Error as e:
+            print(f"[CACHE] {self.name}: disk write failed: {str(e)}")
+
+    def _disk_evict(self, db: sqlite3.Connection):
+        """Drop expired rows, then the oldest rows over max_disk_rows (INSERT OR REPLACE gives a row a new, higher rowid)"""
+        expired = db.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?", (self.name, time.time())
+        ).rowcount
+        rows = db.execute("SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.name,)).fetchone()[0]
+        over = rows - self.max_disk_rows
+        if over > 0:
+            db.execute(
+                "DELETE FROM cache_entries WHERE rowid IN "
+                "(SELECT rowid FROM cache_entries WHERE namespace = ? ORDER BY rowid LIMIT ?)",
+                (self.name, over)
+            )
+        evicted = expired + max(0, over)
+        if evicted:
+            with self._lock:
+                self.disk_evictions += evicted
+
+    def _remember(self, key: str, payload: str, expires_at: Optional[float]):
+        if self.max_entries <= 0 or len(payload) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (expires_at, payload)
+        self._bytes += len(payload)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def _remove(self, key: str):
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.db_path:
+            try:
+                self._connect().execute("DELETE FROM cache_entries WHERE namespace = ?", (self.name,))
+            except sqlite3.Error as e:
+                print(f"[CACHE] {self.name}: disk clear failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "disk_enabled": bool(self.db_path),
+            "disk_evictions": self.disk_evictions,
+        }
@@ -0,0 +1,447 @@
+import os
+import json
+import uuid
+import hashlib
+import threading
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from services.array_store import METADATA_FILE, locked, saved_version
+
+STORE_VERSION = 2
+# One value per row, appended to raw <name>.<generation>.bin files and memory-mapped up to the committed row count
+ROW_COLUMNS = {
+    "row_ends": np.int64,  # end of the row's slice of skill_ids
+    "experience": np.float32,
+    "field_codes": np.int32,
+    "active": np.bool_,
+    "id_hashes": np.uint64,
+    "record_offsets": np.int64,
+}
+# One value per (row, skill)
+ENTRY_COLUMNS = {"skill_ids": np.int32}
+# Replaced rows are compacted away in the background once there are this many and more than live rows
+MIN_COMPACT_ROWS = 1000
+
+
+class StoreSnapshot(NamedTuple):
+    rows: int
+    generation: int
+    skills: List[str]
+    skill_ids: Dict[str, int]
+    fields: List[str]
+    field_codes: Dict[str, int]
+    columns: Dict[str, np.ndarray]  # ROW_COLUMNS and ENTRY_COLUMNS, plus CSR "offsets" (rows + 1)
+    records: List[Dict]  # in-memory store only; a persistent store reads them from its JSON-lines file
+
+
+def _empty_snapshot() -> StoreSnapshot:
+    columns = {name: np.zeros(0, dtype=dtype) for name, dtype in {**ROW_COLUMNS, **ENTRY_COLUMNS}.items()}
+    columns["offsets"] = np.zeros(1, dtype=np.int64)
+    return StoreSnapshot(0, 0, [], {}, [], {}, columns, [])
+
+
+def _id_hash(candidate_id: str) -> int:
+    return int.from_bytes(hashlib.sha256(candidate_id.encode("utf-8")).digest()[:8], "little")
+
+
+def _with_offsets(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    return dict(columns, offsets=np.concatenate([np.zeros(1, dtype=np.int64), columns["row_ends"]]))
+
+
+class CandidateStore:
+    """Analyzed resumes stored column-wise for vectorized screening.
+
+    Each candidate is a row: its skills are a slice of one int32 skill-id
+    column (CSR offsets), experience and field are numeric columns. Scoring a
+    job against every stored candidate is a handful of NumPy operations over
+    these columns instead of one analyzer run per resume.
+
+    Adds only append: with a path, the columns are appended to raw files and
+    memory-mapped, the candidate records to a JSON-lines file that is read
+    only for returned matches, and the metadata file holds just the counts
+    and the skill/field names. A re-added id marks its old row inactive; once
+    inactive rows dominate, a background compaction rewrites the store
+    without them as a new generation of files.
+
+    Every add takes a file lock and first reads what other processes saved,
+    and searches reload when the saved store changed, so several workers can
+    share one directory.
+    """
+
+    def __init__(self, path: Optional[str] = None, normalize: Callable[[str], str] = str.lower,
+                 nice_to_have_weight: float = 0.5, max_score: float = 95):
+        self.path = path or None
+        self.normalize = normalize
+        self.nice_to_have_weight = nice_to_have_weight
+        self.max_score = max_score
+        self._lock = threading.Lock()
+        self._snapshot = _empty_snapshot()
+        self._positions: Dict[int, int] = {}  # id hash -> row of its current version
+        self._entries = 0
+        self._records_bytes = 0
+        self._version = None  # saved_version() of the metadata this store last read
+        # (skill_ids column, row of each entry), derived on demand
+        self._owners: Tuple[Optional[np.ndarray], Optional[np.ndarray]] = (None, None)
+        self._compacting = False
+        if self.path:
+            self._refresh()
+
+    @classmethod
+    def from_env(cls, normalize: Callable[[str], str] = str.lower) -> "CandidateStore":
+        return cls(os.getenv("CANDIDATE_STORE_PATH"), normalize=normalize)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _file(self, name: str, generation: int) -> str:
+        if name == "records":
+            return os.path.join(self.path, f"candidates.{generation}.jsonl")
+        return os.path.join(self.path, f"{name}.{generation}.bin")
+
+    def _map(self, name: str, dtype, generation: int, count: int) -> np.ndarray:
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self._file(name, generation), dtype=dtype, mode="r", shape=(count,))
+
+    def _map_columns(self, generation: int, rows: int, entries: int) -> Dict[str, np.ndarray]:
+        columns = {name: self._map(name, dtype, generation, rows) for name, dtype in ROW_COLUMNS.items()}
+        columns.update({name: self._map(name, dtype, generation, entries) for name, dtype in ENTRY_COLUMNS.items()})
+        return _with_offsets(columns)
+
+    def _refresh(self):
+        """Pick up candidates that other processes saved since this store last read the directory"""
+        if saved_version(self.path) == self._version:
+            return
+        with self._lock, locked(self.path, shared=True):
+            self._load()
+
+    def _load(self):
+        """Read the saved store; rows of the same generation are indexed incrementally. Callers hold the file lock."""
+        version = saved_version(self.path)
+        if version is None or version == self._version:
+            return
+        self._version = version
+        with open(os.path.join(self.path, METADATA_FILE), encoding="utf-8") as f:
+            metadata = json.load(f)
+        if metadata.get("version") != STORE_VERSION:
+            print(f"[CANDIDATES] Ignoring store at {self.path} (version {metadata.get('version')})")
+            return
+
+        snapshot = self._snapshot
+        generation, rows = metadata["generation"], metadata["rows"]
+        first_load = snapshot.rows == 0
+        if generation != snapshot.generation:
+            # Compacted by another process: rows were renumbered
+            self._positions = {}
+            snapshot = _empty_snapshot()
+        columns = self._map_columns(generation, rows, metadata["entries"])
+        for row, id_hash in enumerate(columns["id_hashes"][snapshot.rows:rows].tolist(), snapshot.rows):
+            if columns["active"][row]:
+                self._positions[id_hash] = row
+        self._entries = metadata["entries"]
+        self._records_bytes = metadata["records_bytes"]
+        skills, fields = metadata["skills"], metadata["fields"]
+        self._snapshot = StoreSnapshot(rows, generation, skills, {skill: i for i, skill in enumerate(skills)},
+                                       fields, {field: i for i, field in enumerate(fields)}, columns, [])
+        if first_load:
+            print(f"[CANDIDATES] Loaded {len(self)} candidates from {self.path}")
+
+    def add(self, profiles: Iterable[Dict]) -> List[str]:
+        """Append analyzed resumes ({id?, name?, skills, experience_years, current_field}); a known id replaces the old row"""
+        with self._lock, (locked(self.path) if self.path else nullcontext()):
+            if self.path:
+                self._load()
+            snapshot = self._snapshot
+            start = snapshot.rows
+            skills, skill_ids = list(snapshot.skills), dict(snapshot.skill_ids)
+            fields, field_codes = list(snapshot.fields), dict(snapshot.field_codes)
+            added: Dict[int, int] = {}
+            replaced: List[int] = []
+            lengths, entries, experience, codes, hashes, records, ids = [], [], [], [], [], [], []
+
+            for row, profile in enumerate(profiles, start):
+                candidate_id = profile.get("id") or uuid.uuid4().hex[:16]
+                id_hash = _id_hash(candidate_id)
+                previous = added.get(id_hash, self._positions.get(id_hash))
+                if previous is not None:
+                    # Re-analyzed resume: the old row stays but is no longer matched
+                    replaced.append(previous)
+                added[id_hash] = row
+
+                keys = dict.fromkeys(self.normalize(skill) for skill in profile.get("skills", []))
+                for key in keys:
+                    if key not in skill_ids:
+                        skill_ids[key] = len(skills)
+                        skills.append(key)
+                    entries.append(skill_ids[key])
+                lengths.append(len(keys))
+
+                field = profile.get("current_field") or ""
+                if field not in field_codes:
+                    field_codes[field] = len(fields)
+                    fields.append(field)
+                codes.append(field_codes[field])
+                experience.append(float(profile.get("experience_years") or 0.0))
+                hashes.append(id_hash)
+
+                records.append({
+                    "id": candidate_id,
+                    "name": profile.get("name"),
+                    "current_field": field,
+                    "experience_years": experience[-1],
+                })
+                ids.append(candidate_id)
+
+            if not records:
+                return ids
+
+            active = np.ones(len(records), dtype=np.bool_)
+            active[[row - start for row in replaced if row >= start]] = False
+            new_columns = {
+                "row_ends": self._entries + np.cumsum(lengths, dtype=np.int64),
+                "experience": np.asarray(experience, dtype=np.float32),
+                "field_codes": np.asarray(codes, dtype=np.int32),
+                "active": active,
+                "id_hashes": np.asarray(hashes, dtype=np.uint64),
+                "skill_ids": np.asarray(entries, dtype=np.int32),
+            }
+            tombstones = [row for row in replaced if row < start]
+            rows = start + len(records)
+
+            if self.path:
+                columns = self._append(snapshot, rows, skills, fields, records, new_columns, tombstones)
+            else:
+                columns = {name: np.concatenate([snapshot.columns[name], new_columns[name]])
+                           for name in new_columns}
+                columns["active"][tombstones] = False
+                columns["record_offsets"] = np.zeros(0, dtype=np.int64)
+                columns = _with_offsets(columns)
+                # Older snapshots only read rows below their own count, so the list can be shared
+                snapshot.records.extend(records)
+
+            # A replaced id has the same hash, so its new row overwrites the old one
+            self._positions.update(added)
+            self._entries += len(entries)
+            self._snapshot = StoreSnapshot(rows, snapshot.generation, skills, skill_ids, fields, field_codes,
+                                           columns, snapshot.records)
+            self._compact_in_background()
+            return ids
+
+    def _append(self, snapshot: StoreSnapshot, rows: int, skills: List[str], fields: List[str], records: List[Dict],
+                new_columns: Dict[str, np.ndarray], tombstones: List[int]) -> Dict[str, np.ndarray]:
+        """Append rows, commit by replacing the metadata file, then mark replaced rows inactive.
+
+        Appended data past the committed sizes (left by an interrupted add) is
+        truncated first. Returns the columns mapped up to the new row count.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        generation = snapshot.generation
+        start = snapshot.rows
+        entries = self._entries + len(new_columns["skill_ids"])
+
+        record_offsets = []
+        with open(self._file("records", generation), "ab") as f:
+            f.truncate(self._records_bytes)
+            offset = self._records_bytes
+            for record in records:
+                line = (json.dumps(record) + "\n").encode("utf-8")
+                record_offsets.append(offset)
+                f.write(line)
+                offset += len(line)
+        new_columns = dict(new_columns, record_offsets=np.asarray(record_offsets, dtype=np.int64))
+
+        for columns, committed in ((ROW_COLUMNS, start), (ENTRY_COLUMNS, self._entries)):
+            for name, dtype in columns.items():
+                with open(self._file(name, generation), "ab") as f:
+                    f.truncate(committed * np.dtype(dtype).itemsize)
+                    f.write(np.ascontiguousarray(new_columns[name], dtype=dtype).tobytes())
+
+        self._write_metadata(generation, rows, entries, offset, skills, fields)
+        self._records_bytes = offset
+        # After the commit: a crash before this leaves the old row active next to its replacement, never neither
+        if tombstones:
+            with open(self._file("active", generation), "r+b") as f:
+                for row in tombstones:
+                    f.seek(row)
+                    f.write(b"\x00")
+        return self._map_columns(generation, rows, entries)
+
+    def _write_metadata(self, generation: int, rows: int, entries: int, records_bytes: int,
+                        skills: List[str], fields: List[str]):
+        path = os.path.join(self.path, METADATA_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "version": STORE_VERSION,
+                "generation": generation,
+                "rows": rows,
+                "entries": entries,
+                "records_bytes": records_bytes,
+                "skills": skills,
+                "fields": fields,
+            }, f)
+        os.replace(path + ".tmp", path)
+        self._version = saved_version(self.path)
+
+    def _compact_in_background(self):
+        """Start a compaction once replaced rows outnumber live ones (called with the lock held)"""
+        dead = self._snapshot.rows - len(self._positions)
+        if self._compacting or dead < max(MIN_COMPACT_ROWS, len(self._positions)):
+            return
+        self._compacting = True
+        threading.Thread(target=self.compact, name="candidate-compaction", daemon=True).start()
+
+    def compact(self):
+        """Rewrite the store without inactive rows as the next generation of files"""
+        try:
+            with self._lock, (locked(self.path) if self.path else nullcontext()):
+                if self.path:
+                    self._load()
+                self._compact()
+        except (OSError, ValueError) as e:
+            print(f"[CANDIDATES] Compaction failed: {str(e)}")
+        finally:
+            self._compacting = False
+
+    def _compact(self):
+        snapshot = self._snapshot
+        columns = snapshot.columns
+        keep = np.flatnonzero(columns["active"])
+        if len(keep) == snapshot.rows:
+            return
+        lengths = np.diff(columns["offsets"])[keep]
+        entry_rows = self._owner_rows(columns)
+        new_columns = {
+            "row_ends": np.cumsum(lengths, dtype=np.int64),
+            "experience": np.asarray(columns["experience"][keep]),
+            "field_codes": np.asarray(columns["field_codes"][keep]),
+            "active": np.ones(len(keep), dtype=np.bool_),
+            "id_hashes": np.asarray(columns["id_hashes"][keep]),
+            "skill_ids": np.asarray(columns["skill_ids"][np.asarray(columns["active"])[entry_rows]]),
+        }
+        rows, entries = len(keep), int(lengths.sum())
+        generation = snapshot.generation + 1
+
+        if self.path:
+            # Records are copied line by line, without parsing them
+            record_offsets = []
+            offsets = columns["record_offsets"]
+            with open(self._file("records", snapshot.generation), "rb") as source, \
+                    open(self._file("records", generation), "wb") as target:
+                for row in keep.tolist():
+                    source.seek(int(offsets[row]))
+                    record_offsets.append(target.tell())
+                    target.write(source.readline())
+                records_bytes = target.tell()
+            new_columns["record_offsets"] = np.asarray(record_offsets, dtype=np.int64)
+            for name, dtype in {**ROW_COLUMNS, **ENTRY_COLUMNS}.items():
+                with open(self._file(name, generation), "wb") as f:
+                    f.write(np.ascontiguousarray(new_columns[name], dtype=dtype).tobytes())
+            self._write_metadata(generation, rows, entries, records_bytes, snapshot.skills, snapshot.fields)
+            for name in ["records", *ROW_COLUMNS, *ENTRY_COLUMNS]:
+                try:
+                    os.remove(self._file(name, snapshot.generation))
+                except FileNotFoundError:
+                    pass
+            self._records_bytes = records_bytes
+            new_columns = self._map_columns(generation, rows, entries)
+            records = []
+        else:
+            new_columns["record_offsets"] = np.zeros(0, dtype=np.int64)
+            new_columns = _with_offsets(new_columns)
+            records = [snapshot.records[row] for row in keep.tolist()]
+
+        self._entries = entries
+        self._positions = {id_hash: row for row, id_hash in enumerate(new_columns["id_hashes"].tolist())}
+        self._snapshot = snapshot._replace(rows=rows, generation=generation, columns=new_columns, records=records)
+        print(f"[CANDIDATES] Compacted {snapshot.rows} rows to {rows}")
+
+    def _owner_rows(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        skill_ids, owners = self._owners
+        if skill_ids is not columns["skill_ids"]:
+            owners = np.repeat(np.arange(len(columns["offsets"]) - 1, dtype=np.int32), np.diff(columns["offsets"]))
+            self._owners = (columns["skill_ids"], owners)
+        return owners
+
+    def _records(self, snapshot: StoreSnapshot, rows: List[int]) -> List[Dict]:
+        if not self.path:
+            return [snapshot.records[row] for row in rows]
+        offsets = snapshot.columns["record_offsets"]
+        records = []
+        with open(self._file("records", snapshot.generation), "rb") as f:
+            for row in rows:
+                f.seek(int(offsets[row]))
+                records.append(json.loads(f.readline()))
+        return records
+
+    def search(self, skills: List[str], preferred_skills: Iterable[str] = (), min_experience: Optional[float] = None,
+               field: Optional[str] = None, top_k: int = 10) -> List[Dict]:
+        """Top-K candidates for a job: weighted share of its skills they have, scaled down for missing experience"""
+        if self.path:
+            self._refresh()
+        snapshot = self._snapshot
+        columns = snapshot.columns
+        rows = snapshot.rows
+        if not skills or rows == 0 or top_k <= 0:
+            return []
+
+        preferred = set(preferred_skills)
+        weights = np.zeros(len(snapshot.skills), dtype=np.float32)
+        seen = set()
+        total_weight = 0.0
+        for skill in skills:
+            key = self.normalize(skill)
+            if key in seen:
+                continue
+            seen.add(key)
+            weight = self.nice_to_have_weight if skill in preferred else 1.0
+            total_weight += weight
+            if key in snapshot.skill_ids:
+                weights[snapshot.skill_ids[key]] = weight
+
+        # Sum each candidate's requirement weights over their slice of the skill column
+        skill_ids = columns["skill_ids"]
+        scores = np.bincount(self._owner_rows(columns), weights=weights[skill_ids], minlength=rows)
+        scores *= 100.0 / total_weight
+
+        if min_experience:
+            # Half credit at zero experience, full credit once the requirement is met
+            scores *= 0.5 + 0.5 * np.minimum(columns["experience"] / min_experience, 1.0)
+
+        eligible = np.asarray(columns["active"]) & (scores > 0)
+        if field is not None:
+            code = snapshot.field_codes.get(field)
+            eligible &= columns["field_codes"] == (code if code is not None else -1)
+
+        candidates = np.flatnonzero(eligible)
+        if len(candidates) == 0:
+            return []
+        k = min(top_k, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.lexsort((top, -scores[top]))]
+
+        offsets = columns["offsets"]
+        results = []
+        for row, record in zip(top, self._records(snapshot, top.tolist())):
+            candidate_skills = {snapshot.skills[i] for i in skill_ids[offsets[row]:offsets[row + 1]]}
+            results.append({
+                **record,
+                "match_percentage": round(min(float(scores[row]), self.max_score), 1),
+                "matched_skills": [s for s in skills if self.normalize(s) in candidate_skills],
+                "missing_skills": [s for s in skills if self.normalize(s) not in candidate_skills][:5],
+            })
+        return results
+
+    def stats(self) -> Dict:
+        if self.path:
+            self._refresh()
+        snapshot = self._snapshot
+        return {
+            "candidates": len(self),
+            "rows": snapshot.rows,
+            "skills": len(snapshot.skills),
+            "fields": len(snapshot.fields),
+            "persistent": bool(self.path),
+        }
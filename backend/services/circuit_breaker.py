@@ -0,0 +1,157 @@
+import os
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit is open, not calling it for another {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Stops calling a failing or slow dependency for a while, so requests fail fast instead of waiting.
+
+    Closed: calls go through and the last `window` outcomes are kept. A call
+    that raised or took longer than `slow_call_seconds` counts as bad. Once at
+    least `min_calls` are recorded and the bad share reaches `failure_ratio`,
+    the circuit opens. Open: before_call() raises CircuitOpenError for
+    `cooldown` seconds. Half-open: one probe call is let through. A good probe
+    closes the circuit, a bad one opens it for another cooldown.
+    """
+
+    def __init__(self, name: str, failure_ratio: float = 0.5, slow_call_seconds: float = 20.0,
+                 window: int = 20, min_calls: int = 5, cooldown: float = 30.0, enabled: bool = True):
+        self.name = name
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = max(1, min_calls)
+        self.cooldown = cooldown
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=max(window, self.min_calls))  # True = bad
+        self._opened_at = 0.0
+        self._probe_started = None
+
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    @classmethod
+    def from_env(cls, name: str, prefix: str, slow_call_seconds: float = 20.0) -> "CircuitBreaker":
+        return cls(
+            name,
+            failure_ratio=float(os.getenv(f"{prefix}_FAILURE_RATIO", 0.5)),
+            slow_call_seconds=float(os.getenv(f"{prefix}_SLOW_CALL_SECONDS", slow_call_seconds)),
+            window=int(os.getenv(f"{prefix}_WINDOW", 20)),
+            min_calls=int(os.getenv(f"{prefix}_MIN_CALLS", 5)),
+            cooldown=float(os.getenv(f"{prefix}_COOLDOWN", 30)),
+            enabled=os.getenv(f"{prefix}_ENABLED", "true").lower() not in ("0", "false", "no", "off"),
+        )
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def _open(self, reason: str):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_started = None
+        self._outcomes.clear()
+        self.times_opened += 1
+        print(f"[CIRCUIT] {self.name} opened ({reason}); failing fast for {self.cooldown:.0f}s")
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self._state == OPEN:
+                remaining = self._opened_at + self.cooldown - now
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self._state = HALF_OPEN
+                print(f"[CIRCUIT] {self.name} half-open, letting a probe call through")
+            if self._state == HALF_OPEN:
+                # A probe that never reported back (e.g. a cancelled request) is given up after one cooldown
+                if self._probe_started is not None and now - self._probe_started < self.cooldown:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, self._probe_started + self.cooldown - now)
+                self._probe_started = now
+
+    def raise_if_open(self):
+        """Raise CircuitOpenError while the circuit is open and cooling down, without reserving a call"""
+        if not self.enabled or self._state != OPEN:
+            return
+        with self._lock:
+            remaining = self._opened_at + self.cooldown - time.monotonic()
+            if self._state == OPEN and remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, remaining)
+
+    def record(self, seconds: float, ok: bool):
+        """Report the outcome of a call let through by before_call()"""
+        if not self.enabled:
+            return
+        slow = seconds > self.slow_call_seconds
+        bad = not ok or slow
+        with self._lock:
+            self.calls += 1
+            self.failures += not ok
+            self.slow_calls += slow
+            if self._state == HALF_OPEN:
+                if bad:
+                    self._open("probe " + ("failed" if not ok else f"took {seconds:.1f}s"))
+                else:
+                    self._state = CLOSED
+                    self._probe_started = None
+                    print(f"[CIRCUIT] {self.name} closed, probe succeeded")
+                return
+            if self._state == OPEN:
+                # Finished after the circuit had already opened
+                return
+            self._outcomes.append(bad)
+            bad_calls = sum(self._outcomes)
+            if len(self._outcomes) >= self.min_calls and bad_calls / len(self._outcomes) >= self.failure_ratio:
+                self._open(f"{bad_calls} of the last {len(self._outcomes)} calls failed or were slow")
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        self.before_call()
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record(time.perf_counter() - started, ok=False)
+            raise
+        self.record(time.perf_counter() - started, ok=True)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            outcomes = list(self._outcomes)
+            retry_after = max(0.0, self._opened_at + self.cooldown - time.monotonic()) if self._state == OPEN else 0.0
+        return {
+            "state": self._state if self.enabled else "disabled",
+            "retry_after": round(retry_after, 1),
+            "recent_bad_ratio": round(sum(outcomes) / len(outcomes), 3) if outcomes else 0.0,
+            "calls": self.calls,
+            "failures": self.failures,
+            "slow_calls": self.slow_calls,
+            "rejected": self.rejected,
+            "times_opened": self.times_opened,
+        }
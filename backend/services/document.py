@@ -0,0 +1,161 @@
+import re
+from functools import cached_property
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from services.skill_matcher import SkillMatch
+from services.taxonomy import Taxonomy
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#./'-]*")
+QUANTIFIED_PATTERN = re.compile(r'\d+%|\d+\+|increased|decreased|improved|reduced')
+EXPERIENCE_PATTERNS = [
+    re.compile(r'(\d+)\+?\s*years?\s*(?:of)?\s*experience'),
+    re.compile(r'experience[:\s]+(\d+)\+?\s*years?'),
+]
+
+# Canonical section name -> headings that introduce it
+SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "profile", "about me", "objective", "career objective"],
+    "experience": ["experience", "work experience", "professional experience", "work history", "employment history", "employment"],
+    "education": ["education", "academic background", "qualifications"],
+    "skills": ["skills", "technical skills", "core competencies", "competencies", "key skills", "tools", "technologies"],
+    "certifications": ["certifications", "certificates", "licenses", "licenses & certifications"],
+    "projects": ["projects", "selected projects", "personal projects"],
+    "languages": ["languages"],
+    "awards": ["awards", "honors", "achievements"],
+    "publications": ["publications"],
+    "volunteering": ["volunteering", "volunteer experience"],
+    "interests": ["interests", "hobbies"],
+}
+_HEADING_LOOKUP = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# Job description wording that marks a requirement as optional
+PREFERRED_PATTERN = re.compile(r'nice[\s-]to[\s-]have|preferred|bonus|\ba plus\b|\bpluses\b')
+REQUIRED_PATTERN = re.compile(r'required|requirements|must[\s-]have|qualifications|responsibilities')
+
+
+class Section(NamedTuple):
+    name: str
+    start: int
+    end: int
+
+
+class TextDocument:
+    """A resume or job description analyzed once per request.
+
+    Holds the lowercased text, token stream, section boundaries and taxonomy
+    hits so every heuristic stage reads shared results instead of lowercasing
+    and rescanning the full text itself. Each view is computed on first access.
+    """
+
+    def __init__(self, text: str, taxonomy: Taxonomy):
+        self.text = text
+        self.taxonomy = taxonomy
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        return TOKEN_PATTERN.findall(self.lower)
+
+    @cached_property
+    def lines(self) -> List[str]:
+        return self.text.split('\n')
+
+    @cached_property
+    def sections(self) -> List[Section]:
+        """Sections delimited by recognized heading lines, in document order"""
+        sections = []
+        offset = 0
+        current_name, current_start = "header", 0
+        for line in self.lines:
+            heading = _HEADING_LOOKUP.get(line.strip().strip(":").strip().lower())
+            if heading:
+                if offset > current_start:
+                    sections.append(Section(current_name, current_start, offset))
+                current_name, current_start = heading, offset
+            offset += len(line) + 1
+        if len(self.text) > current_start:
+            sections.append(Section(current_name, current_start, len(self.text)))
+        return sections
+
+    def section_text(self, section: Section) -> str:
+        return self.text[section.start:section.end]
+
+    @cached_property
+    def skill_matches(self) -> List[SkillMatch]:
+        return self.taxonomy.skill_matcher.find_all(self.text)
+
+    @cached_property
+    def skills(self) -> List[str]:
+        """Distinct taxonomy skills in taxonomy order"""
+        return self.taxonomy.skill_matcher.in_taxonomy_order(self.skill_set)
+
+    @cached_property
+    def skill_set(self) -> Set[str]:
+        return {match.skill for match in self.skill_matches}
+
+    @cached_property
+    def preferred_skill_set(self) -> Set[str]:
+        """Skills only mentioned as nice-to-have/preferred (used when this is a job description)
+
+        A marker on a line with skills applies to that line ("Docker is a plus");
+        a marker on a heading line applies until the next required-skills heading.
+        """
+        preferred, required = set(), set()
+        matches = iter(self.skill_matches)
+        match = next(matches, None)
+        in_preferred_block = False
+        offset = 0
+        for line in self.lines:
+            end = offset + len(line)
+            line_skills = set()
+            while match is not None and match.start < end:
+                line_skills.add(match.skill)
+                match = next(matches, None)
+
+            line_lower = self.lower[offset:end]
+            is_preferred_line = bool(PREFERRED_PATTERN.search(line_lower))
+            if not line_skills:
+                if is_preferred_line:
+                    in_preferred_block = True
+                elif REQUIRED_PATTERN.search(line_lower):
+                    in_preferred_block = False
+            (preferred if in_preferred_block or is_preferred_line else required).update(line_skills)
+            offset = end + 1
+        # A skill that is also required anywhere stays required
+        return preferred - required
+
+    @cached_property
+    def field_keywords(self) -> Set[str]:
+        return {match.skill for match in self.taxonomy.field_keyword_matcher.find_all(self.text)}
+
+    @cached_property
+    def experience_years(self) -> Optional[float]:
+        for pattern in EXPERIENCE_PATTERNS:
+            match = pattern.search(self.lower)
+            if match:
+                return float(match.group(1))
+        return None
+
+    @cached_property
+    def has_email(self) -> bool:
+        return '@' in self.text
+
+    @cached_property
+    def has_phone(self) -> bool:
+        return any(char.isdigit() for char in self.text[:200])
+
+    @cached_property
+    def has_quantified_achievements(self) -> bool:
+        return bool(QUANTIFIED_PATTERN.search(self.lower))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "characters": len(self.text),
+            "words": len(self.tokens),
+            "lines": len(self.lines),
+            "sections": len(self.sections),
+            "skills_found": len(self.skill_set),
+        }
@@ -0,0 +1,113 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from services.startup import is_serverless
+
+
+class QueueFullError(Exception):
+    """Raised when a worker stage already holds its maximum number of tasks"""
+
+    def __init__(self, stage: str, limit: int):
+        super().__init__(f"The {stage} stage is at capacity ({limit} queued tasks). Please retry shortly.")
+        self.stage = stage
+        self.limit = limit
+
+
+class WorkerStage:
+    """A bounded execution stage backed by a thread or process pool.
+
+    The executor is created lazily on first use so importing the app (or
+    forking workers from a preloaded parent) never spawns threads/processes.
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(self.max_workers, max_queue)
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                try:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                except (OSError, NotImplementedError, ImportError) as e:
+                    # Some sandboxes (e.g. serverless runtimes) cannot fork; degrade to threads
+                    print(f"[WORKERS] Process pool unavailable for {self.name} ({str(e)}), using threads")
+                    self.kind = "thread"
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        return self._executor
+
+    async def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        # pending is only touched from the event loop thread, so no lock is needed
+        if self.pending >= self.max_queue:
+            raise QueueFullError(self.name, self.max_queue)
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(func, *args, **kwargs)
+            try:
+                return await loop.run_in_executor(self._get_executor(), call)
+            except BrokenProcessPool:
+                # A worker died (e.g. native OCR crash); replace the pool so later requests recover
+                print(f"[WORKERS] {self.name} pool broke, recreating it")
+                self._reset()
+                raise Exception("PDF processing worker crashed while handling this file")
+        finally:
+            self.pending -= 1
+
+    def _reset(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+class WorkerPools:
+    """Parser (CPU-bound: pypdf/OCR) and analyzer (blocking network I/O) stages"""
+
+    def __init__(self, parser_workers: int, parser_queue: int, parser_kind: str,
+                 analyzer_workers: int, analyzer_queue: int):
+        self.parser = WorkerStage("parser", parser_kind, parser_workers, parser_queue)
+        self.analyzer = WorkerStage("analyzer", "thread", analyzer_workers, analyzer_queue)
+
+    @classmethod
+    def from_env(cls) -> "WorkerPools":
+        cpu_count = os.cpu_count() or 1
+        parser_workers = int(os.getenv("PARSER_WORKERS", cpu_count))
+        analyzer_workers = int(os.getenv("ANALYZER_WORKERS", min(32, cpu_count * 4)))
+        return cls(
+            parser_workers=parser_workers,
+            parser_queue=int(os.getenv("PARSER_QUEUE_DEPTH", parser_workers * 4)),
+            # Spawning worker processes costs more than a short-lived serverless instance gains
+            parser_kind=os.getenv("PARSER_POOL", "thread" if is_serverless() else "process"),
+            analyzer_workers=analyzer_workers,
+            analyzer_queue=int(os.getenv("ANALYZER_QUEUE_DEPTH", analyzer_workers * 4)),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {"parser": self.parser.stats(), "analyzer": self.analyzer.stats()}
+
+    def shutdown(self):
+        self.parser.shutdown()
+        self.analyzer.shutdown()
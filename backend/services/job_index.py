@@ -0,0 +1,378 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from services.array_store import METADATA_FILE, load_arrays, locked, save_arrays, saved_version
+
+INDEX_VERSION = 2
+RECORDS_FILE = "jobs.jsonl"
+SEGMENTS_DIR = "segments"
+# Per-job columns, appended to raw <name>.bin files and memory-mapped up to the committed job count
+COLUMNS = {"job_weights": np.float32, "record_offsets": np.int64, "id_hashes": np.uint64, "active": np.bool_}
+SEGMENT_ARRAYS = ["offsets", "postings", "weights"]
+
+
+class Segment(NamedTuple):
+    """Inverted index over a range of jobs: one CSR posting list per skill id"""
+    name: str
+    offsets: np.ndarray   # int64[skills known when built + 1], row pointers into postings
+    postings: np.ndarray  # int32 job positions, grouped by skill id
+    weights: np.ndarray   # float32 weight of each posting (must-have 1.0, nice-to-have lower)
+
+
+class IndexSnapshot(NamedTuple):
+    count: int
+    vocabulary: Dict[str, int]
+    segments: Tuple[Segment, ...]
+    columns: Dict[str, np.ndarray]
+    records: List[Dict]  # in-memory index only; a persistent index reads them from jobs.jsonl
+
+
+def _empty_snapshot() -> IndexSnapshot:
+    columns = {name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+    return IndexSnapshot(0, {}, (), columns, [])
+
+
+def _id_hash(job_id: str) -> int:
+    return int.from_bytes(hashlib.sha256(job_id.encode("utf-8")).digest()[:8], "little")
+
+
+def _build_segment(name: str, skill_ids: np.ndarray, postings: np.ndarray, weights: np.ndarray,
+                   skills: int) -> Segment:
+    # Stable sort keeps each posting list in ascending job order
+    order = np.argsort(skill_ids, kind="stable")
+    offsets = np.zeros(skills + 1, dtype=np.int64)
+    np.cumsum(np.bincount(skill_ids, minlength=skills), out=offsets[1:])
+    return Segment(name, offsets, postings[order].astype(np.int32), weights[order].astype(np.float32))
+
+
+def _segment_skill_ids(segment: Segment) -> np.ndarray:
+    return np.repeat(np.arange(len(segment.offsets) - 1, dtype=np.int32), np.diff(segment.offsets))
+
+
+class JobIndex:
+    """Job postings with precomputed skills and an inverted skill -> job index.
+
+    The index is a list of CSR segments (one posting list per skill), so
+    matching a resume only touches the posting lists of its own skills instead
+    of every stored job. Each ingest adds a segment for its own jobs, and
+    segments of similar size are merged, so ingest cost stays proportional to
+    the batch (amortized) instead of to the whole index. A replaced posting is
+    marked inactive rather than removed.
+
+    With a path, segments are saved as .npy files, the per-job columns as
+    appended raw files and the postings as an appended JSON-lines file; all
+    arrays are memory-mapped and a posting's metadata is only read when it is
+    returned. Ingests take a file lock and first read what other processes
+    saved, and searches reload when the saved index changed, so several
+    workers can share one directory.
+    """
+
+    def __init__(self, path: Optional[str] = None, normalize: Callable[[str], str] = str.lower,
+                 nice_to_have_weight: float = 0.5, max_score: float = 95):
+        self.path = path or None
+        self.normalize = normalize
+        self.nice_to_have_weight = nice_to_have_weight
+        self.max_score = max_score
+        self._lock = threading.Lock()
+        self._snapshot = _empty_snapshot()
+        self._positions: Dict[int, int] = {}  # id hash -> position of its current posting
+        self._records_bytes = 0
+        self._next_segment = 0
+        self._version = None  # saved_version() of the metadata this index last read
+        if self.path:
+            self._refresh()
+
+    @classmethod
+    def from_env(cls, normalize: Callable[[str], str] = str.lower) -> "JobIndex":
+        return cls(os.getenv("JOB_INDEX_PATH"), normalize=normalize)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._snapshot.columns["active"]))
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _map_column(self, name: str, count: int) -> np.ndarray:
+        if count == 0:
+            return np.zeros(0, dtype=COLUMNS[name])
+        return np.memmap(self._file(f"{name}.bin"), dtype=COLUMNS[name], mode="r", shape=(count,))
+
+    def _refresh(self):
+        """Pick up postings that other processes saved since this index last read the directory"""
+        if saved_version(self.path) == self._version:
+            return
+        with self._lock, locked(self.path, shared=True):
+            self._load()
+
+    def _load(self):
+        """Read the saved index, keeping segments already loaded and indexing only ids added since.
+
+        Callers hold the file lock, so segments are not merged away while they are read.
+        """
+        version = saved_version(self.path)
+        if version is None or version == self._version:
+            return
+        self._version = version
+        with open(self._file(METADATA_FILE), encoding="utf-8") as f:
+            metadata = json.load(f)
+        if metadata.get("version") != INDEX_VERSION:
+            print(f"[JOB INDEX] Ignoring index at {self.path} (version {metadata.get('version')})")
+            return
+
+        snapshot = self._snapshot
+        loaded = {segment.name: segment for segment in snapshot.segments}
+        segments = []
+        for name in metadata["segments"]:
+            segment = loaded.get(name)
+            if segment is None:
+                arrays, _ = load_arrays(os.path.join(self.path, SEGMENTS_DIR, name))
+                segment = Segment(name, arrays["offsets"], arrays["postings"], arrays["weights"])
+            segments.append(segment)
+
+        count = metadata["jobs"]
+        columns = {name: self._map_column(name, count) for name in COLUMNS}
+        for position, id_hash in enumerate(columns["id_hashes"][snapshot.count:count].tolist(), snapshot.count):
+            self._positions[id_hash] = position
+        self._records_bytes = metadata["records_bytes"]
+        self._next_segment = metadata["next_segment"]
+        vocabulary = {skill: i for i, skill in enumerate(metadata["skills"])}
+        self._snapshot = IndexSnapshot(count, vocabulary, tuple(segments), columns, [])
+        if snapshot.count == 0:
+            print(f"[JOB INDEX] Loaded {len(self)} jobs from {self.path}")
+
+    def add_jobs(self, jobs: Iterable[Dict]) -> List[str]:
+        """Insert or replace postings ({id, title, role, skills, preferred_skills, ...})"""
+        with self._lock, (locked(self.path) if self.path else nullcontext()):
+            if self.path:
+                self._load()
+            snapshot = self._snapshot
+            vocabulary = dict(snapshot.vocabulary)
+            start = snapshot.count
+            added: Dict[int, int] = {}
+            replaced: List[int] = []
+            records, hashes, job_weights, ids = [], [], [], []
+            skill_ids, postings, weights = [], [], []
+
+            for job in jobs:
+                job = dict(job)
+                job["id"] = job.get("id") or hashlib.sha256(job.get("description", "").encode("utf-8")).hexdigest()[:16]
+                job.pop("description", None)
+                id_hash = _id_hash(job["id"])
+                previous = added.get(id_hash, self._positions.get(id_hash))
+                if previous is not None:
+                    replaced.append(previous)
+                position = start + len(records)
+                added[id_hash] = position
+
+                preferred = set(job.get("preferred_skills", ()))
+                seen = set()
+                total_weight = 0.0
+                for skill in job["skills"]:
+                    key = self.normalize(skill)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    weight = self.nice_to_have_weight if skill in preferred else 1.0
+                    skill_ids.append(vocabulary.setdefault(key, len(vocabulary)))
+                    postings.append(position)
+                    weights.append(weight)
+                    total_weight += weight
+
+                records.append(job)
+                hashes.append(id_hash)
+                job_weights.append(total_weight)
+                ids.append(job["id"])
+
+            if not records:
+                return ids
+
+            active = np.concatenate([snapshot.columns["active"], np.ones(len(records), dtype=np.bool_)])
+            active[replaced] = False
+            segment = _build_segment(self._segment_name(), np.asarray(skill_ids, dtype=np.int32),
+                                     np.asarray(postings, dtype=np.int32), np.asarray(weights, dtype=np.float32),
+                                     len(vocabulary))
+            segments, dropped = self._merge_segments(list(snapshot.segments) + [segment], active, len(vocabulary))
+            new_columns = {
+                "job_weights": np.asarray(job_weights, dtype=np.float32),
+                "id_hashes": np.asarray(hashes, dtype=np.uint64),
+                "active": active[start:],
+            }
+
+            if self.path:
+                columns = self._save(snapshot, vocabulary, records, new_columns, segments, dropped,
+                                     [p for p in replaced if p < start])
+            else:
+                columns = {
+                    "job_weights": np.concatenate([snapshot.columns["job_weights"], new_columns["job_weights"]]),
+                    "record_offsets": np.zeros(0, dtype=np.int64),
+                    "id_hashes": np.concatenate([snapshot.columns["id_hashes"], new_columns["id_hashes"]]),
+                    "active": active,
+                }
+                # Older snapshots only index positions below their own count, so the list can be shared
+                snapshot.records.extend(records)
+
+            self._positions.update(added)
+            self._snapshot = IndexSnapshot(start + len(records), vocabulary, tuple(segments), columns, snapshot.records)
+            return ids
+
+    def _segment_name(self) -> str:
+        self._next_segment += 1
+        return f"{self._next_segment:08d}"
+
+    def _merge_segments(self, segments: List[Segment], active: np.ndarray,
+                        skills: int) -> Tuple[List[Segment], List[str]]:
+        """Merge the newest segments while the older one is at most twice the size; drops inactive postings"""
+        dropped = []
+        while len(segments) > 1 and len(segments[-2].postings) <= 2 * len(segments[-1].postings):
+            older, newer = segments[-2], segments[-1]
+            skill_ids = np.concatenate([_segment_skill_ids(older), _segment_skill_ids(newer)])
+            postings = np.concatenate([older.postings, newer.postings])
+            weights = np.concatenate([older.weights, newer.weights])
+            keep = active[postings]
+            merged = _build_segment(self._segment_name(), skill_ids[keep], postings[keep], weights[keep], skills)
+            dropped.extend(segment.name for segment in (older, newer))
+            segments[-2:] = [merged]
+        return segments, dropped
+
+    def _save(self, snapshot: IndexSnapshot, vocabulary: Dict[str, int], records: List[Dict],
+              new_columns: Dict[str, np.ndarray], segments: List[Segment], dropped: List[str],
+              tombstones: List[int]) -> Dict[str, np.ndarray]:
+        """Append the new jobs, write new segments, then commit by replacing the metadata file.
+
+        Appended data past the committed sizes (left by an interrupted save) is
+        truncated first. Returns the per-job columns mapped up to the new count.
+        """
+        os.makedirs(os.path.join(self.path, SEGMENTS_DIR), exist_ok=True)
+        start = snapshot.count
+        count = start + len(records)
+
+        record_offsets = []
+        with open(self._file(RECORDS_FILE), "ab") as f:
+            f.truncate(self._records_bytes)
+            offset = self._records_bytes
+            for record in records:
+                line = (json.dumps(record) + "\n").encode("utf-8")
+                record_offsets.append(offset)
+                f.write(line)
+                offset += len(line)
+        new_columns = dict(new_columns, record_offsets=np.asarray(record_offsets, dtype=np.int64))
+
+        for name, dtype in COLUMNS.items():
+            with open(self._file(f"{name}.bin"), "ab") as f:
+                f.truncate(start * np.dtype(dtype).itemsize)
+                f.write(np.ascontiguousarray(new_columns[name], dtype=dtype).tobytes())
+
+        saved = {segment.name for segment in snapshot.segments}
+        for segment in segments:
+            if segment.name not in saved:
+                save_arrays(os.path.join(self.path, SEGMENTS_DIR, segment.name),
+                            {"offsets": segment.offsets, "postings": segment.postings, "weights": segment.weights},
+                            {"arrays": SEGMENT_ARRAYS})
+
+        metadata_path = self._file(METADATA_FILE)
+        with open(metadata_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "jobs": count,
+                "records_bytes": offset,
+                "next_segment": self._next_segment,
+                "segments": [segment.name for segment in segments],
+                "skills": list(vocabulary),
+            }, f)
+        os.replace(metadata_path + ".tmp", metadata_path)
+        self._records_bytes = offset
+        self._version = saved_version(self.path)
+
+        # After the commit: a crash before this leaves the old posting active next to its replacement, never neither
+        if tombstones:
+            with open(self._file("active.bin"), "r+b") as f:
+                for position in tombstones:
+                    f.seek(position)
+                    f.write(b"\x00")
+        for name in dropped:
+            shutil.rmtree(os.path.join(self.path, SEGMENTS_DIR, name), ignore_errors=True)
+
+        return {name: self._map_column(name, count) for name in COLUMNS}
+
+    def _records(self, snapshot: IndexSnapshot, positions: List[int]) -> List[Dict]:
+        if not self.path:
+            return [snapshot.records[position] for position in positions]
+        offsets = snapshot.columns["record_offsets"]
+        records = []
+        with open(self._file(RECORDS_FILE), "rb") as f:
+            for position in positions:
+                f.seek(int(offsets[position]))
+                records.append(json.loads(f.readline()))
+        return records
+
+    def search(self, skills: Iterable[str], top_k: int = 10) -> List[Dict]:
+        """Top-K postings by weighted share of their required skills that the resume covers"""
+        if self.path:
+            self._refresh()
+        snapshot = self._snapshot
+        keys = {self.normalize(skill) for skill in skills}
+        skill_ids = sorted(snapshot.vocabulary[key] for key in keys if key in snapshot.vocabulary)
+        if not skill_ids or top_k <= 0:
+            return []
+
+        hits, hit_weights = [], []
+        for segment in snapshot.segments:
+            offsets = segment.offsets
+            for i in skill_ids:
+                # Skills first seen after the segment was built have no postings in it
+                if i + 1 < len(offsets) and offsets[i] < offsets[i + 1]:
+                    hits.append(segment.postings[offsets[i]:offsets[i + 1]])
+                    hit_weights.append(segment.weights[offsets[i]:offsets[i + 1]])
+        if not hits:
+            return []
+        hits = np.concatenate(hits)
+        hit_weights = np.concatenate(hit_weights)
+        current = snapshot.columns["active"][hits]
+        hits, hit_weights = hits[current], hit_weights[current]
+        if len(hits) == 0:
+            return []
+
+        # Only jobs sharing at least one skill are scored
+        candidates, inverse = np.unique(hits, return_inverse=True)
+        scores = np.bincount(inverse, weights=hit_weights) / snapshot.columns["job_weights"][candidates] * 100
+
+        k = min(top_k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        # Best score first, ties in ingestion order
+        top = top[np.lexsort((candidates[top], -scores[top]))]
+
+        jobs = self._records(snapshot, [int(candidates[i]) for i in top])
+        results = []
+        for i, job in zip(top, jobs):
+            matched = [skill for skill in job["skills"] if self.normalize(skill) in keys]
+            missing = [skill for skill in job["skills"] if self.normalize(skill) not in keys]
+            results.append({
+                "id": job["id"],
+                "title": job.get("title"),
+                "role": job.get("role"),
+                "company": job.get("company"),
+                "url": job.get("url"),
+                "match_percentage": round(min(float(scores[i]), self.max_score), 1),
+                "matched_skills": matched,
+                "missing_skills": missing[:5],
+            })
+        return results
+
+    def stats(self) -> Dict:
+        if self.path:
+            self._refresh()
+        snapshot = self._snapshot
+        return {
+            "jobs": len(self),
+            "skills": len(snapshot.vocabulary),
+            "postings": int(sum(len(segment.postings) for segment in snapshot.segments)),
+            "segments": len(snapshot.segments),
+            "persistent": bool(self.path),
+        }
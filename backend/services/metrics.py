@@ -0,0 +1,355 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds, from cache hits (ms) to slow OCR and LLM calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000, 50_000_000)
+TOKEN_BUCKETS = (50, 100, 250, 500, 750, 1000, 1500, 2000, 4000, 8000)
+
+LabelValues = Tuple[str, ...]
+
+# Snapshot of the workers that have exited, kept so counters do not go back when a worker is recycled
+RETIRED_FILE = "retired.json"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str, labels: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    @property
+    def cumulative(self) -> bool:
+        """Counters and histograms only grow, so an exited worker's values still belong in the totals"""
+        return self.kind in ("counter", "histogram")
+
+    def values(self) -> Optional[Dict[LabelValues, Any]]:
+        raise NotImplementedError
+
+    def merge(self, total: Dict[LabelValues, Any], values: Dict[LabelValues, Any]):
+        """Add another process's values (as returned by values()) to total"""
+        for key, value in values.items():
+            total[key] = total.get(key, 0) + value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self, values: Dict[LabelValues, float]) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(registry, name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket..., count in +Inf], sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def time(self, **labels: str):
+        """Context manager observing the duration of the block in seconds"""
+        if not self.registry.enabled:
+            return nullcontext()
+        return self._time(labels)
+
+    @contextmanager
+    def _time(self, labels: Dict[str, str]) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def values(self) -> Dict[LabelValues, Tuple[List[int], float]]:
+        with self._lock:
+            return {key: (list(counts), total[0]) for key, (counts, total) in self._values.items()}
+
+    def merge(self, total: Dict[LabelValues, Any], values: Dict[LabelValues, Any]):
+        for key, (counts, value_sum) in values.items():
+            if key in total:
+                total_counts, total_sum = total[key]
+                total[key] = ([a + b for a, b in zip(total_counts, counts)], total_sum + value_sum)
+            else:
+                total[key] = (list(counts), value_sum)
+
+    def render(self, values: Dict[LabelValues, Tuple[List[int], float]]) -> List[str]:
+        lines = self.header()
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Read at scrape time from a callback returning {label values: value}, e.g. existing stats() counters"""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str, labels: Sequence[str],
+                 collect: Callable[[], Dict[LabelValues, float]], kind: str = "gauge"):
+        super().__init__(registry, name, help_text, labels)
+        self.collect = collect
+        self.kind = kind
+
+    def values(self) -> Optional[Dict[LabelValues, float]]:
+        try:
+            return self.collect()
+        except Exception as e:
+            print(f"[METRICS] Collecting {self.name} failed: {str(e)}")
+            return None
+
+    def render(self, values: Dict[LabelValues, float]) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class MetricsRegistry:
+    """Metrics in the Prometheus text format, without extra dependencies.
+
+    When disabled, observe()/inc() return immediately and time() hands back a
+    no-op context manager, so instrumented code pays almost nothing.
+
+    Values are kept per process. With a multiprocess_dir (METRICS_DIR, set by
+    serve.py for prefork workers) every worker writes a snapshot of its values
+    there every flush_interval seconds and at shutdown, and render() sums the
+    snapshots of all workers. Counters and histograms of exited workers are
+    folded into retired.json by the prefork parent (retire_worker()), so they
+    survive a worker being recycled; gauges only count the live workers.
+    """
+
+    def __init__(self, enabled: bool = True, prefix: str = "career", multiprocess_dir: Optional[str] = None,
+                 flush_interval: float = 5.0):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.multiprocess_dir = multiprocess_dir
+        self.flush_interval = flush_interval
+        self._metrics: List[_Metric] = []
+        self._snapshot_path: Optional[str] = None
+        self._snapshot_pid: Optional[int] = None
+        self._flusher: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "MetricsRegistry":
+        return cls(
+            enabled=os.getenv("METRICS_ENABLED", "true").lower() not in ("0", "false", "no", "off"),
+            multiprocess_dir=os.getenv("METRICS_DIR") or None,
+            flush_interval=float(os.getenv("METRICS_FLUSH_SECONDS", 5)),
+        )
+
+    def _add(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(self, f"{self.prefix}_{name}", help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(self, f"{self.prefix}_{name}", help_text, labels, buckets))
+
+    def callback(self, name: str, help_text: str, labels: Sequence[str],
+                 collect: Callable[[], Dict[LabelValues, float]], kind: str = "gauge") -> CallbackMetric:
+        return self._add(CallbackMetric(self, f"{self.prefix}_{name}", help_text, labels, collect, kind))
+
+    def render(self) -> str:
+        if self.multiprocess_dir and self.enabled:
+            totals = self._aggregate()
+            metric_values = [(metric, totals[metric.name]) for metric in self._metrics]
+        else:
+            metric_values = [(metric, metric.values()) for metric in self._metrics]
+        lines = []
+        for metric, values in metric_values:
+            if values is not None:
+                lines.extend(metric.render(values))
+        return "\n".join(lines) + "\n"
+
+    def start_flushing(self):
+        """Write this worker's snapshot every flush_interval seconds (call in the worker, after the fork)"""
+        if not self.multiprocess_dir or not self.enabled or self._flusher is not None:
+            return
+
+        def flush_periodically():
+            while True:
+                time.sleep(self.flush_interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"[METRICS] Writing the snapshot failed: {str(e)}")
+
+        self._flusher = threading.Thread(target=flush_periodically, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+    def flush(self):
+        """Write this process's values to <multiprocess_dir>/worker-<pid>-<start>.json"""
+        if not self.multiprocess_dir or not self.enabled:
+            return
+        if self._snapshot_pid != os.getpid():
+            # The start time keeps a later worker that reuses the pid from overwriting an unretired snapshot
+            self._snapshot_pid = os.getpid()
+            self._snapshot_path = os.path.join(self.multiprocess_dir, f"worker-{self._snapshot_pid}-{time.time_ns()}.json")
+        snapshot = {}
+        for metric in self._metrics:
+            values = metric.values()
+            if values is not None:
+                snapshot[metric.name] = [[list(key), value] for key, value in values.items()]
+        _write_json(self._snapshot_path, snapshot)
+
+    def _aggregate(self) -> Dict[str, Dict[LabelValues, Any]]:
+        """Sum the snapshots of the live workers (this one written just now) and of the retired ones"""
+        from services.array_store import locked
+
+        self.flush()
+        totals: Dict[str, Dict[LabelValues, Any]] = {metric.name: {} for metric in self._metrics}
+        with locked(self.multiprocess_dir, shared=True):
+            for file_name in os.listdir(self.multiprocess_dir):
+                if not file_name.endswith(".json"):
+                    continue
+                retired = file_name == RETIRED_FILE
+                snapshot = _read_json(os.path.join(self.multiprocess_dir, file_name))
+                for metric in self._metrics:
+                    if metric.name in snapshot and (metric.cumulative or not retired):
+                        metric.merge(totals[metric.name], _from_snapshot(snapshot[metric.name]))
+        return totals
+
+    def retire_worker(self, pid: int):
+        """Fold an exited worker's counters and histograms into retired.json and drop its snapshot (prefork parent)"""
+        if not self.multiprocess_dir or not os.path.isdir(self.multiprocess_dir):
+            return
+        from services.array_store import locked
+
+        with locked(self.multiprocess_dir):
+            worker_files = [file_name for file_name in os.listdir(self.multiprocess_dir) if file_name.startswith(f"worker-{pid}-")]
+            # A worker killed while writing leaves a .tmp file behind
+            paths = [os.path.join(self.multiprocess_dir, file_name) for file_name in worker_files if file_name.endswith(".json")]
+            leftovers = [os.path.join(self.multiprocess_dir, file_name) for file_name in worker_files if not file_name.endswith(".json")]
+            if not worker_files:
+                return
+            retired_path = os.path.join(self.multiprocess_dir, RETIRED_FILE)
+            retired = _read_json(retired_path)
+            for path in paths:
+                snapshot = _read_json(path)
+                for metric in self._metrics:
+                    if metric.cumulative and metric.name in snapshot:
+                        total = _from_snapshot(retired.get(metric.name, []))
+                        metric.merge(total, _from_snapshot(snapshot[metric.name]))
+                        retired[metric.name] = [[list(key), value] for key, value in total.items()]
+            if paths:
+                _write_json(retired_path, retired)
+            for path in paths + leftovers:
+                os.remove(path)
+
+
+    def clear_snapshots(self):
+        """Remove all worker and retired snapshots (prefork parent, before the first worker starts)"""
+        if not self.multiprocess_dir or not os.path.isdir(self.multiprocess_dir):
+            return
+        for file_name in os.listdir(self.multiprocess_dir):
+            if file_name.startswith("worker-") or file_name == RETIRED_FILE:
+                os.remove(os.path.join(self.multiprocess_dir, file_name))
+
+
+def _from_snapshot(entries: List[list]) -> Dict[LabelValues, Any]:
+    return {tuple(key): value for key, value in entries}
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Missing or unreadable: leave it out of this scrape
+        return {}
+
+
+def _write_json(path: str, data: Dict[str, Any]):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+metrics = MetricsRegistry.from_env()
+
+REQUEST_SECONDS = metrics.histogram("request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+UPLOAD_BYTES = metrics.histogram("upload_bytes", "Size of uploaded PDFs", buckets=SIZE_BUCKETS)
+PDF_TEXT_SECONDS = metrics.histogram("pdf_text_seconds", "Text-layer extraction time per document", ("backend",))
+PDF_EXTRACTIONS = metrics.counter("pdf_extractions_total", "PDF extractions by method, including cache hits", ("method",))
+OCR_PAGE_SECONDS = metrics.histogram("ocr_page_seconds", "OCR time per page", ("backend",))
+LLM_SECONDS = metrics.histogram("llm_seconds", "LLM analysis call latency", ("call", "outcome"))
+LLM_TOKENS = metrics.histogram("llm_tokens", "Tokens per LLM analysis call", ("kind",), buckets=TOKEN_BUCKETS)
+PROMPT_TOKENS = metrics.histogram("prompt_tokens", "Locally counted tokens per LLM prompt: resume before/after compaction and whole prompt", ("part",), buckets=TOKEN_BUCKETS)
+PROMPT_TRUNCATIONS = metrics.counter("prompt_truncations_total", "LLM prompts whose resume or job description was cut to the token budget")
+LLM_FALLBACKS = metrics.counter("llm_fallbacks_total", "Analyses answered with the heuristic result after an LLM failure", ("error_type",))
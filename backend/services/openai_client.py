@@ -0,0 +1,122 @@
+import os
+import asyncio
+import threading
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+
+class OpenAIClients:
+    """Process-wide OpenAI clients with pooled HTTP connections.
+
+    One sync client (used by blocking callers such as Vision OCR in parser
+    workers) and one async client per event loop, plus a semaphore bounding
+    in-flight LLM requests. Honors OPENAI_BASE_URL, so the whole stack can be
+    pointed at a local stub server (see tools/openai_stub.py).
+    """
+
+    def __init__(self):
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        self.base_url = os.getenv("OPENAI_BASE_URL") or None
+        self.timeout = float(os.getenv("LLM_TIMEOUT", 30))
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", 2))
+        self.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", 64))
+        self.max_connections = int(os.getenv("LLM_MAX_CONNECTIONS", self.max_concurrency))
+
+        self._lock = threading.Lock()
+        self._sync_client = None
+        # httpx async connection pools and asyncio semaphores are bound to the loop they are used on
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _limits(self):
+        import httpx
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+            keepalive_expiry=60,
+        )
+
+    def get_client(self):
+        """Shared synchronous client (thread-safe, reuses keep-alive connections)"""
+        if self._sync_client is None:
+            with self._lock:
+                if self._sync_client is None:
+                    from openai import OpenAI, DefaultHttpxClient
+                    self._sync_client = OpenAI(
+                        api_key=self.api_key,
+                        base_url=self.base_url,
+                        timeout=self.timeout,
+                        max_retries=self.max_retries,
+                        http_client=DefaultHttpxClient(limits=self._limits()),
+                    )
+        return self._sync_client
+
+    def get_async_client(self):
+        """Shared async client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+            client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=DefaultAsyncHttpxClient(limits=self._limits()),
+            )
+            self._async_clients[loop] = client
+        return client
+
+    @asynccontextmanager
+    async def slot(self):
+        """Limit the number of concurrent in-flight LLM calls on this loop"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        async with semaphore:
+            yield
+
+    async def chat_completion(self, timeout: Optional[float] = None, **kwargs):
+        """Run one chat completion under the concurrency limit with a hard per-call timeout"""
+        timeout = timeout or self.timeout
+        async with self.slot():
+            client = self.get_async_client()
+            return await asyncio.wait_for(client.chat.completions.create(timeout=timeout, **kwargs), timeout)
+
+    async def stream_chat_completion(self, timeout: Optional[float] = None, **kwargs) -> AsyncIterator[str]:
+        """Stream a chat completion's content deltas; each wait for the next chunk is bounded by the timeout"""
+        timeout = timeout or self.timeout
+        async with self.slot():
+            client = self.get_async_client()
+            stream = await asyncio.wait_for(
+                client.chat.completions.create(timeout=timeout, stream=True, **kwargs), timeout
+            )
+            try:
+                chunks = stream.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+                    except StopAsyncIteration:
+                        break
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.close()
+
+    async def aclose(self):
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+
+_clients: Optional[OpenAIClients] = None
+
+
+def get_openai_clients() -> OpenAIClients:
+    global _clients
+    if _clients is None:
+        _clients = OpenAIClients()
+    return _clients
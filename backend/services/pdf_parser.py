@@ -1,192 +1,343 @@
+import os
+import time
+import base64
+import hashlib
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from io import BytesIO
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
+from services.cache import TieredCache
+from services.openai_client import get_openai_clients
+from services.circuit_breaker import CLOSED, CircuitBreaker, CircuitOpenError
 
-class PDFParser:
-    def extract_text(self, pdf_bytes: bytes) -> str:
+# Pages with less text than this (and at least one image) are treated as scanned
+MIN_PAGE_TEXT_CHARS = 20
+# Separates pages in extracted text, so running headers/footers can be told from repeated content
+PAGE_BREAK = "\f"
+
+
+class PDFContentError(Exception):
+    """A problem with the document itself (encrypted, no pages) that no other backend can fix"""
+
+
+class ExtractionBackend:
+    """Reads the text layer of a PDF one page at a time"""
+    name = ""
+
+    def iter_pages(self, source: Union[bytes, str]) -> Iterator[Tuple[int, int, str, bool]]:
+        """Yield (page number, page count, text, needs OCR); stopping early closes the document"""
+        raise NotImplementedError
+
+
+class PyMuPDFBackend(ExtractionBackend):
+    """MuPDF's C text extraction, much faster than pypdf on large documents"""
+    name = "pymupdf"
+
+    def iter_pages(self, source: Union[bytes, str]) -> Iterator[Tuple[int, int, str, bool]]:
+        document = _open_document(source)
+        try:
+            if document.needs_pass:
+                raise PDFContentError("PDF is password-protected. Please upload an unencrypted PDF")
+            page_count = document.page_count
+            if page_count == 0:
+                raise PDFContentError("PDF has no pages")
+            for page in document:
+                page_text = page.get_text()
+                scanned = len(page_text.strip()) < MIN_PAGE_TEXT_CHARS and bool(page.get_images())
+                yield page.number, page_count, page_text, scanned
+        finally:
+            document.close()
+
+
+class PypdfBackend(ExtractionBackend):
+    """Pure-Python fallback; also reads some damaged files MuPDF rejects"""
+    name = "pypdf"
+
+    def iter_pages(self, source: Union[bytes, str]) -> Iterator[Tuple[int, int, str, bool]]:
         from pypdf import PdfReader
         from pypdf.errors import PdfReadError
         
+        # pypdf seeks in the open file instead of loading it into memory
+        pdf_stream = open(source, "rb") if isinstance(source, str) else BytesIO(source)
         try:
-            if not pdf_bytes or len(pdf_bytes) == 0:
-                raise Exception("PDF file is empty or invalid")
-            
-            pdf_stream = BytesIO(pdf_bytes)
-            
             try:
                 reader = PdfReader(pdf_stream)
             except PdfReadError as e:
                 raise Exception("PDF file is corrupted or in an unsupported format")
             except Exception as e:
                 if "encrypt" in str(e).lower() or "password" in str(e).lower():
-                    raise Exception("PDF is password-protected. Please upload an unencrypted PDF")
+                    raise PDFContentError("PDF is password-protected. Please upload an unencrypted PDF")
                 raise Exception(f"Unable to read PDF: {str(e)}")
             
-            if len(reader.pages) == 0:
-                raise Exception("PDF has no pages")
+            page_count = len(reader.pages)
+            if page_count == 0:
+                raise PDFContentError("PDF has no pages")
             
             if reader.is_encrypted:
-                raise Exception("PDF is password-protected. Please upload an unencrypted PDF")
+                raise PDFContentError("PDF is password-protected. Please upload an unencrypted PDF")
+            
+            for page_num, page in enumerate(reader.pages):
+                try:
+                    page_text = page.extract_text() or ""
+                except Exception:
+                    page_text = ""
+                scanned = len(page_text.strip()) < MIN_PAGE_TEXT_CHARS and _has_images(page)
+                yield page_num, page_count, page_text, scanned
+        finally:
+            pdf_stream.close()
+
+
+def _read_error(e: Exception) -> Exception:
+    """The error shown to the user for a failed extraction"""
+    error_msg = str(e)
+    if "PDF" in error_msg or "extract" in error_msg.lower() or "password" in error_msg.lower() or "encrypt" in error_msg.lower():
+        return Exception(error_msg)
+    return Exception(f"Could not read PDF: {error_msg}")
+
+
+def _has_images(page) -> bool:
+    try:
+        return len(page.images) > 0
+    except Exception:
+        return False
+
+
+EXTRACTION_BACKENDS = {
+    PyMuPDFBackend.name: PyMuPDFBackend,
+    PypdfBackend.name: PypdfBackend,
+}
+
+
+def get_backends(names: str) -> List[ExtractionBackend]:
+    """Backends in the given comma-separated order, skipping unknown names"""
+    backends = []
+    for name in names.split(","):
+        name = name.strip().lower()
+        if name in EXTRACTION_BACKENDS:
+            backends.append(EXTRACTION_BACKENDS[name]())
+        elif name:
+            print(f"[PDF Parser] Unknown extraction backend '{name}', ignoring it")
+    return backends or [PypdfBackend()]
+
+
+class PDFParser:
+    def __init__(self):
+        # Tried in order per document; a backend that fails on a file hands it to the next one
+        self.backends = get_backends(os.getenv("PDF_BACKENDS", "pymupdf,pypdf"))
+        # The analysis never needs more than the first few pages of text of a long portfolio
+        self.char_budget = int(os.getenv("PDF_TEXT_CHAR_BUDGET", 20000))
+        # Scanned pages have no text to count until OCR has read them, so each one is charged this estimate
+        self.scanned_page_chars = int(os.getenv("PDF_SCANNED_PAGE_CHARS", 3000))
+        # Keyed by file hash; stores the text and which method produced it (pypdf/vision/tesseract)
+        self.cache = TieredCache.from_env("extraction", "EXTRACTION_CACHE", default_entries=256, default_mb=32)
+    
+    @staticmethod
+    def cache_key(pdf_bytes: bytes) -> str:
+        return hashlib.sha256(pdf_bytes).hexdigest()
+    
+    def get_cached(self, key: str) -> Optional[Dict[str, str]]:
+        return self.cache.get(key)
+    
+    def store_cached(self, key: str, text: str, method: str):
+        self.cache.set(key, {"text": text, "method": method})
+    
+    async def get_cached_async(self, key: str) -> Optional[Dict[str, str]]:
+        return await self.cache.get_async(key)
+    
+    async def store_cached_async(self, key: str, text: str, method: str):
+        await self.cache.set_async(key, {"text": text, "method": method})
+    
+    def extract_text(self, pdf_bytes: bytes) -> str:
+        key = self.cache_key(pdf_bytes)
+        cached = self.get_cached(key)
+        if cached is not None:
+            return cached["text"]
+        
+        text, method, complete = self.extract_text_uncached(pdf_bytes)
+        if complete:
+            self.store_cached(key, text, method)
+        return text
+    
+    def extract_text_uncached(self, source: Union[bytes, str], timings: Optional[Dict[str, list]] = None) -> Tuple[str, str, bool]:
+        """Extract text from PDF bytes or a PDF file path and report the method used (backend and/or OCR).
+
+        The flag is False when OCR failed or ran out of time on some pages; such
+        partial text is usable but must not be cached, a retry may recover it.
+        If a timings dict is given, (backend, seconds) pairs are appended to its
+        "text" (per document) and "ocr" (per page) lists.
+        """
+        timings = timings if timings is not None else {}
+        pages, method = self.read_text_layer(source, timings)
+        return self.complete_text(source, pages, method, timings)
+    
+    def read_text_layer(self, source: Union[bytes, str], timings: Dict[str, list]) -> Tuple[Dict[int, Optional[str]], str]:
+        """First stage (CPU only): page texts by page number and the backend; None marks a page that needs OCR"""
+        timings.setdefault("text", [])
+        timings.setdefault("ocr", [])
+        try:
+            size = os.path.getsize(source) if isinstance(source, str) else len(source or b"")
+            if size == 0:
+                raise Exception("PDF file is empty or invalid")
             
-            text = ""
-            for page in reader.pages:
+            pages, method = self._read_text_layer(source, timings)
+            
+            text_chars = sum(len(page_text.strip()) for page_text in pages.values() if page_text)
+            if None not in pages.values() and text_chars < 50:
+                # No page looks scanned but there is no usable text either (e.g. images behind a text stub);
+                # OCR them all, but only as many as the character budget allows for scanned pages
+                ocr_limit = max(1, self.char_budget // max(1, self.scanned_page_chars))
+                pages = {page_num: None for page_num in list(pages)[:ocr_limit]}
+            return pages, method
+        
+        except Exception as e:
+            raise _read_error(e)
+    
+    def complete_text(self, source: Union[bytes, str], pages: Dict[int, Optional[str]], method: str,
+                      timings: Dict[str, list]) -> Tuple[str, str, bool]:
+        """Second stage: OCR the pages read_text_layer() left as None, then join the pages.
+
+        OCR fans the pages out over this process's Tesseract and Vision pools,
+        so it must run in the serving process, not inside a parser pool worker.
+        """
+        timings.setdefault("ocr", [])
+        try:
+            pages = dict(pages)
+            ocr_pages = [page_num for page_num, page_text in pages.items() if page_text is None]
+            text_chars = sum(len(page_text.strip()) for page_text in pages.values() if page_text)
+            
+            if ocr_pages:
+                print(f"[PDF Parser] {len(ocr_pages)} of {len(pages)} pages have no text layer, attempting OCR...")
                 try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-                except Exception as e:
-                    continue
+                    ocr_texts, ocr_method = self._extract_text_with_ocr(source, ocr_pages, timings)
+                except Exception:
+                    if text_chars < 50:
+                        raise
+                    # The text layer of the other pages is still a usable result
+                    ocr_texts, ocr_method = {}, None
+                if ocr_method:
+                    pages.update(ocr_texts)
+                    method = ocr_method if len(ocr_pages) == len(pages) else f"{method}+{ocr_method}"
             
-            # If no text extracted, try OCR
-            if not text or len(text.strip()) < 50:
-                print("[PDF Parser] No text extracted with pypdf, attempting OCR...")
-                text = self._extract_text_with_ocr(pdf_bytes)
+            text = PAGE_BREAK.join(page_text + "\n" for page_text in pages.values() if page_text)
             
             if not text or len(text.strip()) == 0:
                 raise Exception("Could not extract any text from PDF. The PDF might be corrupted or empty.")
             
-            return text.strip()
+            # None is a page still without text: OCR failed on it or missed the deadline
+            missing = [page_num + 1 for page_num, page_text in pages.items() if page_text is None]
+            if missing:
+                print(f"[PDF Parser] Returning partial text, no text for page(s) {missing}")
+            return text[:self.char_budget].strip(), method, not missing
         
         except Exception as e:
-            error_msg = str(e)
-            if "PDF" in error_msg or "extract" in error_msg.lower() or "password" in error_msg.lower() or "encrypt" in error_msg.lower():
-                raise Exception(error_msg)
-            raise Exception(f"Could not read PDF: {error_msg}")
-    
-    def _extract_text_with_ocr(self, pdf_bytes: bytes) -> str:
-        """Extract text from image-based PDF using OCR (cloud-based for serverless compatibility)"""
-        import os
-        
+            raise _read_error(e)
+    
+    def _read_text_layer(self, source: Union[bytes, str], timings: Dict[str, list]) -> Tuple[Dict[int, Optional[str]], str]:
+        """Page texts from the first backend that can read the document; None marks a scanned page"""
+        error: Optional[Exception] = None
+        for backend in self.backends:
+            started = time.perf_counter()
+            try:
+                pages = self._read_pages(backend, source)
+                timings["text"].append((backend.name, time.perf_counter() - started))
+                return pages, backend.name
+            except PDFContentError:
+                # Encrypted or empty documents fail the same way in every backend
+                raise
+            except Exception as e:
+                print(f"[PDF Parser] {backend.name} could not read the PDF ({type(e).__name__}: {str(e)}), trying next backend")
+                error = e
+        raise error or Exception("No PDF extraction backend available")
+    
+    def _read_pages(self, backend: "ExtractionBackend", source: Union[bytes, str]) -> Dict[int, Optional[str]]:
+        pages: Dict[int, Optional[str]] = {}
+        budget = self.char_budget
+        for page_num, page_count, page_text, scanned in backend.iter_pages(source):
+            pages[page_num] = None if scanned else page_text
+            budget -= max(len(page_text), self.scanned_page_chars) if scanned else len(page_text)
+            if budget <= 0:
+                print(f"[PDF Parser] Character budget reached after page {page_num + 1} of {page_count}")
+                break
+        return pages
+    
+    def _extract_text_with_ocr(self, source: Union[bytes, str], page_nums: List[int],
+                               timings: Dict[str, list]) -> Tuple[Dict[int, str], str]:
+        """OCR the given pages of an image-based PDF (cloud-based for serverless compatibility)"""
         # Try OpenAI Vision API first (works in serverless)
         if os.getenv("OPENAI_API_KEY"):
             try:
-                return self._extract_with_openai_vision(pdf_bytes)
+                return self._extract_with_openai_vision(source, page_nums, timings["ocr"]), "vision"
             except Exception as e:
                 print(f"[OCR] OpenAI Vision failed: {str(e)}, trying local OCR...")
         
         # Fallback to local Tesseract OCR (for local development)
         try:
-            return self._extract_with_tesseract(pdf_bytes)
+            return self._extract_with_tesseract(source, page_nums, timings["ocr"]), "tesseract"
         except Exception as e:
             print(f"[OCR ERROR] All OCR methods failed: {str(e)}")
             raise Exception("Could not extract text from image-based PDF. Please ensure the PDF contains selectable text or try converting it to a text-based PDF.")
     
-    def _extract_with_openai_vision(self, pdf_bytes: bytes) -> str:
-        """Extract text using OpenAI Vision API (serverless-compatible)"""
+    def _extract_with_openai_vision(self, source: Union[bytes, str], page_nums: List[int],
+                                    page_timings: List[Tuple[str, float]]) -> Dict[int, str]:
+        """Extract text using OpenAI Vision API (serverless-compatible), pages in parallel"""
         try:
-            import os
-            from openai import OpenAI
-            import fitz  # PyMuPDF
-            import base64
-            from io import BytesIO
-            from PIL import Image
-            
+            # Skips rendering while Vision is failing; the caller then goes straight to Tesseract
+            vision_breaker.raise_if_open()
             print("[OCR] Using OpenAI Vision API for text extraction...")
-            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            
-            # Open PDF with PyMuPDF
-            pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
-            page_count = len(pdf_document)
-            print(f"[OCR] Processing {page_count} pages with OpenAI Vision...")
+            client = get_openai_clients().get_client()
             
-            text = ""
             # Limit to 5 pages to control costs
-            for page_num in range(min(page_count, 5)):
-                print(f"[OCR] Extracting text from page {page_num + 1}/{min(page_count, 5)}...")
-                
-                # Render page to image
-                page = pdf_document[page_num]
-                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x zoom for better quality
-                
-                # Convert to PIL Image
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                
-                # Convert image to base64
-                buffered = BytesIO()
-                img.save(buffered, format="JPEG", quality=85)
-                img_base64 = base64.b64encode(buffered.getvalue()).decode()
-                
-                # Call OpenAI Vision API
-                response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": "Extract ALL text from this resume/CV page. Return ONLY the extracted text, preserving the structure and formatting as much as possible. Do not add any commentary or explanations."
-                                },
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:image/jpeg;base64,{img_base64}",
-                                        "detail": "high"
-                                    }
-                                }
-                            ]
-                        }
-                    ],
-                    max_tokens=2000
-                )
-                
-                page_text = response.choices[0].message.content
-                if page_text:
-                    text += page_text + "\n\n"
+            pages_to_process = page_nums[:VISION_MAX_PAGES]
+            print(f"[OCR] Processing {len(pages_to_process)} pages with OpenAI Vision...")
             
-            pdf_document.close()
+            # Render first (cheap, local), then fan the API calls out concurrently
+            futures = {}
+            pool = _get_vision_pool()
+            pdf_document = _open_document(source)
+            try:
+                for page_num in pages_to_process:
+                    img_base64 = _render_page_jpeg_base64(pdf_document[page_num])
+                    futures[page_num] = pool.submit(_timed, vision_breaker.call, _ocr_page_with_vision, client, img_base64)
+                    if vision_breaker.state != CLOSED and len(futures) == 1:
+                        # After a cooldown only one probe call is allowed; the other pages wait for its outcome
+                        futures[page_num].result()
+            finally:
+                pdf_document.close()
+            
+            # A page rejected by the breaker fails the whole backend, so the document goes to Tesseract instead of losing pages
+            pages = _collect_pages(futures, "OpenAI Vision", "vision", page_timings, fatal=(CircuitOpenError,))
             
-            if page_count > 5:
-                print(f"[OCR] Note: Only processed first 5 pages out of {page_count} to control API costs")
+            if len(page_nums) > VISION_MAX_PAGES:
+                print(f"[OCR] Note: Only processed {VISION_MAX_PAGES} of {len(page_nums)} scanned pages to control API costs")
+                # Skipped by design, not failed: the result is the same on every retry
+                pages.update({page_num: "" for page_num in page_nums[VISION_MAX_PAGES:]})
             
-            print(f"[OCR] Extracted {len(text)} characters using OpenAI Vision")
-            return text.strip()
+            print(f"[OCR] Extracted {sum(len(page_text or '') for page_text in pages.values())} characters using OpenAI Vision")
+            return pages
         
         except Exception as e:
             print(f"[OCR ERROR] OpenAI Vision extraction failed: {str(e)}")
             raise
     
-    def _extract_with_tesseract(self, pdf_bytes: bytes) -> str:
-        """Extract text using local Tesseract OCR (for local development only)"""
+    def _extract_with_tesseract(self, source: Union[bytes, str], page_nums: List[int],
+                                page_timings: List[Tuple[str, float]]) -> Dict[int, str]:
+        """Extract text using local Tesseract OCR (for local development only), pages in parallel"""
         try:
-            import pytesseract
-            import fitz  # PyMuPDF
-            from PIL import Image
-            import os
-            import platform
+            import pytesseract  # noqa: F401 - fail fast here if OCR dependencies are missing
             
             print("[OCR] Using local Tesseract OCR...")
+            print(f"[OCR] Processing {len(page_nums)} pages with Tesseract...")
+            pool = _get_tesseract_pool()
+            # Workers get the spooled file's path when there is one, not a pickled copy of the PDF
+            futures = {
+                page_num: pool.submit(_timed, _ocr_page_with_tesseract, source, page_num)
+                for page_num in page_nums
+            }
             
-            # Configure Tesseract path for Windows
-            if platform.system() == 'Windows':
-                tesseract_paths = [
-                    r'C:\Program Files\Tesseract-OCR\tesseract.exe',
-                    r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
-                ]
-                for path in tesseract_paths:
-                    if os.path.exists(path):
-                        pytesseract.pytesseract.tesseract_cmd = path
-                        print(f"[OCR] Found Tesseract at: {path}")
-                        break
-            
-            # Convert PDF to images using PyMuPDF
-            pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
-            
-            text = ""
-            print(f"[OCR] Processing {len(pdf_document)} pages with Tesseract...")
-            for page_num in range(len(pdf_document)):
-                print(f"[OCR] Extracting text from page {page_num + 1}/{len(pdf_document)}...")
-                page = pdf_document[page_num]
-                pix = page.get_pixmap(matrix=fitz.Matrix(3, 3))  # 3x zoom for better OCR
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                
-                page_text = pytesseract.image_to_string(img, lang='eng+deu')
-                if page_text:
-                    text += page_text + "\n"
-            
-            pdf_document.close()
-            
-            print(f"[OCR] Extracted {len(text)} characters with Tesseract")
-            return text.strip()
+            pages = _collect_pages(futures, "Tesseract", "tesseract", page_timings)
+            
+            print(f"[OCR] Extracted {sum(len(page_text or '') for page_text in pages.values())} characters with Tesseract")
+            return pages
         
         except ImportError as ie:
             print(f"[OCR ERROR] Tesseract dependencies not available: {str(ie)}")
@@ -194,3 +345,184 @@ class PDFParser:
         except Exception as e:
             print(f"[OCR ERROR] Tesseract extraction failed: {str(e)}")
             raise
+
+
+VISION_MAX_PAGES = 5
+VISION_PROMPT = "Extract ALL text from this resume/CV page. Return ONLY the extracted text, preserving the structure and formatting as much as possible. Do not add any commentary or explanations."
+
+# One per serving process: OCR runs there (PDFParser.complete_text), never inside parser pool workers
+vision_breaker = CircuitBreaker.from_env("vision", "VISION_BREAKER", slow_call_seconds=15)
+
+_vision_pool = None
+_tesseract_pool = None
+_tesseract_configured = False
+
+
+def _get_vision_pool():
+    # Vision calls are network-bound; one thread pool in the serving process bounds concurrent requests
+    global _vision_pool
+    if _vision_pool is None:
+        _vision_pool = ThreadPoolExecutor(max_workers=int(os.getenv("VISION_MAX_CONCURRENCY", 5)), thread_name_prefix="vision")
+    return _vision_pool
+
+
+def _get_tesseract_pool():
+    # Rendering at 3x and recognition are CPU-bound, so pages are spread over processes. Created only in
+    # the serving process (parser pool workers read text layers, they never OCR), so a server runs
+    # OCR_PAGE_WORKERS Tesseract processes per web worker, not one pool per parser worker
+    global _tesseract_pool
+    if _tesseract_pool is None:
+        workers = int(os.getenv("OCR_PAGE_WORKERS", min(4, os.cpu_count() or 1)))
+        try:
+            _tesseract_pool = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError) as e:
+            print(f"[OCR] Process pool unavailable ({str(e)}), using threads for Tesseract")
+            _tesseract_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tesseract")
+    return _tesseract_pool
+
+
+def _timed(func, *args) -> Tuple[str, float]:
+    """Run an OCR page function and also return its duration (module-level so process pools can pickle it)"""
+    started = time.perf_counter()
+    return func(*args), time.perf_counter() - started
+
+
+def _collect_pages(futures: Dict[int, Future], label: str, backend: str,
+                   page_timings: List[Tuple[str, float]], fatal: Tuple[type, ...] = ()) -> Dict[int, Optional[str]]:
+    """Wait for per-page OCR futures until the document deadline; return texts by page number.
+
+    Pages that miss the deadline or fail are None, so a slow page never
+    discards the pages that already finished and the caller can tell the
+    result is partial. A page failing with one of the `fatal` exceptions is
+    raised instead. Durations of finished pages are appended to page_timings.
+    """
+    deadline = float(os.getenv("OCR_DEADLINE_SECONDS", 60))
+    done, not_done = wait(futures.values(), timeout=deadline)
+    for future in not_done:
+        future.cancel()
+    if not_done:
+        print(f"[OCR] {label}: deadline of {deadline}s reached, returning {len(done)}/{len(futures)} pages")
+    
+    pages = {}
+    for page_num in sorted(futures):
+        future = futures[page_num]
+        if future not in done:
+            pages[page_num] = None
+            continue
+        try:
+            page_text, seconds = future.result()
+            pages[page_num] = page_text or ""
+            page_timings.append((backend, seconds))
+        except fatal:
+            for future in futures.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            print(f"[OCR] {label}: page {page_num + 1} failed: {str(e)}")
+            pages[page_num] = None
+    
+    if not any(pages.values()):
+        raise Exception(f"{label} produced no text for any page")
+    return pages
+
+
+def _open_document(source: Union[bytes, str]):
+    import fitz  # PyMuPDF
+    
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _render_page_jpeg_base64(page) -> str:
+    import fitz  # PyMuPDF
+    from PIL import Image
+    
+    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x zoom for better quality
+    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    buffered = BytesIO()
+    img.save(buffered, format="JPEG", quality=85)
+    return base64.b64encode(buffered.getvalue()).decode()
+
+
+def _ocr_page_with_vision(client, img_base64: str) -> str:
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": VISION_PROMPT
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:image/jpeg;base64,{img_base64}",
+                            "detail": "high"
+                        }
+                    }
+                ]
+            }
+        ],
+        max_tokens=2000
+    )
+    return response.choices[0].message.content or ""
+
+
+def _configure_tesseract():
+    global _tesseract_configured
+    if _tesseract_configured:
+        return
+    import pytesseract
+    import platform
+    
+    # Configure Tesseract path for Windows
+    if platform.system() == 'Windows':
+        tesseract_paths = [
+            r'C:\Program Files\Tesseract-OCR\tesseract.exe',
+            r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
+        ]
+        for path in tesseract_paths:
+            if os.path.exists(path):
+                pytesseract.pytesseract.tesseract_cmd = path
+                print(f"[OCR] Found Tesseract at: {path}")
+                break
+    _tesseract_configured = True
+
+
+def _ocr_page_with_tesseract(source: Union[bytes, str], page_num: int) -> str:
+    """Render and recognize a single page (runs inside an OCR pool worker)"""
+    import pytesseract
+    import fitz  # PyMuPDF
+    from PIL import Image
+    
+    _configure_tesseract()
+    pdf_document = _open_document(source)
+    try:
+        page = pdf_document[page_num]
+        pix = page.get_pixmap(matrix=fitz.Matrix(3, 3))  # 3x zoom for better OCR
+        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        return pytesseract.image_to_string(img, lang='eng+deu')
+    finally:
+        pdf_document.close()
+
+
+_worker_parser = None
+
+
+def read_text_layer_in_worker(source: Union[bytes, str]) -> Tuple[Dict[int, Optional[str]], str, Dict[str, list]]:
+    """Entry point for parser pool workers (must be a picklable module-level function).
+
+    Takes the path of a spooled upload (or raw bytes) and returns the page
+    texts (None for pages that need OCR), the backend and the stage timings.
+    OCR, caching and metrics live in the calling process, where the OCR pools
+    and the Vision breaker are shared across requests.
+    """
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = PDFParser()
+    timings: Dict[str, list] = {}
+    pages, method = _worker_parser.read_text_layer(source, timings)
+    return pages, method, timings
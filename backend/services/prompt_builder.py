@@ -0,0 +1,223 @@
+import os
+import re
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from services.document import TextDocument
+from services.pdf_parser import PAGE_BREAK
+from services.startup import is_serverless
+from services.taxonomy import DATA_DIR, Taxonomy
+
+# Encoding tables written by `python -m tools.tiktoken_cache` at deploy time (not committed)
+BUNDLED_TIKTOKEN_CACHE = os.path.join(DATA_DIR, "tiktoken")
+APPROX_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+PAGE_NUMBER_PATTERN = re.compile(r"^(?:page\s*)?\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?$", re.IGNORECASE)
+# Lines this long are content, not running headers/footers
+MAX_REPEATED_LINE_LEN = 80
+# Running headers/footers are looked for among this many lines at the top and bottom of each page
+PAGE_EDGE_LINES = 2
+
+# Relative share of the token budget a section gets when the resume does not fit
+SECTION_WEIGHTS = {
+    "header": 1.0,
+    "summary": 1.0,
+    "experience": 3.0,
+    "skills": 1.5,
+    "certifications": 1.0,
+    "education": 1.0,
+    "projects": 1.0,
+    "languages": 0.5,
+    "awards": 0.5,
+    "publications": 0.5,
+    "volunteering": 0.5,
+    "interests": 0.25,
+}
+
+
+def tiktoken_cache_dir() -> Optional[str]:
+    """TIKTOKEN_CACHE_DIR when set, otherwise the deploy-time cache in data/tiktoken if it was built"""
+    configured = os.getenv("TIKTOKEN_CACHE_DIR")
+    if configured:
+        return configured
+    if os.path.isdir(BUNDLED_TIKTOKEN_CACHE) and os.listdir(BUNDLED_TIKTOKEN_CACHE):
+        return BUNDLED_TIKTOKEN_CACHE
+    return None
+
+
+class CompactText(NamedTuple):
+    text: str
+    tokens: int
+    original_tokens: int
+    sections: List[str]
+    truncated: bool
+
+
+class PromptBuilder:
+    """Fits resumes and job descriptions into a token budget for the LLM prompt.
+
+    Text over the budget is cleaned first (whitespace runs, page numbers and
+    headers/footers repeated at the top or bottom of the PDF pages). If the
+    resume is still over budget, each section gets a weighted share of it, so
+    a long experience section cannot push skills or certifications out of the
+    prompt.
+    """
+
+    def __init__(self, taxonomy: Taxonomy, model: str = "gpt-3.5-turbo",
+                 resume_budget: int = 900, job_description_budget: int = 300):
+        self.taxonomy = taxonomy
+        self.model = model
+        self.resume_budget = resume_budget
+        self.job_description_budget = job_description_budget
+        self._encoding = None
+        self._encoding_loaded = False
+
+    @classmethod
+    def from_env(cls, taxonomy: Taxonomy, model: str) -> "PromptBuilder":
+        return cls(
+            taxonomy,
+            model=model,
+            resume_budget=int(os.getenv("PROMPT_RESUME_TOKENS", 900)),
+            job_description_budget=int(os.getenv("PROMPT_JD_TOKENS", 300)),
+        )
+
+    def _get_encoding(self):
+        if not self._encoding_loaded:
+            self._encoding_loaded = True
+            cache_dir = tiktoken_cache_dir()
+            if cache_dir is None and is_serverless():
+                # Downloading the tables would add a network fetch to the cold start
+                print("[PROMPT] No bundled tiktoken cache, using approximate token counts")
+                return None
+            if cache_dir:
+                os.environ.setdefault("TIKTOKEN_CACHE_DIR", cache_dir)
+            try:
+                import tiktoken
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # tiktoken is optional (and may need to download its tables); estimate instead
+                print(f"[PROMPT] tiktoken unavailable ({type(e).__name__}), using approximate token counts")
+        return self._encoding
+
+    def count_tokens(self, text: str) -> int:
+        encoding = self._get_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text))
+        return max(len(APPROX_TOKEN_PATTERN.findall(text)), len(text) // 4)
+
+    def count_message_tokens(self, messages: List[Dict[str, str]]) -> int:
+        # Chat formatting adds a few tokens per message
+        return sum(self.count_tokens(message["content"]) + 4 for message in messages) + 2
+
+    def clean(self, text: str) -> str:
+        """Collapse whitespace and drop page numbers and running headers/footers.
+
+        Pages are separated by PAGE_BREAK. A short line counts as a running
+        header/footer when it is at the top or bottom of all pages but at most
+        one; only its first occurrence is kept, and repeats inside a page's
+        body (e.g. a second job with the same title) are left alone.
+        """
+        pages = []
+        for page in text.split(PAGE_BREAK):
+            lines = [" ".join(line.split()) for line in page.splitlines()]
+            pages.append([line for line in lines if line and not PAGE_NUMBER_PATTERN.match(line)])
+
+        running = set()
+        if len(pages) > 1:
+            counts = Counter()
+            for lines in pages:
+                edges = lines[:PAGE_EDGE_LINES] + lines[-PAGE_EDGE_LINES:]
+                counts.update({line.casefold() for line in edges if len(line) <= MAX_REPEATED_LINE_LEN})
+            running = {key for key, count in counts.items() if count >= max(2, len(pages) - 1)}
+
+        seen = set()
+        cleaned = []
+        for lines in pages:
+            for i, line in enumerate(lines):
+                key = line.casefold()
+                if key in running and (i < PAGE_EDGE_LINES or i >= len(lines) - PAGE_EDGE_LINES):
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                cleaned.append(line)
+        return "\n".join(cleaned)
+
+    def _prepare(self, text: str, budget: int) -> Tuple[str, int]:
+        """Text cleaned only if it is over the budget, and its original token count"""
+        original_tokens = self.count_tokens(text)
+        if original_tokens <= budget:
+            return text.replace(PAGE_BREAK, "\n"), original_tokens
+        return self.clean(text), original_tokens
+
+    def _truncate(self, text: str, budget: int) -> str:
+        """Leading lines of the text that fit the budget, cutting the last line at a word boundary"""
+        kept = []
+        used = 0
+        for line in text.split("\n"):
+            tokens = self.count_tokens(line) + 1
+            if used + tokens <= budget:
+                kept.append(line)
+                used += tokens
+                continue
+            words = []
+            for word in line.split():
+                word_tokens = self.count_tokens(word)
+                if used + word_tokens + 1 > budget:
+                    break
+                words.append(word)
+                used += word_tokens
+            if words:
+                kept.append(" ".join(words) + " ...")
+            break
+        return "\n".join(kept)
+
+    def compact_resume(self, text: str) -> CompactText:
+        cleaned, original_tokens = self._prepare(text, self.resume_budget)
+        doc = TextDocument(cleaned, self.taxonomy)
+        sections = [(section.name, doc.section_text(section).strip()) for section in doc.sections]
+        sections = [(name, body) for name, body in sections if body]
+        tokens = [self.count_tokens(body) for _, body in sections]
+
+        if sum(tokens) <= self.resume_budget:
+            compact = "\n".join(body for _, body in sections)
+            return CompactText(compact, self.count_tokens(compact), original_tokens,
+                               [name for name, _ in sections], False)
+
+        # Weighted water-filling: small sections are kept whole, their unused share goes to the larger ones
+        allocation = [0] * len(sections)
+        remaining = set(range(len(sections)))
+        budget = self.resume_budget
+        while remaining:
+            total_weight = sum(SECTION_WEIGHTS.get(sections[i][0], 0.5) for i in remaining)
+            shares = {i: budget * SECTION_WEIGHTS.get(sections[i][0], 0.5) / total_weight for i in remaining}
+            fits = [i for i in remaining if tokens[i] <= shares[i]]
+            if not fits:
+                for i in remaining:
+                    allocation[i] = int(shares[i])
+                break
+            for i in fits:
+                allocation[i] = tokens[i]
+                budget -= tokens[i]
+                remaining.discard(i)
+
+        parts = []
+        kept = []
+        for (name, body), size, allowed in zip(sections, tokens, allocation):
+            part = body if size <= allowed else self._truncate(body, allowed)
+            if part:
+                parts.append(part)
+                kept.append(name)
+        compact = "\n".join(parts)
+        return CompactText(compact, self.count_tokens(compact), original_tokens, kept, True)
+
+    def compact_job_description(self, text: Optional[str]) -> Optional[CompactText]:
+        if not text:
+            return None
+        cleaned, original_tokens = self._prepare(text, self.job_description_budget)
+        tokens = self.count_tokens(cleaned)
+        if tokens <= self.job_description_budget:
+            return CompactText(cleaned, tokens, original_tokens, [], False)
+        compact = self._truncate(cleaned, self.job_description_budget)
+        return CompactText(compact, self.count_tokens(compact), original_tokens, [], True)
@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from services.circuit_breaker import CircuitOpenError
+from services.state_dir import state_dir
+
+DB_FILE = "refinements.db"
+
+
+class RefinementQueue:
+    """Persistent job queue for background LLM refinement of heuristic analyses.
+
+    Jobs live in SQLite, so queued work survives restarts and several server
+    processes can share one database file. Workers are asyncio tasks on the
+    app's event loop and run their SQLite statements in threads, so a busy or
+    locked database never blocks the loop. A worker claims a job by taking a
+    time-limited lease, and a job whose lease runs out (e.g. its process died)
+    is picked up again. A job rejected by an open circuit waits for the
+    circuit's cooldown without using up an attempt.
+    """
+
+    def __init__(self, handler: Callable[[Dict], Awaitable[Dict]], db_path: Optional[str] = None,
+                 workers: int = 4, max_queued: int = 1000, max_attempts: int = 3,
+                 lease_seconds: float = 120, retention_seconds: float = 86400, poll_interval: float = 1.0):
+        self.handler = handler
+        self.db_path = db_path or os.path.join(state_dir(), DB_FILE)
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_cleanup = 0.0
+
+        self.completed = 0
+        self.failed = 0
+
+    @classmethod
+    def from_env(cls, handler: Callable[[Dict], Awaitable[Dict]]) -> "RefinementQueue":
+        return cls(
+            handler,
+            db_path=os.getenv("REFINEMENT_DB"),
+            workers=int(os.getenv("REFINEMENT_WORKERS", 4)),
+            max_queued=int(os.getenv("REFINEMENT_QUEUE_DEPTH", 1000)),
+            max_attempts=int(os.getenv("REFINEMENT_MAX_ATTEMPTS", 3)),
+            lease_seconds=float(os.getenv("REFINEMENT_LEASE_SECONDS", 120)),
+            retention_seconds=float(os.getenv("REFINEMENT_RETENTION_SECONDS", 86400)),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened lazily so forked workers each get their own connection
+        if self._db is None:
+            directory = os.path.dirname(os.path.abspath(self.db_path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=10)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS refinement_jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT, result TEXT, error TEXT, "
+                "attempts INTEGER NOT NULL DEFAULT 0, available_at REAL NOT NULL, lease_expires_at REAL, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS refinement_jobs_ready ON refinement_jobs (status, available_at)"
+            )
+        return self._db
+
+    async def enqueue(self, payload: Dict[str, Any]) -> Optional[str]:
+        """Queue a refinement; returns the job id, or None when the queue is full"""
+        job_id = await asyncio.to_thread(self._insert, payload)
+        if job_id is not None and self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    def _insert(self, payload: Dict[str, Any]) -> Optional[str]:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            db = self._connect()
+            queued = db.execute("SELECT COUNT(*) FROM refinement_jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_queued:
+                return None
+            db.execute(
+                "INSERT INTO refinement_jobs (id, status, payload, available_at, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, json.dumps(payload), now, now, now)
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT status, result, error, attempts, created_at, updated_at FROM refinement_jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, result, error, attempts, created_at, updated_at = row
+        return {
+            "job_id": job_id,
+            "status": status,
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "attempts": attempts,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT id, payload, attempts FROM refinement_jobs "
+                    "WHERE (status = 'queued' AND available_at <= ?) OR (status = 'running' AND lease_expires_at < ?) "
+                    "ORDER BY available_at LIMIT 1",
+                    (now, now)
+                ).fetchone()
+                if row is not None:
+                    db.execute(
+                        "UPDATE refinement_jobs SET status = 'running', attempts = attempts + 1, "
+                        "lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                        (now + self.lease_seconds, now, row[0])
+                    )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return {"id": row[0], "payload": json.loads(row[1]), "attempts": row[2] + 1}
+
+    def _finish(self, job_id: str, result: Dict):
+        with self._lock:
+            # The resume text is no longer needed once the job is done
+            self._connect().execute(
+                "UPDATE refinement_jobs SET status = 'done', result = ?, payload = NULL, error = NULL, "
+                "lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+                (json.dumps(result), time.time(), job_id)
+            )
+        self.completed += 1
+
+    def _fail(self, job_id: str, attempts: int, error: str):
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            if attempts < self.max_attempts:
+                # Exponential backoff before the next attempt
+                db.execute(
+                    "UPDATE refinement_jobs SET status = 'queued', error = ?, available_at = ?, "
+                    "lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+                    (error, now + 2 ** attempts, now, job_id)
+                )
+                return
+            db.execute(
+                "UPDATE refinement_jobs SET status = 'failed', error = ?, payload = NULL, "
+                "lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+                (error, now, job_id)
+            )
+        self.failed += 1
+
+    def _defer(self, job_id: str, delay: float):
+        """Requeue a job whose dependency is unavailable for a while, without counting the attempt"""
+        now = time.time()
+        with self._lock:
+            self._connect().execute(
+                "UPDATE refinement_jobs SET status = 'queued', attempts = attempts - 1, available_at = ?, "
+                "lease_expires_at = NULL, updated_at = ? WHERE id = ? AND status = 'running'",
+                (now + delay, now, job_id)
+            )
+
+    def _release(self, job_id: str):
+        """Put an interrupted job back in the queue without counting the attempt"""
+        with self._lock:
+            self._connect().execute(
+                "UPDATE refinement_jobs SET status = 'queued', attempts = attempts - 1, "
+                "lease_expires_at = NULL, updated_at = ? WHERE id = ? AND status = 'running'",
+                (time.time(), job_id)
+            )
+
+    def _cleanup(self):
+        now = time.time()
+        if now - self._last_cleanup < 60:
+            return
+        self._last_cleanup = now
+        with self._lock:
+            self._connect().execute(
+                "DELETE FROM refinement_jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (now - self.retention_seconds,)
+            )
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await asyncio.to_thread(self._claim)
+            except sqlite3.Error as e:
+                print(f"[REFINEMENT] Could not claim a job: {str(e)}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.to_thread(self._cleanup)
+                except sqlite3.Error as e:
+                    print(f"[REFINEMENT] Could not delete old jobs: {str(e)}")
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                result = await self.handler(job["payload"])
+            except asyncio.CancelledError:
+                try:
+                    self._release(job["id"])
+                except sqlite3.Error as e:
+                    print(f"[REFINEMENT] Could not release job {job['id']}, it is retried when its lease expires: {str(e)}")
+                raise
+            except CircuitOpenError as e:
+                # An outage is not the job's fault: wait out the cooldown instead of failing it
+                delay = max(e.retry_after, self.poll_interval)
+                print(f"[REFINEMENT] Job {job['id']} deferred for {delay:.0f}s: {str(e)}")
+                await self._record(self._defer, job["id"], delay)
+            except Exception as e:
+                print(f"[REFINEMENT] Job {job['id']} attempt {job['attempts']} failed: {type(e).__name__}: {str(e)}")
+                await self._record(self._fail, job["id"], job["attempts"], str(e) or type(e).__name__)
+            else:
+                await self._record(self._finish, job["id"], result)
+
+    async def _record(self, update: Callable[..., None], job_id: str, *args):
+        """Store a job's outcome; if the database refuses, the job runs again once its lease expires"""
+        try:
+            await asyncio.to_thread(update, job_id, *args)
+        except sqlite3.Error as e:
+            print(f"[REFINEMENT] Could not update job {job_id}, it is retried when its lease expires: {str(e)}")
+
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        print(f"[REFINEMENT] Started {self.workers} workers ({self.db_path})")
+
+    async def stop(self):
+        # Running jobs are released back to the queue by the cancelled workers
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._connect().execute(
+                "SELECT status, COUNT(*) FROM refinement_jobs GROUP BY status"
+            ).fetchall())
+        return {
+            "workers": len(self._tasks),
+            "queued": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "completed_here": self.completed,
+            "failed_here": self.failed,
+        }
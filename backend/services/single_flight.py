@@ -0,0 +1,80 @@
+import asyncio
+import copy
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for the same result (or exception) instead of starting
+    their own. Followers get a deep copy so no two requests share a mutable
+    result. Nothing is cached after the call completes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._async_calls: Dict[Any, asyncio.Future] = {}
+        self._sync_calls: Dict[Any, Future] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    async def run(self, key: Any, func: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = self._async_calls.get(key)
+        if future is not None and future.get_loop() is loop:
+            self.coalesced += 1
+            return copy.deepcopy(await asyncio.shield(future))
+
+        self.calls += 1
+        future = asyncio.ensure_future(func(*args, **kwargs))
+        self._async_calls[key] = future
+        future.add_done_callback(lambda done: self._finish(self._async_calls, key, done))
+        # Shielded: a disconnecting caller must not cancel a call other requests are waiting on
+        return await asyncio.shield(future)
+
+    def run_sync(self, key: Any, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            future = self._sync_calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._sync_calls[key] = future
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            self._finish(self._sync_calls, key, future)
+            raise
+        future.set_result(result)
+        self._finish(self._sync_calls, key, future)
+        return result
+
+    def _finish(self, calls: Dict[Any, Any], key: Any, future):
+        with self._lock:
+            if calls.get(key) is future:
+                del calls[key]
+        if not future.cancelled() and future.exception() is not None:
+            self.failures += 1
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.calls + self.coalesced
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "in_flight": len(self._async_calls) + len(self._sync_calls),
+            "coalesced_rate": round(self.coalesced / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,180 @@
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple, Union
+
+from services.taxonomy import Taxonomy
+
+
+class RoleRequirements(NamedTuple):
+    role: str
+    must_have: Tuple[str, ...]
+    nice_to_have: Tuple[str, ...] = ()
+
+
+class RoleScore(NamedTuple):
+    role: str
+    match_percentage: float
+    matched: List[str]
+    missing: List[str]
+
+
+class CompiledRole(NamedTuple):
+    requirements: RoleRequirements
+    must_mask: int
+    nice_mask: int
+    # (skill name, bit) in requirement order, must-haves first; bit 0 for skills outside the vocabulary
+    ordered_bits: Tuple[Tuple[str, int], ...]
+    total_weight: float
+
+
+class SkillGapEngine:
+    """Scores skill sets against role requirements with normalized skill bitsets.
+
+    Every skill of the taxonomy vocabulary (skill list plus role and field
+    requirements) has a fixed bit; a resume and each role become integer masks,
+    so matching is an AND plus a popcount instead of nested list scans. Skills
+    outside the vocabulary have no bit: a resume never matches them and a role
+    requiring one always lists it as missing, so arbitrary input cannot grow
+    the bit table. Many roles are scored at once through a RoleCatalog.
+    """
+
+    def __init__(self, taxonomy: Taxonomy, must_have_weight: float = 1.0,
+                 nice_to_have_weight: float = 0.5, max_score: float = 95):
+        self.taxonomy = taxonomy
+        self.must_have_weight = must_have_weight
+        self.nice_to_have_weight = nice_to_have_weight
+        self.max_score = max_score
+        vocabulary = list(taxonomy.skills) + list(taxonomy.fallback_field_skills)
+        for rule in taxonomy.role_rules:
+            vocabulary.extend(rule.skills)
+        for skills in taxonomy.field_skills.values():
+            vocabulary.extend(skills)
+        self._bits: Dict[str, int] = {}
+        for skill in vocabulary:
+            self._bits.setdefault(self.normalize(skill), len(self._bits))
+
+    @property
+    def width(self) -> int:
+        """Number of skill bits"""
+        return len(self._bits)
+
+    def normalize(self, skill: str) -> str:
+        canonical = self.taxonomy.canonical_skill(skill)
+        return canonical.lower() if canonical else " ".join(skill.lower().split())
+
+    def bit(self, skill: str) -> int:
+        """The skill's bit, or 0 for a skill outside the vocabulary"""
+        index = self._bits.get(self.normalize(skill))
+        return 0 if index is None else 1 << index
+
+    def mask(self, skills: Iterable[str]) -> int:
+        mask = 0
+        for skill in skills:
+            mask |= self.bit(skill)
+        return mask
+
+    def compile(self, requirements: RoleRequirements) -> CompiledRole:
+        ordered_bits = []
+        must_mask = nice_mask = 0
+        unknown = set()
+        total_weight = 0.0
+        for skills, weight, must in ((requirements.must_have, self.must_have_weight, True),
+                                     (requirements.nice_to_have, self.nice_to_have_weight, False)):
+            for skill in skills:
+                bit = self.bit(skill)
+                if bit:
+                    if (must_mask | nice_mask) & bit:
+                        continue
+                    if must:
+                        must_mask |= bit
+                    else:
+                        nice_mask |= bit
+                else:
+                    # Outside the vocabulary: counts towards the total but can never match
+                    key = self.normalize(skill)
+                    if key in unknown:
+                        continue
+                    unknown.add(key)
+                ordered_bits.append((skill, bit))
+                total_weight += weight
+        return CompiledRole(requirements, must_mask, nice_mask, tuple(ordered_bits), total_weight)
+
+    def _percentage(self, resume_mask: int, compiled: CompiledRole) -> float:
+        must_hits = bin(resume_mask & compiled.must_mask).count("1")
+        nice_hits = bin(resume_mask & compiled.nice_mask).count("1")
+        weight = must_hits * self.must_have_weight + nice_hits * self.nice_to_have_weight
+        percentage = (weight / compiled.total_weight) * 100 if compiled.total_weight else 0.0
+        return min(percentage, self.max_score)
+
+    def _role_score(self, resume_mask: int, compiled: CompiledRole, percentage: float) -> RoleScore:
+        matched, missing = [], []
+        for skill, bit in compiled.ordered_bits:
+            (matched if resume_mask & bit else missing).append(skill)
+        return RoleScore(role=compiled.requirements.role, match_percentage=round(float(percentage), 1),
+                         matched=matched, missing=missing)
+
+    def score(self, resume_skills: Iterable[str], requirements: RoleRequirements) -> RoleScore:
+        resume_mask = self.mask(resume_skills)
+        compiled = self.compile(requirements)
+        return self._role_score(resume_mask, compiled, self._percentage(resume_mask, compiled))
+
+    def catalog(self, roles: Sequence[CompiledRole]) -> "RoleCatalog":
+        return RoleCatalog(self, roles)
+
+    def score_many(self, resume_skills: Iterable[str], roles: Union[Sequence[CompiledRole], "RoleCatalog"]) -> List[RoleScore]:
+        """Score one resume against many precompiled roles; results keep the input order.
+
+        A RoleCatalog scores all roles in one matrix-vector product. A plain
+        sequence (the few roles of one analysis) is scored role by role, which
+        is cheaper than building a matrix for it.
+        """
+        resume_mask = self.mask(resume_skills)
+        if isinstance(roles, RoleCatalog):
+            percentages = roles.percentages(resume_mask)
+            return [self._role_score(resume_mask, compiled, percentage)
+                    for compiled, percentage in zip(roles.roles, percentages)]
+        return [self._role_score(resume_mask, compiled, self._percentage(resume_mask, compiled)) for compiled in roles]
+
+    def rank(self, resume_skills: Iterable[str], catalog: "RoleCatalog", top_k: int = 10) -> List[RoleScore]:
+        """Best-matching roles of a catalog; matched/missing lists are only built for the top_k"""
+        import numpy as np
+
+        resume_mask = self.mask(resume_skills)
+        percentages = catalog.percentages(resume_mask)
+        # Stable sort on the negated score keeps catalog order between equal scores
+        best = np.argsort(-percentages, kind="stable")[:max(0, top_k)]
+        return [self._role_score(resume_mask, catalog.roles[i], percentages[i]) for i in best]
+
+
+class RoleCatalog:
+    """Compiled roles as one weight matrix (roles x skill bits), to score a resume against all of them at once"""
+
+    def __init__(self, engine: SkillGapEngine, roles: Sequence[CompiledRole]):
+        import numpy as np
+
+        self.engine = engine
+        self.roles = list(roles)
+        self._weights = np.zeros((len(self.roles), engine.width), dtype=np.float64)
+        self._totals = np.zeros(len(self.roles), dtype=np.float64)
+        for row, compiled in enumerate(self.roles):
+            for _, bit in compiled.ordered_bits:
+                if bit:
+                    weight = engine.must_have_weight if compiled.must_mask & bit else engine.nice_to_have_weight
+                    self._weights[row, bit.bit_length() - 1] = weight
+            self._totals[row] = compiled.total_weight
+
+    def __len__(self) -> int:
+        return len(self.roles)
+
+    def percentages(self, resume_mask: int):
+        """Unrounded match percentage of every role, capped like the bitset scorer"""
+        import numpy as np
+
+        vector = np.zeros(self.engine.width, dtype=np.float64)
+        index = 0
+        while resume_mask:
+            if resume_mask & 1:
+                vector[index] = 1.0
+            resume_mask >>= 1
+            index += 1
+        weights = self._weights @ vector
+        percentages = np.divide(weights * 100, self._totals, out=np.zeros_like(weights), where=self._totals > 0)
+        return np.minimum(percentages, self.engine.max_score)
@@ -0,0 +1,104 @@
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+
+# Terms this short are matched case-sensitively ("R" the language, not every "r")
+CASE_SENSITIVE_MAX_LEN = 2
+
+
+class SkillMatch(NamedTuple):
+    skill: str
+    start: int
+    end: int
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Compile terms into a prefix-factored regex alternation.
+
+    Shared prefixes are matched once, so the work per text position depends on
+    the length of the longest term rather than on the number of terms.
+    """
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        is_end = "" in node
+        # Spaces also match line breaks and runs of whitespace from PDF extraction
+        branches = [(r"\s+" if char == " " else re.escape(char)) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if is_end else group
+
+    return build(trie)
+
+
+class SkillMatcher:
+    """Finds every taxonomy term in a text in one linear regex pass.
+
+    Matches respect word boundaries, so "Java" does not match inside
+    "JavaScript" and "Git" does not match inside "digital". With prefix=True
+    only the start of a word must match ("engineer" finds "engineering").
+    The regex is compiled on first use, and pickled matchers (the taxonomy
+    snapshot) keep only its source.
+    """
+
+    def __init__(self, terms: Iterable[str], aliases: Optional[Dict[str, str]] = None,
+                 prefix: bool = False, case_sensitive_max_len: int = CASE_SENSITIVE_MAX_LEN):
+        self.terms = list(dict.fromkeys(terms))
+        self._rank = {term: i for i, term in enumerate(self.terms)}
+
+        # surface form (term or alias) -> canonical term
+        surfaces = {term: term for term in self.terms}
+        surfaces.update(aliases or {})
+        self._canonical = {surface.lower(): term for surface, term in surfaces.items()}
+
+        exact = [surface for surface in surfaces if len(surface) <= case_sensitive_max_len]
+        folded = [surface.lower() for surface in surfaces if len(surface) > case_sensitive_max_len]
+
+        alternatives = []
+        if exact:
+            # Short terms only match in their listed spelling
+            alternatives.append("(?-i:" + _trie_pattern(exact) + ")")
+        if folded:
+            alternatives.append(_trie_pattern(folded))
+
+        body = "|".join(alternatives) or "(?!)"
+        suffix = "" if prefix else r"(?![\w+#&])"
+        self._source = r"(?<![\w&])(?:" + body + ")" + suffix
+        self._pattern: Optional[re.Pattern] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return dict(self.__dict__, _pattern=None)
+
+    @property
+    def pattern(self) -> re.Pattern:
+        if self._pattern is None:
+            self._pattern = re.compile(self._source, re.IGNORECASE)
+        return self._pattern
+
+    def find_all(self, text: str) -> List[SkillMatch]:
+        """Every occurrence of a taxonomy term, with character offsets"""
+        return [
+            SkillMatch(self._canonical[" ".join(m.group().lower().split())], m.start(), m.end())
+            for m in self.pattern.finditer(text)
+        ]
+
+    def canonical(self, surface: str) -> Optional[str]:
+        """Taxonomy spelling of a term or alias given in any case"""
+        return self._canonical.get(" ".join(surface.lower().split()))
+
+    def in_taxonomy_order(self, terms: Iterable[str]) -> List[str]:
+        return sorted(terms, key=self._rank.__getitem__)
+
+    def unique(self, text: str) -> List[str]:
+        """Distinct terms found in the text, in taxonomy order"""
+        return self.in_taxonomy_order({match.skill for match in self.find_all(text)})
+
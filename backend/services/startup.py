@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import importlib
+from typing import Dict, List, Optional
+
+# Imported on first use rather than at startup; listed by /api/startup to show what a request has pulled in
+LAZY_MODULES = ("openai", "fitz", "pypdf", "PIL", "pytesseract", "numpy", "tiktoken")
+
+
+def is_serverless() -> bool:
+    """SERVERLESS=true/false when set, otherwise detected from the platform (Vercel, AWS Lambda)"""
+    flag = os.getenv("SERVERLESS")
+    if flag is not None:
+        return flag.lower() in ("1", "true", "yes", "on")
+    return bool(os.getenv("VERCEL") or os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+
+
+def preload_modules() -> List[str]:
+    """Import the installed LAZY_MODULES now; returns the ones that loaded"""
+    loaded = []
+    for name in LAZY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        loaded.append(name)
+    return loaded
+
+
+class StartupTimer:
+    """Wall time of each import/initialization phase of the app module.
+
+    Created before the framework imports, so the phases add up to the cold
+    start cost a serverless invocation pays before it can serve a request.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: Dict[str, float] = {}
+        self.ready_at: Optional[float] = None
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases[phase] = round((now - self._last) * 1000, 2)
+        self._last = now
+
+    def ready(self):
+        self.ready_at = self._last
+        total = (self.ready_at - self.started) * 1000
+        phases = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.phases.items())
+        print(f"[STARTUP] App imported in {total:.0f} ms ({phases})")
+
+    def stats(self) -> Dict:
+        return {
+            "serverless": is_serverless(),
+            "phases_ms": dict(self.phases),
+            "total_ms": round(((self.ready_at or self._last) - self.started) * 1000, 2),
+            "uptime_seconds": round(time.perf_counter() - self.started, 1),
+            "loaded_modules": [name for name in LAZY_MODULES if name in sys.modules],
+        }
@@ -0,0 +1,28 @@
+import os
+import tempfile
+
+
+def state_dir() -> str:
+    """Directory for the service's own SQLite files, readable only by the user the service runs as.
+
+    STATE_DIR overrides it. The default is under the system temp directory and
+    named after the user id; it is created with mode 0700, and an existing
+    directory owned by another user is refused, so it cannot be planted in
+    advance or read by other local users.
+    """
+    path = os.getenv("STATE_DIR") or os.path.join(tempfile.gettempdir(), f"smart-career-{_user_id()}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid"):
+        st = os.stat(path)
+        if st.st_uid != os.getuid():
+            raise PermissionError(f"State directory {path} is owned by another user")
+        if st.st_mode & 0o077:
+            os.chmod(path, 0o700)
+    return path
+
+
+def _user_id() -> str:
+    if hasattr(os, "getuid"):
+        return str(os.getuid())
+    import getpass
+    return getpass.getuser()
@@ -0,0 +1,68 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+
+class JSONFieldStream:
+    """Incrementally parses a streamed JSON object and yields each top-level field once it is complete.
+
+    Feed it the model's output as it arrives; after every chunk it returns the
+    (key, value) pairs whose value has been fully received, so a client can
+    show "skills" long before "summary" has been generated.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._key: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.buffer += chunk
+        fields = []
+        buffer = self.buffer
+        for pos in range(self._pos, len(buffer)):
+            char = buffer[pos]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None and self._value_start is None:
+                        self._key = json.loads(buffer[self._key_start:pos + 1])
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None:
+                    self._key_start = pos
+            elif char == ":" and self._depth == 1 and self._key is not None and self._value_start is None:
+                self._value_start = pos + 1
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 1:
+                    self._emit(buffer, pos, fields)
+                self._depth -= 1
+            elif char == "," and self._depth == 1:
+                self._emit(buffer, pos, fields)
+
+        self._pos = len(buffer)
+        return fields
+
+    def _emit(self, buffer: str, end: int, fields: List[Tuple[str, Any]]):
+        if self._key is not None and self._value_start is not None:
+            try:
+                fields.append((self._key, json.loads(buffer[self._value_start:end])))
+            except json.JSONDecodeError:
+                # Malformed field: skip it, the full document is validated at the end
+                pass
+        self._key = None
+        self._key_start = None
+        self._value_start = None
@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import pickle
+import hashlib
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+from services import skill_matcher
+from services.skill_matcher import SkillMatcher
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+DEFAULT_TAXONOMY_PATH = os.path.join(DATA_DIR, "taxonomy.json")
+DEFAULT_SNAPSHOT_PATH = os.path.join(DATA_DIR, "taxonomy.snapshot.pickle")
+# Modules whose classes are pickled in a snapshot; a change to their code invalidates it
+SNAPSHOT_CODE_MODULES = (__file__, skill_matcher.__file__)
+
+
+@dataclass(frozen=True)
+class RoleRule:
+    title_contains: Tuple[str, ...]
+    skills: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class Taxonomy:
+    """Read-only skill/role/field/industry tables with precomputed lookup indexes.
+
+    Built once per process from data/taxonomy.json and shared by every
+    AIAnalyzer; nothing here is allocated per request.
+    """
+    skills: Tuple[str, ...]
+    skill_aliases: Mapping[str, str]
+    skills_lower: FrozenSet[str]
+    skill_matcher: SkillMatcher
+
+    default_field: str
+    field_names: Tuple[str, ...]
+    field_keywords: Mapping[str, Tuple[str, ...]]
+    keyword_fields: Mapping[str, Tuple[str, ...]]
+    field_keyword_matcher: SkillMatcher
+    role_suggestions: Mapping[str, Tuple[str, ...]]
+    field_skills: Mapping[str, Tuple[str, ...]]
+    field_categories: Mapping[str, Tuple[str, ...]]
+    field_default_skills: Mapping[str, Tuple[str, ...]]
+    fallback_field_skills: Tuple[str, ...]
+    fallback_categories: Tuple[str, ...]
+    fallback_default_skills: Tuple[str, ...]
+
+    role_rules: Tuple[RoleRule, ...]
+    fallback_role_skills: Tuple[str, ...]
+    role_title_keywords: Tuple[str, ...]
+
+    industry_names: Tuple[str, ...]
+    industry_keywords: Mapping[str, Tuple[str, ...]]
+    keyword_industries: Mapping[str, Tuple[str, ...]]
+    skill_industry_hits: Mapping[str, FrozenSet[Tuple[str, str]]]
+
+    category_keywords: Mapping[str, Tuple[str, ...]]
+    learning_resources: Mapping[str, str]
+    learning_timeframes: Mapping[str, str]
+    learning_tips: Mapping[str, str]
+
+    def canonical_skill(self, name: str) -> Optional[str]:
+        """Map a skill name or alias (any case) to its taxonomy spelling"""
+        return self.skill_matcher.canonical(name)
+
+    def industry_hits(self, skill_lower: str) -> FrozenSet[Tuple[str, str]]:
+        """(industry, keyword) pairs whose keyword occurs in the given lowercase skill name"""
+        hits = self.skill_industry_hits.get(skill_lower)
+        if hits is None:
+            # Skills outside the taxonomy (e.g. from the LLM) are resolved on the fly
+            hits = _industry_hits(skill_lower, self.keyword_industries)
+        return hits
+
+    def __reduce__(self):
+        # MappingProxyType cannot be pickled: snapshots store plain dicts and wrap them again on load
+        state = {}
+        for field in fields(self):
+            value = getattr(self, field.name)
+            state[field.name] = dict(value) if isinstance(value, MappingProxyType) else value
+        return _restore_taxonomy, (state,)
+
+
+def _restore_taxonomy(state: Dict) -> Taxonomy:
+    return Taxonomy(**{
+        name: MappingProxyType(value) if isinstance(value, dict) else value for name, value in state.items()
+    })
+
+
+def _freeze(mapping: Dict[str, List[str]]) -> Mapping[str, Tuple[str, ...]]:
+    return MappingProxyType({key: tuple(values) for key, values in mapping.items()})
+
+
+def _invert(mapping: Dict[str, List[str]]) -> Mapping[str, Tuple[str, ...]]:
+    inverted: Dict[str, List[str]] = {}
+    for key, values in mapping.items():
+        for value in values:
+            inverted.setdefault(value, []).append(key)
+    return _freeze(inverted)
+
+
+def _industry_hits(skill_lower: str, keyword_industries: Mapping[str, Tuple[str, ...]]) -> FrozenSet[Tuple[str, str]]:
+    return frozenset(
+        (industry, keyword)
+        for keyword, industries in keyword_industries.items() if keyword in skill_lower
+        for industry in industries
+    )
+
+
+def build_taxonomy(data: Dict) -> Taxonomy:
+    fields = data["fields"]
+    fallbacks = data["fallbacks"]
+    aliases = data.get("skill_aliases", {})
+
+    field_keywords = {name: field["keywords"] for name, field in fields.items() if "keywords" in field}
+    industries = data["industries"]
+    keyword_industries = _invert(industries)
+    skills = tuple(data["skills"])
+
+    return Taxonomy(
+        skills=skills,
+        skill_aliases=MappingProxyType(dict(aliases)),
+        skills_lower=frozenset(skill.lower() for skill in skills),
+        skill_matcher=SkillMatcher(skills, aliases),
+
+        default_field=data["default_field"],
+        field_names=tuple(fields),
+        field_keywords=_freeze(field_keywords),
+        keyword_fields=_invert(field_keywords),
+        # Field keywords are lowercase word prefixes ("engineer" also counts "engineering")
+        field_keyword_matcher=SkillMatcher(
+            [kw for keywords in field_keywords.values() for kw in keywords],
+            prefix=True, case_sensitive_max_len=0
+        ),
+        role_suggestions=_freeze({name: field["roles"] for name, field in fields.items() if "roles" in field}),
+        field_skills=_freeze({name: field["skills"] for name, field in fields.items() if "skills" in field}),
+        field_categories=_freeze({name: field["categories"] for name, field in fields.items() if "categories" in field}),
+        field_default_skills=_freeze({name: field["default_skills"] for name, field in fields.items() if "default_skills" in field}),
+        fallback_field_skills=tuple(fallbacks["field_skills"]),
+        fallback_categories=tuple(fallbacks["categories"]),
+        fallback_default_skills=tuple(fallbacks["default_skills"]),
+
+        role_rules=tuple(RoleRule(tuple(rule["title_contains"]), tuple(rule["skills"])) for rule in data["role_rules"]),
+        fallback_role_skills=tuple(data["fallback_role_skills"]),
+        role_title_keywords=tuple(data["role_title_keywords"]),
+
+        industry_names=tuple(industries),
+        industry_keywords=_freeze(industries),
+        keyword_industries=keyword_industries,
+        skill_industry_hits=MappingProxyType({
+            skill.lower(): _industry_hits(skill.lower(), keyword_industries) for skill in skills
+        }),
+
+        category_keywords=_freeze(data.get("category_keywords", {})),
+        learning_resources=MappingProxyType(dict(data["learning"]["resources"])),
+        learning_timeframes=MappingProxyType(dict(data["learning"]["timeframes"])),
+        learning_tips=MappingProxyType(dict(data["learning"]["tips"])),
+    )
+
+
+def _snapshot_path() -> str:
+    # An empty TAXONOMY_SNAPSHOT disables the snapshot
+    return os.getenv("TAXONOMY_SNAPSHOT", DEFAULT_SNAPSHOT_PATH)
+
+
+def _snapshot_key(raw: bytes) -> str:
+    """What a snapshot must have been built from: this JSON, this taxonomy/matcher code and this Python version"""
+    digest = hashlib.sha256(raw)
+    for module_path in SNAPSHOT_CODE_MODULES:
+        with open(module_path, "rb") as f:
+            digest.update(f.read())
+    digest.update(f"{sys.version_info.major}.{sys.version_info.minor}".encode())
+    return digest.hexdigest()
+
+
+def _read_snapshot(snapshot_path: str, key: str) -> Optional[Taxonomy]:
+    try:
+        with open(snapshot_path, "rb") as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"[TAXONOMY] Ignoring unreadable snapshot {snapshot_path}: {str(e)}")
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("key") != key:
+        print(f"[TAXONOMY] Snapshot {snapshot_path} was built from a different taxonomy or code; "
+              f"building from JSON (rebuild it with `python -m tools.taxonomy_snapshot`)")
+        return None
+    return snapshot["taxonomy"]
+
+
+def load_taxonomy(path: Optional[str] = None, snapshot_path: Optional[str] = None) -> Taxonomy:
+    """Build the taxonomy from JSON, or load the prebuilt snapshot when it was made from the same JSON and code"""
+    path = path or os.getenv("TAXONOMY_PATH") or DEFAULT_TAXONOMY_PATH
+    snapshot_path = _snapshot_path() if snapshot_path is None else snapshot_path
+    with open(path, "rb") as f:
+        raw = f.read()
+    if snapshot_path:
+        taxonomy = _read_snapshot(snapshot_path, _snapshot_key(raw))
+        if taxonomy is not None:
+            return taxonomy
+    return build_taxonomy(json.loads(raw))
+
+
+def write_snapshot(path: Optional[str] = None, snapshot_path: Optional[str] = None) -> str:
+    """Pickle the built taxonomy next to the JSON it was built from; returns the snapshot path"""
+    path = path or os.getenv("TAXONOMY_PATH") or DEFAULT_TAXONOMY_PATH
+    snapshot_path = snapshot_path or _snapshot_path() or DEFAULT_SNAPSHOT_PATH
+    with open(path, "rb") as f:
+        raw = f.read()
+    snapshot = {
+        "key": _snapshot_key(raw),
+        "taxonomy": build_taxonomy(json.loads(raw)),
+    }
+    temp_path = snapshot_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, snapshot_path)
+    return snapshot_path
+
+
+@lru_cache(maxsize=1)
+def get_taxonomy() -> Taxonomy:
+    """Process-wide taxonomy, loaded on first use"""
+    return load_taxonomy()
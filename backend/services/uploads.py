@@ -0,0 +1,107 @@
+import os
+import hashlib
+import tempfile
+from typing import Dict, Optional
+
+PDF_MAGIC = b"%PDF-"
+# Readers accept a PDF header anywhere in the first KiB (some generators prepend junk)
+MAGIC_SEARCH_BYTES = 1024
+
+
+def format_size(num_bytes: int) -> str:
+    if num_bytes >= 1024 * 1024:
+        return f"{num_bytes / (1024 * 1024):.3g} MB"
+    return f"{num_bytes / 1024:.3g} KB"
+
+
+class UploadError(Exception):
+    """Raised when an upload is rejected; carries the HTTP status code to answer with"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class SpooledUpload:
+    """An upload copied to a private temp file, with its size and SHA-256.
+
+    Parsers open the file by path, so the upload is never held in memory as a
+    whole and process pool workers receive a path instead of the bytes.
+    """
+
+    def __init__(self, path: str, size: int, sha256: str):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+
+    def close(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class UploadSpooler:
+    """Copies uploads to disk in fixed-size chunks, enforcing a size limit and the PDF header"""
+
+    def __init__(self, max_bytes: int = 10 * 1024 * 1024, directory: Optional[str] = None,
+                 chunk_size: int = 64 * 1024):
+        self.max_bytes = max_bytes
+        self.directory = directory or None
+        self.chunk_size = max(chunk_size, MAGIC_SEARCH_BYTES)
+
+        self.accepted = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "UploadSpooler":
+        return cls(
+            max_bytes=int(os.getenv("MAX_UPLOAD_BYTES", 10 * 1024 * 1024)),
+            directory=os.getenv("UPLOAD_SPOOL_DIR"),
+        )
+
+    def _reject(self, message: str, status_code: int = 400):
+        self.rejected += 1
+        raise UploadError(message, status_code)
+
+    async def spool_pdf(self, file) -> SpooledUpload:
+        """Copy a Starlette UploadFile to a temp file; raises UploadError for oversized or non-PDF uploads"""
+        # The multipart parser already knows the size, so oversized files are rejected without copying
+        if getattr(file, "size", None) is not None and file.size > self.max_bytes:
+            self._reject(f"File is too large (max {format_size(self.max_bytes)})", 413)
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix="upload-", suffix=".pdf", dir=self.directory)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = await file.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    if size == 0 and PDF_MAGIC not in chunk[:MAGIC_SEARCH_BYTES]:
+                        self._reject("Only PDF files are supported (file does not start with a PDF header)")
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        self._reject(f"File is too large (max {format_size(self.max_bytes)})", 413)
+                    digest.update(chunk)
+                    out.write(chunk)
+            if size == 0:
+                self._reject("PDF file is empty")
+        except BaseException:
+            os.unlink(path)
+            raise
+
+        self.accepted += 1
+        return SpooledUpload(path, size, digest.hexdigest())
+
+    def stats(self) -> Dict[str, int]:
+        return {"max_bytes": self.max_bytes, "accepted": self.accepted, "rejected": self.rejected}
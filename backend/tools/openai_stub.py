@@ -0,0 +1,134 @@
+"""Minimal local stand-in for the OpenAI chat completions API.
+
+Run it and point the backend at it to exercise the live (non-mock) code paths
+without network access or API costs:
+
+    uvicorn tools.openai_stub:app --port 8100
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://localhost:8100/v1 python main.py
+
+STUB_LATENCY (seconds) adds an artificial delay to every completion.
+Streaming requests ("stream": true) are answered as server-sent events in
+small chunks, STUB_CHUNK_DELAY seconds apart.
+
+Fault injection for provider outages: STUB_ERROR_RATE (0-1) answers that
+share of completions with STUB_ERROR_STATUS (default 503). Latency and errors
+can also be changed while the stub runs, e.g. to simulate an outage and its
+recovery:
+
+    curl -X POST localhost:8100/stub/faults -d '{"error_rate": 1, "latency": 5}'
+    curl -X POST localhost:8100/stub/faults -d '{"error_rate": 0, "latency": 0}'
+"""
+import os
+import json
+import time
+import random
+import asyncio
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="OpenAI API stub")
+
+STUB_ANALYSIS = {
+    "skills": ["Python", "SQL", "Docker", "Communication"],
+    "experience_years": 5.0,
+    "current_field": "Software Development",
+    "role_matches": {"Senior Software Engineer": 82.0, "Tech Lead": 71.0, "Solutions Architect": 64.0},
+    "skill_gaps": {
+        "Senior Software Engineer": ["Kubernetes", "System Design"],
+        "Tech Lead": ["Leadership", "Mentorship"],
+        "Solutions Architect": ["AWS", "Cloud Architecture"]
+    },
+    "recommendations": [
+        {"skill": "Kubernetes", "priority": "High", "resource": "Kubernetes.io Interactive Tutorial", "timeframe": "1-2 months", "learning_tip": "Deploy a small app to a local cluster."}
+    ],
+    "trending_industries": ["SaaS", "Cloud Computing"],
+    "summary": "Stub analysis summary. Returned by the local OpenAI stub server.",
+    "ats_feedback": ["Stub ATS tip"]
+}
+
+
+FAULTS = {
+    "latency": float(os.getenv("STUB_LATENCY", 0)),
+    "error_rate": float(os.getenv("STUB_ERROR_RATE", 0)),
+    "error_status": int(os.getenv("STUB_ERROR_STATUS", 503)),
+}
+
+
+@app.get("/stub/faults")
+async def get_faults():
+    return FAULTS
+
+
+@app.post("/stub/faults")
+async def set_faults(request: Request):
+    """Update latency, error_rate and/or error_status; returns the new settings"""
+    updates = await request.json()
+    for key in FAULTS:
+        if key in updates:
+            FAULTS[key] = type(FAULTS[key])(updates[key])
+    return FAULTS
+
+
+def _is_vision_request(messages) -> bool:
+    return any(isinstance(m.get("content"), list) for m in messages)
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if FAULTS["latency"]:
+        await asyncio.sleep(FAULTS["latency"])
+    if FAULTS["error_rate"] and random.random() < FAULTS["error_rate"]:
+        return JSONResponse(
+            status_code=FAULTS["error_status"],
+            content={"error": {"message": "Injected fault from the OpenAI stub", "type": "server_error", "code": None}}
+        )
+
+    messages = body.get("messages", [])
+    if _is_vision_request(messages):
+        content = "Jane Doe\nSoftware Engineer\nExperience\n5 years of Python and SQL development."
+    else:
+        content = json.dumps(STUB_ANALYSIS)
+
+    if body.get("stream"):
+        return StreamingResponse(_stream_chunks(content, body.get("model", "stub")), media_type="text/event-stream")
+
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }
+        ],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    }
+
+
+async def _stream_chunks(content: str, model: str, size: int = 24):
+    delay = float(os.getenv("STUB_CHUNK_DELAY", 0.02))
+    for start in range(0, len(content), size):
+        chunk = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": content[start:start + size]}, "finish_reason": None}]
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        if delay:
+            await asyncio.sleep(delay)
+    done = {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+    }
+    yield f"data: {json.dumps(done)}\n\n"
+    yield "data: [DONE]\n\n"
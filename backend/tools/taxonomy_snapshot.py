@@ -0,0 +1,32 @@
+"""Build data/taxonomy.snapshot.pickle; run at deploy time (`npm run build:backend`), it is not committed.
+
+    python -m tools.taxonomy_snapshot
+
+The server loads the snapshot at import instead of building the lookup
+indexes and matchers from the JSON. A snapshot that does not match the JSON,
+the taxonomy/matcher code or the Python version is ignored, so a stale one
+only costs the build time, never wrong results.
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.taxonomy import load_taxonomy, write_snapshot
+
+
+def main():
+    path = write_snapshot()
+    started = time.perf_counter()
+    load_taxonomy(snapshot_path="")
+    built = time.perf_counter() - started
+    started = time.perf_counter()
+    load_taxonomy(snapshot_path=path)
+    loaded = time.perf_counter() - started
+    print(f"[TAXONOMY] Snapshot written to {path} ({os.path.getsize(path)} bytes); "
+          f"build {built * 1000:.1f} ms, snapshot load {loaded * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
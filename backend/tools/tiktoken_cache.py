@@ -0,0 +1,43 @@
+"""Download tiktoken's encoding tables into data/tiktoken; run at deploy time (`npm run build:backend`).
+
+    python -m tools.tiktoken_cache
+
+tiktoken fetches its tables over the network on first use. The prompt builder
+reads them from data/tiktoken instead, which vercel.json bundles with the
+function (`includeFiles`), so a serverless cold start counts tokens without a
+download. Without the bundle, serverless instances use the approximate count.
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.prompt_builder import BUNDLED_TIKTOKEN_CACHE
+
+
+def main():
+    os.makedirs(BUNDLED_TIKTOKEN_CACHE, exist_ok=True)
+    os.environ["TIKTOKEN_CACHE_DIR"] = BUNDLED_TIKTOKEN_CACHE
+    model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    started = time.perf_counter()
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Not fatal for the deploy: the server falls back to approximate token counts
+        print(f"[PROMPT] Could not cache tiktoken tables ({type(e).__name__}: {str(e)}); "
+              f"serverless instances will use approximate token counts")
+        if not os.listdir(BUNDLED_TIKTOKEN_CACHE):
+            os.rmdir(BUNDLED_TIKTOKEN_CACHE)
+        return
+    size = sum(os.path.getsize(os.path.join(BUNDLED_TIKTOKEN_CACHE, name)) for name in os.listdir(BUNDLED_TIKTOKEN_CACHE))
+    print(f"[PROMPT] tiktoken {encoding.name} tables for {model} cached in {BUNDLED_TIKTOKEN_CACHE} "
+          f"({size} bytes, {time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()